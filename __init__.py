@@ -19,7 +19,7 @@ bl_info = {
     'name': 'WM Setup Tools',
     'author': 'SyureOjisan',
     'version': (1, 1, 0),  # big modifying, small modifying, bug fix or refactoring
-    'blender': (2, 93, 0),
+    'blender': (3, 3, 0),
     'location': 'Properties > Object Data Properties',
     'description': 'Setup Tools for character modeling',
     'warning': '',
@@ -32,6 +32,9 @@ bl_info = {
 
 if 'bpy' in locals():
     import imp
+    imp.reload(backup)
+    imp.reload(cache)
+    imp.reload(datablock)
     imp.reload(debug)
     imp.reload(file)
     imp.reload(function)
@@ -40,9 +43,14 @@ if 'bpy' in locals():
     imp.reload(preferences)
     imp.reload(setting)
     imp.reload(setup)
+    imp.reload(skinning)
     imp.reload(syntax)
     imp.reload(translate)
+    imp.reload(vertexcache)
 else:
+    from . import backup
+    from . import cache
+    from . import datablock
     from . import debug
     from . import file
     from . import function
@@ -51,20 +59,24 @@ else:
     from . import preferences
     from . import setting
     from . import setup
+    from . import skinning
     from . import syntax
     from . import translate
+    from . import vertexcache
 
 
 import bpy
-from bpy.props import BoolProperty, CollectionProperty, EnumProperty, IntProperty, PointerProperty, StringProperty
+from bpy.props import BoolProperty, CollectionProperty, EnumProperty, FloatProperty, IntProperty, PointerProperty, StringProperty
 
 from bpy.types import PropertyGroup
 
 from .operators import SAMK_OT_NewSourceCollection, SAMK_OT_NewSubSourceCollection
 
-from .setting.setting_operators import update_active_object, update_property_candidates_by_scope_type, scoped_collection_candidates, update_scoped_object, scoped_object_candidates, SAMKSpec, SAMKSpecUserDef
+from .setting.setting_operators import update_active_object, update_property_candidates_by_scope_type, scoped_collection_candidates, update_scoped_object, scoped_object_candidates, SAMKSpec, SAMKSpecUserDef, SAMKSpecVariant
 
-from .setting.setting_command import SAMKCommandForAdd, SAMKStrategies
+from .setting.setting_command import SAMKCommandForAdd, SAMKStrategies, clear_caches, invalidate_names_cache, migrate_legacy_candidates
+
+from .setup.setup_checkpoint import SAMKSetupCheckpoint
 
 from .syntax import Syntax
 
@@ -85,6 +97,18 @@ class SAMKAllProperty(PropertyGroup):
         name='Index for spec list',
         default=0
     )
+    new_variant_name: StringProperty(
+        name='New variant name',
+        description='type unique new variant name',
+        default=''
+    )
+    spec_variants: CollectionProperty(
+        type=SAMKSpecVariant
+    )
+    spec_variants_index: IntProperty(
+        name='Index for spec variant list',
+        default=0
+    )
     scoped_collection: EnumProperty(
         name='Scoped collection',
         description='Scoped collection',
@@ -133,6 +157,82 @@ class SAMKAllProperty(PropertyGroup):
         description='Enable debug interface',
         default=False
     )
+    is_enabled_modal_setup: BoolProperty(
+        name='Run setup in background',
+        description='Run setup step by step with a progress bar. Press Esc to cancel and roll back',
+        default=False
+    )
+    is_enabled_undo_light: BoolProperty(
+        name='Undo-light mode',
+        description='Skip the global undo step of Setup and Translate, and back up only the objects to be replaced. Use Restore Backup to revert',
+        default=False
+    )
+    is_enabled_shape_key_compaction: BoolProperty(
+        name='Remove unchanged shape keys',
+        description='After Setup and Translate, remove shape keys that do not move any vertex from their relative key',
+        default=False
+    )
+    shape_key_compaction_tolerance: FloatProperty(
+        name='Tolerance',
+        description='Shape keys whose maximum vertex movement is at most this distance are removed',
+        default=1e-5,
+        min=0.0,
+        precision=6
+    )
+    is_enabled_shape_key_stats: BoolProperty(
+        name='Store moved vertex counts',
+        description='Store the number of moved vertices of each remaining shape key as a custom property of the mesh',
+        default=False
+    )
+    is_enabled_material_consolidation: BoolProperty(
+        name='Merge duplicate material slots',
+        description='After Setup and Translate, merge material slots that use the same material',
+        default=False
+    )
+    is_enabled_ge_skinning: BoolProperty(
+        name='Optimize skin weights',
+        description='When translating to GE mode, prune small deform weights, limit influences per vertex and normalize them',
+        default=False
+    )
+    ge_max_influences: IntProperty(
+        name='Max Influences',
+        description='Maximum number of deform bones that influence one vertex',
+        default=4,
+        min=1,
+        max=32
+    )
+    ge_weight_epsilon: FloatProperty(
+        name='Weight Threshold',
+        description='Deform weights at most this value are removed',
+        default=1e-3,
+        min=0.0,
+        max=1.0,
+        precision=4
+    )
+    ge_weight_quantize_steps: IntProperty(
+        name='Quantize Steps',
+        description='Round normalized weights to multiples of 1/steps (0 disables quantization)',
+        default=0,
+        min=0,
+        max=65535
+    )
+    is_enabled_vertex_cache_reorder: BoolProperty(
+        name='Reorder for vertex cache',
+        description='After Translate, reorder faces and vertices of translated objects for GPU vertex cache efficiency',
+        default=False
+    )
+    vertex_cache_size: IntProperty(
+        name='Vertex Cache Size',
+        description='Number of vertices assumed to fit in the GPU post-transform cache',
+        default=16,
+        min=3,
+        max=64
+    )
+    is_enabled_orphan_purge: BoolProperty(
+        name='Purge orphan data',
+        description='After Setup, Translate and Feedback, remove meshes, materials, objects and collections that were created during the run and left without users',
+        default=False
+    )
     scope_type_to_edit: EnumProperty(
         name='Scope type to edit',
         description='Scope type to edit',
@@ -149,6 +249,15 @@ class SAMKAllProperty(PropertyGroup):
     command_for_add: PointerProperty(
         type=SAMKCommandForAdd
     )
+    setup_checkpoints: CollectionProperty(
+        type=SAMKSetupCheckpoint
+    )
+    setup_seconds_per_unit: FloatProperty(
+        name='Seconds per setup cost unit',
+        description='Calibrated from past Setup timings and used by the dry run estimate',
+        default=0.0,
+        min=0.0
+    )
 
 
 classes = interface.classes + \
@@ -157,6 +266,7 @@ classes = interface.classes + \
     setting.setting_command.classes + \
     setting.setting_spec.classes + \
     setting.setting_operators.classes + \
+    setup.setup_checkpoint.classes + \
     [SAMKAllProperty, ]
 
 
@@ -195,6 +305,16 @@ def register():
 
     init_props()
 
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_names_cache)
+    bpy.app.handlers.depsgraph_update_post.append(cache.on_depsgraph_update)
+    bpy.app.handlers.load_post.append(cache.on_file_changed)
+    bpy.app.handlers.undo_post.append(cache.on_file_changed)
+    bpy.app.handlers.redo_post.append(cache.on_file_changed)
+    bpy.app.handlers.load_post.append(clear_caches)
+    bpy.app.handlers.load_post.append(migrate_legacy_candidates)
+    bpy.app.handlers.undo_post.append(clear_caches)
+    bpy.app.handlers.redo_post.append(clear_caches)
+
     print('Add-on \'{}\' is enabled'.format(bl_info['name']))
 
 
@@ -208,6 +328,16 @@ def unregister():
 
     clear_props()
 
+    bpy.app.handlers.depsgraph_update_post.remove(invalidate_names_cache)
+    bpy.app.handlers.depsgraph_update_post.remove(cache.on_depsgraph_update)
+    bpy.app.handlers.load_post.remove(cache.on_file_changed)
+    bpy.app.handlers.undo_post.remove(cache.on_file_changed)
+    bpy.app.handlers.redo_post.remove(cache.on_file_changed)
+    bpy.app.handlers.load_post.remove(clear_caches)
+    bpy.app.handlers.load_post.remove(migrate_legacy_candidates)
+    bpy.app.handlers.undo_post.remove(clear_caches)
+    bpy.app.handlers.redo_post.remove(clear_caches)
+
     print('Add-on \'{}\' is disabled'.format(bl_info['name']))
 
 
@@ -0,0 +1,136 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+import logging
+
+from .syntax import Syntax
+
+
+logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
+
+
+# 元のオブジェクト名、メッシュ名、所属コレクション名をバックアップ側のIDプロパティに保持する
+KEY_ORIGINAL_NAME = Syntax.P_HEADER + 'backup_of'
+KEY_ORIGINAL_DATA_NAME = Syntax.P_HEADER + 'backup_data_of'
+KEY_ORIGINAL_COLLECTIONS = Syntax.P_HEADER + 'backup_collections'
+# バックアップ時点で存在しなかったオブジェクト名。復元時に削除する
+KEY_CREATED = Syntax.P_HEADER + 'backup_created'
+
+
+def backup_collection():
+    try:
+        return bpy.data.collections[Syntax.COL_BACKUP]
+    except KeyError:
+        return None
+
+
+def has_backup():
+    return backup_collection() is not None
+
+
+def _remove_object(obj):
+    mesh = obj.data
+    bpy.data.objects.remove(obj)
+    if mesh is not None and mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
+
+
+def clear_backup():
+    collection = backup_collection()
+    if collection is None:
+        return
+    for obj in tuple(collection.objects):
+        _remove_object(obj)
+    bpy.data.collections.remove(collection)
+
+
+class TargetedBackup:
+    # グローバルなUndoの代わりに、置き換えられるオブジェクトだけを複製して保持する
+    # バックアップ用コレクションはシーンにリンクせず、フェイクユーザーで保存対象にする
+    def __init__(self) -> None:
+        clear_backup()
+        self._collection = bpy.data.collections.new(Syntax.COL_BACKUP)
+        self._collection.use_fake_user = True
+        self._collection[KEY_CREATED] = list()
+
+    def backup_object_named(self, name):
+        try:
+            obj = bpy.data.objects[name]
+        except KeyError:
+            self._collection[KEY_CREATED] = list(self._collection[KEY_CREATED]) + [name]
+            logger.info('Backup (not exist yet) : %s', name)
+            return
+        self.backup_object(obj)
+
+    def backup_object(self, obj: bpy.types.Object):
+        copy_obj = obj.copy()
+        if obj.data is not None:
+            copy_obj.data = obj.data.copy()
+            copy_obj[KEY_ORIGINAL_DATA_NAME] = obj.data.name
+        copy_obj[KEY_ORIGINAL_NAME] = obj.name
+        copy_obj[KEY_ORIGINAL_COLLECTIONS] = [collection.name for collection in obj.users_collection]
+        self._collection.objects.link(copy_obj)
+        logger.info('Backup object : %s', obj.name)
+
+
+def restore_backup():
+    collection = backup_collection()
+    if collection is None:
+        return tuple()
+
+    for name in collection.get(KEY_CREATED, list()):
+        try:
+            _remove_object(bpy.data.objects[name])
+        except KeyError:
+            pass
+
+    restored_objects = list()
+    for copy_obj in tuple(collection.objects):
+        original_name = copy_obj[KEY_ORIGINAL_NAME]
+        try:
+            _remove_object(bpy.data.objects[original_name])
+        except KeyError:
+            pass
+        copy_obj.name = original_name
+        if KEY_ORIGINAL_DATA_NAME in copy_obj:
+            copy_obj.data.name = copy_obj[KEY_ORIGINAL_DATA_NAME]
+
+        linked = False
+        for collection_name in copy_obj[KEY_ORIGINAL_COLLECTIONS]:
+            if collection_name == bpy.context.scene.collection.name:
+                bpy.context.scene.collection.objects.link(copy_obj)
+                linked = True
+                continue
+            try:
+                bpy.data.collections[collection_name].objects.link(copy_obj)
+            except KeyError:
+                continue
+            linked = True
+        if not linked:
+            bpy.context.scene.collection.objects.link(copy_obj)
+        collection.objects.unlink(copy_obj)
+
+        for key in (KEY_ORIGINAL_NAME, KEY_ORIGINAL_DATA_NAME, KEY_ORIGINAL_COLLECTIONS):
+            if key in copy_obj:
+                del copy_obj[key]
+        restored_objects.append(copy_obj)
+        logger.info('Restore object : %s', original_name)
+
+    bpy.data.collections.remove(collection)
+    return tuple(restored_objects)
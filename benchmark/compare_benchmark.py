@@ -0,0 +1,78 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compare benchmark results without Blender.
+#   python benchmark/compare_benchmark.py baseline.json result.json --threshold 0.1
+
+import argparse
+
+import json
+
+import sys
+
+
+def load_results(filepath):
+    with open(filepath) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold, metric='time_sec_median'):
+    rows = list()
+    regressions = list()
+    for case, result in current['results'].items():
+        try:
+            value_base = baseline['results'][case][metric]
+        except KeyError:
+            rows.append((case, None, result[metric], None))
+            continue
+        value_now = result[metric]
+        ratio = (value_now - value_base) / value_base if value_base > 0 else 0.0
+        rows.append((case, value_base, value_now, ratio))
+        if ratio > threshold:
+            regressions.append(case)
+    return rows, regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Compare WM Setup Tools benchmark results')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown ratio (0.1 = 10%%)')
+    parser.add_argument('--metric', default='time_sec_median')
+    args = parser.parse_args(argv)
+
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+    if baseline.get('config') != current.get('config'):
+        print('Warning: scene configs differ between baseline and current result.')
+
+    rows, regressions = compare(baseline, current, args.threshold, args.metric)
+    for case, value_base, value_now, ratio in rows:
+        if ratio is None:
+            print(f'{case:24s} {"-":>10s} {value_now:10.3f}  (new case)')
+            continue
+        mark = 'REGRESSION' if case in regressions else ''
+        print(f'{case:24s} {value_base:10.3f} {value_now:10.3f} {ratio * 100:+7.1f}% {mark}')
+
+    if regressions:
+        print(f'Regressions detected : {regressions}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
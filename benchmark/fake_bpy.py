@@ -0,0 +1,653 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+# In-memory stand-in for the part of the bpy API used by the add-on's pure logic
+# (collections, objects, vertex groups, shape keys, properties).
+# install() registers it as 'bpy' in sys.modules, so the add-on modules can be imported
+# and run in plain CPython. Nothing is evaluated: operators are no-ops and meshes have no geometry.
+
+import sys
+
+import types
+
+
+# Properties
+
+
+class _Property:
+    DEFAULTS = {'str': '', 'int': 0, 'float': 0.0, 'bool': False, 'enum': ''}
+
+    def __init__(self, kind, **kwargs) -> None:
+        self.kind = kind
+        self.kwargs = kwargs
+
+    @property
+    def update(self):
+        return self.kwargs.get('update')
+
+    def default_value(self):
+        if self.kind == 'collection':
+            return PropCollection(self.kwargs.get('type'))
+        if self.kind == 'pointer':
+            return self.kwargs['type']()
+        if 'default' in self.kwargs:
+            return self.kwargs['default']
+        items = self.kwargs.get('items')
+        if self.kind == 'enum' and isinstance(items, (list, tuple)) and len(items) > 0:
+            return items[0][0]
+        return self.DEFAULTS[self.kind]
+
+    # bpy.types.Object.samk_strategies = PointerProperty(...) のような動的登録用
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        values = instance.__dict__.setdefault('_fake_dynamic_props', dict())
+        try:
+            return values[id(self)]
+        except KeyError:
+            value = self.default_value()
+            values[id(self)] = value
+            return value
+
+
+def _property_factory(kind):
+    def _factory(**kwargs):
+        return _Property(kind, **kwargs)
+    return _factory
+
+
+class PropertyOwner:
+    def __init__(self, *args, **kwargs) -> None:
+        object.__setattr__(self, '_fake_updates', dict())
+        for cls in reversed(type(self).__mro__):
+            for name, prop in cls.__dict__.get('__annotations__', dict()).items():
+                if not isinstance(prop, _Property):
+                    continue
+                object.__setattr__(self, name, prop.default_value())
+                self._fake_updates[name] = prop.update
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        update = self.__dict__.get('_fake_updates', dict()).get(name)
+        if update is not None:
+            update(self, context)
+
+    def as_pointer(self):
+        return id(self)
+
+    @property
+    def id_data(self):
+        # 所有するIDは追跡しないため、自身をIDとして扱う
+        return self
+
+
+class PropCollection:
+    def __init__(self, item_type=None, items=None) -> None:
+        self._type = item_type
+        self._items = list() if items is None else list(items)
+
+    def add(self):
+        item = self._type()
+        self._items.append(item)
+        return item
+
+    def remove(self, index):
+        del self._items[index]
+
+    def clear(self):
+        self._items.clear()
+
+    def get(self, name, default=None):
+        for item in self._items:
+            if item.name == name:
+                return item
+        return default
+
+    def keys(self):
+        return [item.name for item in self._items]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(tuple(self._items))
+
+    def __bool__(self):
+        return len(self._items) > 0
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self.get(key)
+            if item is None:
+                raise KeyError(f'bpy_prop_collection[key]: key "{key}" not found')
+            return item
+        if isinstance(key, slice):
+            return self._items[key]
+        return self._items[key]
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return self.get(key) is not None
+        return key in self._items
+
+
+# ID datablocks
+
+
+class ID(PropertyOwner):
+    def __init__(self, name='') -> None:
+        super().__init__()
+        self.name = name
+        self.users = 1
+
+    @property
+    def original(self):
+        return self
+
+    @property
+    def session_uid(self):
+        return id(self)
+
+    def as_pointer(self):
+        return id(self)
+
+
+class IDCollection(PropCollection):
+    def __init__(self, id_type) -> None:
+        super().__init__(id_type)
+
+    def unique_name(self, name):
+        if self.get(name) is None:
+            return name
+        count = 1
+        while self.get(f'{name}.{count:03}') is not None:
+            count += 1
+        return f'{name}.{count:03}'
+
+    def new(self, name, *args):
+        item = self._type(self.unique_name(name), *args)
+        self._items.append(item)
+        return item
+
+    def append_existing(self, item):
+        item.name = self.unique_name(item.name)
+        self._items.append(item)
+        return item
+
+    def remove(self, item):
+        self._items.remove(item)
+        if isinstance(item, Object):
+            for collection in tuple(item.users_collection):
+                collection.objects.unlink(item)
+        if isinstance(item, Collection):
+            for collection in list(data.collections) + [context.scene.collection]:
+                if item in collection.children._items:
+                    collection.children.unlink(item)
+
+
+class Material(ID):
+    def copy(self):
+        return data.materials.append_existing(Material(self.name))
+
+
+class ShapeKey:
+    def __init__(self, name) -> None:
+        self.name = name
+        self.value = 0.0
+
+
+class Key(ID):
+    def __init__(self, name='Key') -> None:
+        super().__init__(name)
+        self.key_blocks = PropCollection(ShapeKey)
+
+
+class Bone:
+    def __init__(self, name) -> None:
+        self.name = name
+
+
+class Armature(ID):
+    def __init__(self, name='') -> None:
+        super().__init__(name)
+        self.bones = PropCollection(Bone)
+
+
+class Named:
+    def __init__(self, name) -> None:
+        self.name = name
+
+
+class Materials(PropCollection):
+    def __init__(self) -> None:
+        super().__init__(Material)
+
+    def append(self, material):
+        self._items.append(material)
+
+
+class Mesh(ID):
+    def __init__(self, name='') -> None:
+        super().__init__(name)
+        self.shape_keys = None
+        self.uv_layers = NamedCollection()
+        self.materials = Materials()
+        self.vertices = PropCollection()
+        self.polygons = PropCollection()
+
+    def copy(self):
+        mesh = data.meshes.append_existing(Mesh(self.name))
+        if self.shape_keys is not None:
+            mesh.shape_keys = Key()
+            mesh.shape_keys.key_blocks = PropCollection(ShapeKey, [ShapeKey(key.name) for key in self.shape_keys.key_blocks])
+        mesh.uv_layers = NamedCollection(Named(uv.name) for uv in self.uv_layers)
+        mesh.materials = Materials()
+        for material in self.materials:
+            mesh.materials.append(material)
+        return mesh
+
+    def update(self):
+        pass
+
+
+class NamedCollection(PropCollection):
+    def __init__(self, items=None) -> None:
+        super().__init__(Named, items)
+
+    def new(self, name=''):
+        item = Named(name)
+        self._items.append(item)
+        return item
+
+    def remove(self, item):
+        self._items.remove(item)
+
+
+class VertexGroup:
+    def __init__(self, name, index) -> None:
+        self.name = name
+        self.index = index
+
+    def add(self, index, weight, type):
+        pass
+
+
+class VertexGroups(PropCollection):
+    def __init__(self) -> None:
+        super().__init__(VertexGroup)
+        self.active_index = 0
+
+    def new(self, name='Group'):
+        item = VertexGroup(name, len(self._items))
+        self._items.append(item)
+        return item
+
+    def remove(self, item):
+        self._items.remove(item)
+        for index, vertex_group in enumerate(self._items):
+            vertex_group.index = index
+
+
+class Modifier:
+    def __init__(self, name, type) -> None:
+        self.name = name
+        self.type = type
+        self.object = None
+        self.show_viewport = True
+
+
+class Modifiers(PropCollection):
+    def __init__(self) -> None:
+        super().__init__(Modifier)
+
+    def new(self, name, type):
+        item = Modifier(name, type)
+        self._items.append(item)
+        return item
+
+    def remove(self, item):
+        self._items.remove(item)
+
+
+class MaterialSlot:
+    def __init__(self, mesh, index) -> None:
+        self._mesh = mesh
+        self._index = index
+
+    @property
+    def material(self):
+        return self._mesh.materials[self._index]
+
+    @material.setter
+    def material(self, value):
+        self._mesh.materials._items[self._index] = value
+
+
+class Object(ID):
+    def __init__(self, name='', object_data=None) -> None:
+        super().__init__(name)
+        self.data = object_data
+        self.modifiers = Modifiers()
+        self.vertex_groups = VertexGroups()
+        self.users_collection = list()
+        self.active_shape_key_index = 0
+        self._select = False
+        self._hide = False
+
+    @property
+    def type(self):
+        if isinstance(self.data, Mesh):
+            return 'MESH'
+        if isinstance(self.data, Armature):
+            return 'ARMATURE'
+        return 'EMPTY'
+
+    @property
+    def material_slots(self):
+        if not isinstance(self.data, Mesh):
+            return tuple()
+        return tuple(MaterialSlot(self.data, index) for index in range(len(self.data.materials)))
+
+    def select_set(self, value):
+        self._select = value
+
+    def select_get(self):
+        return self._select
+
+    def hide_set(self, value):
+        self._hide = value
+
+    def shape_key_add(self, name='Key', from_mix=True):
+        if self.data.shape_keys is None:
+            self.data.shape_keys = Key()
+        key = ShapeKey(name)
+        self.data.shape_keys.key_blocks._items.append(key)
+        return key
+
+    def shape_key_remove(self, key):
+        self.data.shape_keys.key_blocks._items.remove(key)
+
+    def copy(self):
+        obj = data.objects.append_existing(Object(self.name, self.data))
+        for modifier in self.modifiers:
+            modifier_new = obj.modifiers.new(modifier.name, modifier.type)
+            modifier_new.object = modifier.object
+        for vertex_group in self.vertex_groups:
+            obj.vertex_groups.new(vertex_group.name)
+        return obj
+
+
+class ObjectLinks(PropCollection):
+    def __init__(self, owner) -> None:
+        super().__init__(Object)
+        self._owner = owner
+
+    def link(self, obj):
+        if obj in self._items:
+            raise RuntimeError(f'Object \'{obj.name}\' already in collection \'{self._owner.name}\'')
+        self._items.append(obj)
+        obj.users_collection.append(self._owner)
+
+    def unlink(self, obj):
+        self._items.remove(obj)
+        obj.users_collection.remove(self._owner)
+
+
+class ChildrenLinks(PropCollection):
+    def __init__(self) -> None:
+        super().__init__()
+
+    def link(self, collection):
+        self._items.append(collection)
+
+    def unlink(self, collection):
+        self._items.remove(collection)
+
+
+class Collection(ID):
+    def __init__(self, name='') -> None:
+        super().__init__(name)
+        self.objects = ObjectLinks(self)
+        self.children = ChildrenLinks()
+        self.hide_viewport = False
+
+    @property
+    def all_objects(self):
+        objects = list(self.objects)
+        for child in self.children:
+            for obj in child.all_objects:
+                if obj not in objects:
+                    objects.append(obj)
+        return PropCollection(Object, objects)
+
+
+class LayerCollection:
+    def __init__(self, view_layer, collection) -> None:
+        self._view_layer = view_layer
+        self.collection = collection
+        self.name = collection.name
+
+    @property
+    def children(self):
+        return [LayerCollection(self._view_layer, child) for child in self.collection.children]
+
+    def _state(self):
+        return self._view_layer.layer_states.setdefault(id(self.collection), {'exclude': False, 'hide_viewport': False})
+
+    @property
+    def exclude(self):
+        return self._state()['exclude']
+
+    @exclude.setter
+    def exclude(self, value):
+        self._state()['exclude'] = value
+
+    @property
+    def hide_viewport(self):
+        return self._state()['hide_viewport']
+
+    @hide_viewport.setter
+    def hide_viewport(self, value):
+        self._state()['hide_viewport'] = value
+
+
+class LayerObjects:
+    def __init__(self) -> None:
+        self.active = None
+
+
+class ViewLayer:
+    def __init__(self, scene) -> None:
+        self._scene = scene
+        self.layer_states = dict()
+        self.objects = LayerObjects()
+
+    @property
+    def layer_collection(self):
+        return LayerCollection(self, self._scene.collection)
+
+    def update(self):
+        pass
+
+
+class Scene(ID):
+    def __init__(self, name='Scene') -> None:
+        super().__init__(name)
+        self.collection = Collection('Scene Collection')
+
+
+class Window:
+    def __init__(self, view_layer) -> None:
+        self.view_layer = view_layer
+
+
+class Context:
+    def __init__(self) -> None:
+        self.scene = Scene()
+        self.view_layer = ViewLayer(self.scene)
+        self.window = Window(self.view_layer)
+        self.window_manager = None
+
+    @property
+    def active_object(self):
+        return self.view_layer.objects.active
+
+    @property
+    def object(self):
+        return self.active_object
+
+    @property
+    def collection(self):
+        return self.scene.collection
+
+    @property
+    def selected_objects(self):
+        return [obj for obj in data.objects if obj.select_get()]
+
+
+class BlendData:
+    def __init__(self) -> None:
+        self.collections = IDCollection(Collection)
+        self.objects = IDCollection(Object)
+        self.meshes = IDCollection(Mesh)
+        self.materials = IDCollection(Material)
+        self.armatures = IDCollection(Armature)
+        self.scenes = IDCollection(Scene)
+
+
+# Operators : bpy.ops.<module>.<operator>() does nothing
+
+
+class _OpsNamespace:
+    def __init__(self, path='bpy.ops') -> None:
+        self._path = path
+
+    def __getattr__(self, name):
+        return _OpsNamespace(f'{self._path}.{name}')
+
+    def __call__(self, *args, **kwargs):
+        return {'FINISHED'}
+
+
+class _Base(PropertyOwner):
+    pass
+
+
+class _TypesModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        # 未定義の型はダミークラスとして返す
+        cls = type(name, (_Base, ), dict())
+        setattr(self, name, cls)
+        return cls
+
+
+def _create_types_module():
+    module = _TypesModule('bpy.types')
+    for name, cls in (
+        ('ID', ID),
+        ('Object', Object),
+        ('Scene', Scene),
+        ('Collection', Collection),
+        ('Mesh', Mesh),
+        ('Material', Material),
+        ('Armature', Armature),
+        ('Key', Key),
+        ('ShapeKey', ShapeKey),
+        ('VertexGroup', VertexGroup),
+        ('Modifier', Modifier),
+        ('MaterialSlot', MaterialSlot),
+        ('LayerCollection', LayerCollection),
+        ('ViewLayer', ViewLayer),
+        ('Context', Context),
+    ):
+        setattr(module, name, cls)
+    for name in ('PropertyGroup', 'Operator', 'Panel', 'UIList', 'AddonPreferences', 'Menu'):
+        setattr(module, name, type(name, (_Base, ), dict()))
+    return module
+
+
+def _create_props_module():
+    module = types.ModuleType('bpy.props')
+    for name, kind in (
+        ('StringProperty', 'str'),
+        ('IntProperty', 'int'),
+        ('FloatProperty', 'float'),
+        ('BoolProperty', 'bool'),
+        ('EnumProperty', 'enum'),
+        ('PointerProperty', 'pointer'),
+        ('CollectionProperty', 'collection'),
+    ):
+        setattr(module, name, _property_factory(kind))
+    return module
+
+
+def _create_app_modules():
+    app = types.ModuleType('bpy.app')
+    handlers = types.ModuleType('bpy.app.handlers')
+    for name in ('depsgraph_update_post', 'load_post', 'undo_post', 'redo_post', 'save_pre', 'save_post'):
+        setattr(handlers, name, list())
+    handlers.persistent = lambda func: func
+    app.handlers = handlers
+    app.version = (0, 0, 0)
+    app.version_string = 'fake_bpy'
+    app.background = True
+    return app, handlers
+
+
+data = BlendData()
+context = Context()
+
+
+def reset():
+    global data, context
+    data = BlendData()
+    context = Context()
+    data.scenes.append_existing(context.scene)
+    module = sys.modules.get('bpy')
+    if module is not None:
+        module.data = data
+        module.context = context
+
+
+def install():
+    if 'bpy' in sys.modules:
+        return sys.modules['bpy']
+
+    bpy = types.ModuleType('bpy')
+    bpy.types = _create_types_module()
+    bpy.props = _create_props_module()
+    bpy.app, handlers = _create_app_modules()
+    bpy.ops = _OpsNamespace()
+    bpy.utils = types.SimpleNamespace(register_class=lambda cls: None, unregister_class=lambda cls: None)
+    bpy.path = types.SimpleNamespace(abspath=lambda path: path, relpath=lambda path: path)
+
+    modules = {
+        'bpy': bpy,
+        'bpy.types': bpy.types,
+        'bpy.props': bpy.props,
+        'bpy.app': bpy.app,
+        'bpy.app.handlers': handlers,
+        'bmesh': types.ModuleType('bmesh'),
+        'mathutils': types.ModuleType('mathutils'),
+    }
+    sys.modules.update(modules)
+
+    reset()
+
+    return bpy
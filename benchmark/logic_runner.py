@@ -0,0 +1,227 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+import argparse
+
+import csv
+
+from dataclasses import asdict, dataclass, fields
+
+import json
+
+import logging
+
+import os
+
+import platform
+
+import tempfile
+
+from .runner import measure_quietly, quietly
+
+from ..file import check_profile, read_profile
+
+from ..setting import setting_candidates
+
+from ..setting.setting_check import check_data
+
+from ..setting.setting_command import command_index, current_scope
+
+from ..setting.setting_operators import update_specs
+
+from ..setup.setup_collection import CollectionFactory
+
+from ..setup.setup_queue import SetupAllQueue, SetupQueue
+
+from ..syntax import SYS_SPECS, Syntax, collection_parser
+
+
+logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
+
+
+@dataclass
+class LogicSceneConfig:
+    num_characters: int = 120
+    subsource_width: int = 4
+    subsource_depth: int = 3
+    num_objects: int = 1
+    num_vertex_groups: int = 16
+    num_shape_keys: int = 16
+    num_commands: int = 4
+    num_samples: int = 5  # キュー構築とチェックを計測するキャラクター数
+    num_profile_rows: int = 10000
+
+
+def _create_object(name, collection, config: LogicSceneConfig):
+    mesh = bpy.data.meshes.new(name)
+    obj = bpy.data.objects.new(name, mesh)
+    collection.objects.link(obj)
+    for idx in range(config.num_vertex_groups):
+        obj.vertex_groups.new(name=f'Group{idx}')
+    obj.shape_key_add(name='Basis')
+    for idx in range(config.num_shape_keys):
+        obj.shape_key_add(name=f'Key{idx}')
+    mesh.uv_layers.new(name='UVMap')
+    mesh.materials.append(bpy.data.materials.new(f'{name}Mat'))
+    return obj
+
+
+def _add_commands(obj, config: LogicSceneConfig):
+    scene = bpy.context.scene
+    bpy.context.view_layer.objects.active = obj
+    scene.samk.scope_type_to_edit = 'VG'
+    for idx in range(min(config.num_commands, config.num_vertex_groups)):
+        command = command_index(obj).add('vg_deletevertex')
+        command.name = 'DeleteVertex'
+        command.source = f'Group{idx}'
+        command.spec = SYS_SPECS.DEFAULT
+
+
+def _fill(collection, object_prefix, config: LogicSceneConfig, objects):
+    for idx in range(config.num_objects):
+        objects.append(_create_object(f'{object_prefix}Obj{idx}', collection, config))
+
+
+def _create_subsources(parent, character_name, object_prefix, depth, config: LogicSceneConfig, objects):
+    if depth <= 0:
+        return
+    for idx in range(config.subsource_width):
+        sub_name = f'{character_name}{Syntax.DOT}Acc{idx}'
+        sub_prefix = f'{object_prefix}Acc{idx}'
+        collection = bpy.data.collections.new(Syntax.COL_SUBSRC + sub_name)
+        parent.children.link(collection)
+        _fill(collection, sub_prefix, config, objects)
+        _create_subsources(collection, sub_name, sub_prefix, depth - 1, config, objects)
+
+
+def generate(config: LogicSceneConfig):
+    scene = bpy.context.scene
+    update_specs(None, bpy.context)
+
+    sample_objects = list()
+    for idx in range(config.num_characters):
+        name = f'Char{idx}'
+        root = bpy.data.collections.new(Syntax.COL_SRC + name)
+        scene.collection.children.link(root)
+        objects = list()
+        _fill(root, name, config, objects)
+        _create_subsources(root, name, name, config.subsource_depth, config, objects)
+        if idx < config.num_samples:
+            for obj in objects:
+                _add_commands(obj, config)
+            sample_objects.append(objects[0])
+
+    return tuple(sample_objects)
+
+
+def write_profile(directory, config: LogicSceneConfig):
+    filepath = os.path.join(directory, 'logic_benchmark_shapekey.csv')
+    with open(filepath, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([Syntax.PROF_HEADER, Syntax.PROF_SK])
+        for idx in range(config.num_profile_rows):
+            writer.writerow([f'Key{idx}', f'Morph{idx}'])
+    return filepath
+
+
+def case_root_source_collections(sample_objects, profile):
+    CollectionFactory.root_source_colletions(bpy.context.scene.collection)
+
+
+def case_collection_parser(sample_objects, profile):
+    for collection in bpy.data.collections:
+        collection_parser(Syntax.COL_SRC, collection.name)
+        collection_parser(Syntax.COL_SUBSRC, collection.name)
+
+
+def case_setup_queue(sample_objects, profile):
+    for obj in sample_objects:
+        SetupQueue(obj).get_order()
+
+
+def case_setup_all_queue(sample_objects, profile):
+    for obj in sample_objects:
+        SetupAllQueue(obj).get_order()
+
+
+def case_check_data(sample_objects, profile):
+    for obj in sample_objects:
+        check_data(obj)
+
+
+def case_source_mediator(sample_objects, profile):
+    bpy.context.scene.samk.scope_type_to_edit = 'VG'
+    for obj in sample_objects:
+        bpy.context.view_layer.objects.active = obj
+        for command in current_scope(obj).this_type_commands():
+            setting_candidates.SourceMediator(command).notify()
+
+
+def case_profile(sample_objects, profile):
+    check_profile(profile, Syntax.PROF_SK)
+    read_profile(profile)
+
+
+CASES = {
+    'root_source_collections': case_root_source_collections,
+    'collection_parser': case_collection_parser,
+    'setup_queue': case_setup_queue,
+    'setup_all_queue': case_setup_all_queue,
+    'check_data': case_check_data,
+    'source_mediator': case_source_mediator,
+    'profile': case_profile,
+}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='WM Setup Tools logic benchmark (without Blender)')
+    parser.add_argument('--output', default='logic_benchmark_result.json', help='Result json file path')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--cases', nargs='*', default=list(CASES.keys()), choices=list(CASES.keys()))
+    defaults = LogicSceneConfig()
+    for field in fields(LogicSceneConfig):
+        parser.add_argument('--' + field.name.replace('_', '-'), type=int, default=getattr(defaults, field.name))
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    config = LogicSceneConfig(**{field.name: getattr(args, field.name) for field in fields(LogicSceneConfig)})
+
+    sample_objects, num_suppressed_lines = quietly(lambda: generate(config))
+    print(f'Generated {len(bpy.data.collections)} collections, {len(bpy.data.objects)} objects. ({num_suppressed_lines} output lines suppressed)')
+
+    results = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        profile = write_profile(directory, config)
+        for case in CASES.keys():
+            if case not in args.cases:
+                continue
+            results[case] = measure_quietly(lambda: CASES[case](sample_objects, profile), args.repeat)
+            print(f'Benchmark case \'{case}\' : {results[case]["time_sec_median"]:.3f} sec ({results[case]["suppressed_stdout_lines"]} output lines suppressed)')
+
+    output = {
+        'blender_version': bpy.app.version_string,
+        'platform': platform.platform(),
+        'config': asdict(config),
+        'results': results,
+    }
+    with open(os.path.abspath(args.output), 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f'Benchmark result is written to \'{os.path.abspath(args.output)}\'')
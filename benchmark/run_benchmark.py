@@ -0,0 +1,56 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+# Usage:
+#   blender --background --factory-startup --python benchmark/run_benchmark.py -- \
+#       --output result.json --grid-segments 64 --num-shape-keys 100
+#
+# Compare with a stored baseline:
+#   python benchmark/compare_benchmark.py baseline.json result.json
+
+import bpy
+
+import importlib
+
+import os
+
+import sys
+
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_NAME = os.path.basename(ADDON_DIR)
+
+
+def load_addon():
+    if os.path.dirname(ADDON_DIR) not in sys.path:
+        sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    addon = importlib.import_module(ADDON_NAME)
+    if not hasattr(bpy.types.Scene, 'samk'):
+        addon.register()
+    return addon
+
+
+def script_args():
+    if '--' in sys.argv:
+        return sys.argv[sys.argv.index('--') + 1:]
+    return list()
+
+
+if __name__ == '__main__':
+    load_addon()
+    runner = importlib.import_module(f'{ADDON_NAME}.benchmark.runner')
+    runner.main(script_args())
@@ -0,0 +1,51 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+# Usage (plain CPython, Blender is not required):
+#   python benchmark/run_logic_benchmark.py --output logic.json --num-characters 120
+#
+# The add-on is imported against the in-memory bpy stand-in in fake_bpy.py.
+
+import importlib
+
+import os
+
+import sys
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(BENCHMARK_DIR)
+ADDON_NAME = os.path.basename(ADDON_DIR)
+
+
+def load_addon():
+    sys.path.insert(0, BENCHMARK_DIR)
+    fake_bpy = importlib.import_module('fake_bpy')
+    fake_bpy.install()
+    sys.path.remove(BENCHMARK_DIR)
+
+    if os.path.dirname(ADDON_DIR) not in sys.path:
+        sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    addon = importlib.import_module(ADDON_NAME)
+    addon.init_props()
+    return addon
+
+
+if __name__ == '__main__':
+    load_addon()
+    logic_runner = importlib.import_module(f'{ADDON_NAME}.benchmark.logic_runner')
+    logic_runner.main(sys.argv[1:])
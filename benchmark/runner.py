@@ -0,0 +1,224 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+import argparse
+
+import contextlib
+
+from dataclasses import asdict, fields
+
+import io
+
+import json
+
+import logging
+
+import os
+
+import platform
+
+import statistics
+
+import tempfile
+
+import time
+
+import tracemalloc
+
+from . import scene_generator
+
+from ..function import apply_single, copy_nonlink, delete_object
+
+from ..setting.setting_check import check_data
+
+from ..setup.setup_apply import apply_modifier
+
+from ..setup.setup_execute import SetupExecution
+
+from ..setup.setup_queue import SetupAllQueue, SetupQueue
+
+from ..syntax import Syntax
+
+from ..translate import do_translate
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
+
+
+TRANSLATION_MODES = (Syntax.MODE_SP, Syntax.MODE_MMD, Syntax.MODE_GE)
+
+
+def process_peak_rss_kb():
+    # プロセス全体の最大常駐メモリ。ケースごとの値ではなく、それまでに実行した全ケースの最大値になる
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(func, repeat):
+    # tracemallocはメモリ確保の多い処理を大きく遅くするため、時間の計測とメモリの計測は別々に実行する
+    times = list()
+    for _ in range(repeat):
+        time_start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - time_start)
+
+    tracemalloc.start()
+    func()
+    py_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'time_sec_min': min(times),
+        'time_sec_median': statistics.median(times),
+        'py_peak_bytes': py_peak,
+        'process_rss_peak_kb': process_peak_rss_kb(),
+        'repeat': repeat,
+    }
+
+
+def quietly(func):
+    # 処理中のprint出力を捨て、行数を返す。端末への書き込み時間が計測値に含まれないようにする
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        result = func()
+    return result, stdout.getvalue().count('\n')
+
+
+def measure_quietly(func, repeat):
+    result, num_suppressed_lines = quietly(lambda: measure(func, repeat))
+    result['suppressed_stdout_lines'] = num_suppressed_lines
+    return result
+
+
+def release_object(config: scene_generator.SceneConfig):
+    return bpy.data.objects[config.character_name + Syntax.OBJ_RELEASE]
+
+
+def _with_clone(obj, func):
+    clone = copy_nonlink(obj)
+    bpy.context.scene.collection.objects.link(clone)
+    try:
+        func(clone)
+    finally:
+        delete_object(clone)
+
+
+def case_check_data(generated: scene_generator.GeneratedScene, config):
+    check_data(generated.active_object)
+
+
+def case_setup(generated: scene_generator.GeneratedScene, config):
+    order = SetupQueue(generated.active_object).get_order()
+    SetupExecution(order).execute()
+
+
+def case_setup_all(generated: scene_generator.GeneratedScene, config):
+    order = SetupAllQueue(generated.active_object).get_order()
+    SetupExecution(order).execute()
+
+
+def case_apply_modifier(generated: scene_generator.GeneratedScene, config):
+    def _apply(clone):
+        apply_modifier(target_object=clone, target_modifiers=[mdf.name for mdf in clone.modifiers])
+    _with_clone(generated.active_object, _apply)
+
+
+def case_apply_single(generated: scene_generator.GeneratedScene, config):
+    def _apply(clone):
+        key_blocks = clone.data.shape_keys.key_blocks
+        for key in key_blocks[2:]:
+            apply_single(clone, key.name, key_blocks[1].name)
+    _with_clone(generated.active_object, _apply)
+
+
+def translate_case(mode):
+    def _case(generated: scene_generator.GeneratedScene, config):
+        bpy.context.scene.samk.translation_mode = mode
+        do_translate([release_object(config)])
+    _case.__name__ = 'case_translate' + mode.lower()
+    return _case
+
+
+CASES = {
+    'check_data': case_check_data,
+    'setup': case_setup,
+    'setup_all': case_setup_all,
+    'apply_modifier': case_apply_modifier,
+    'apply_single': case_apply_single,
+}
+CASES.update({'translate' + mode.lower(): translate_case(mode) for mode in TRANSLATION_MODES})
+
+
+def config_from_args(args) -> scene_generator.SceneConfig:
+    values = {field.name: getattr(args, field.name) for field in fields(scene_generator.SceneConfig)}
+    return scene_generator.SceneConfig(**values)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='WM Setup Tools benchmark')
+    parser.add_argument('--output', default='benchmark_result.json', help='Result json file path')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--cases', nargs='*', default=list(CASES.keys()), choices=list(CASES.keys()))
+    defaults = scene_generator.SceneConfig()
+    for field in fields(scene_generator.SceneConfig):
+        default = getattr(defaults, field.name)
+        option = '--' + field.name.replace('_', '-')
+        if type(default) is bool:
+            parser.add_argument(option, type=lambda value: value.lower() in ('1', 'true', 'yes'), default=default)
+        else:
+            parser.add_argument(option, type=type(default), default=default)
+    return parser.parse_args(argv)
+
+
+def run(config: scene_generator.SceneConfig, cases, repeat):
+    results = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        generated = scene_generator.generate(config, directory)
+        # 翻訳にはリリースオブジェクトが必要なので、未計測のSetup Allを先に一度実行する
+        if any(case.startswith('translate') for case in cases) and 'setup_all' not in cases:
+            case_setup_all(generated, config)
+        for case in CASES.keys():
+            if case not in cases:
+                continue
+            print(f'Benchmark case \'{case}\' ...')
+            results[case] = measure_quietly(lambda: CASES[case](generated, config), repeat)
+            print(f'Benchmark case \'{case}\' : {results[case]["time_sec_median"]:.3f} sec ({results[case]["suppressed_stdout_lines"]} output lines suppressed)')
+    return results
+
+
+def main(argv):
+    args = parse_args(argv)
+    config = config_from_args(args)
+
+    results = run(config, args.cases, args.repeat)
+
+    output = {
+        'blender_version': bpy.app.version_string,
+        'platform': platform.platform(),
+        'config': asdict(config),
+        'results': results,
+    }
+    with open(os.path.abspath(args.output), 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f'Benchmark result is written to \'{os.path.abspath(args.output)}\'')
@@ -0,0 +1,259 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+import bmesh
+
+import csv
+
+from dataclasses import dataclass
+
+import logging
+
+import os
+
+import random
+
+from ..setting.setting_command import command_index
+
+from ..setting.setting_operators import update_specs
+
+from ..syntax import SYS_SPECS, Syntax
+
+
+logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
+
+
+@dataclass
+class SceneConfig:
+    character_name: str = 'Bench'
+    num_objects: int = 2
+    grid_segments: int = 32
+    num_shape_keys: int = 20
+    num_vertex_groups: int = 8
+    num_uv_layers: int = 2
+    num_materials: int = 2
+    use_subsurf: bool = True
+    use_mirror: bool = True
+    subsource_depth: int = 1
+    subsource_width: int = 1
+    num_commands: int = 2  # 戦略ごとのコマンド数
+    seed: int = 0
+
+
+class GeneratedScene:
+    def __init__(self, root_collection, source_objects, profile_bgroup, profile_skey) -> None:
+        self.root_collection = root_collection
+        self.source_objects = source_objects
+        self.profile_bgroup = profile_bgroup
+        self.profile_skey = profile_skey
+
+    @property
+    def active_object(self):
+        return self.source_objects[0]
+
+
+def clear_scene():
+    for obj in tuple(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for mesh in tuple(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+    for material in tuple(bpy.data.materials):
+        bpy.data.materials.remove(material)
+    for collection in tuple(bpy.data.collections):
+        bpy.data.collections.remove(collection)
+
+
+def _grid_mesh(name, segments, offset_x):
+    mesh = bpy.data.meshes.new(name)
+    bm = bmesh.new()
+    bmesh.ops.create_grid(bm, x_segments=segments, y_segments=segments, size=1.0)
+    for vert in bm.verts:
+        vert.co.x += offset_x  # ミラー時に頂点がマージされないようにずらす
+    bm.to_mesh(mesh)
+    bm.free()
+    return mesh
+
+
+def _add_shape_keys(obj, config: SceneConfig, rng):
+    obj.shape_key_add(name='Basis')
+    num_vert = len(obj.data.vertices)
+    basis_co = [0.0] * (num_vert * 3)
+    obj.data.vertices.foreach_get('co', basis_co)
+    for idx in range(config.num_shape_keys):
+        key = obj.shape_key_add(name=f'Key{idx}', from_mix=False)
+        co = list(basis_co)
+        for vert_idx in rng.sample(range(num_vert), max(1, num_vert // 10)):
+            co[vert_idx * 3 + 2] += rng.uniform(-0.1, 0.1)
+        key.data.foreach_set('co', co)
+
+
+def _add_vertex_groups(obj, config: SceneConfig):
+    num_vert = len(obj.data.vertices)
+    num_groups = config.num_vertex_groups + config.num_commands
+    chunk = max(1, num_vert // max(1, num_groups))
+    for idx in range(config.num_vertex_groups):
+        vg = obj.vertex_groups.new(name=f'Group{idx}')
+        vg.add(list(range(idx * chunk, min(num_vert, (idx + 1) * chunk))), 1.0, 'REPLACE')
+    # VG_DeleteVertex用に、メッシュ端の少数の頂点だけを持つグループ
+    for idx in range(config.num_commands):
+        vg = obj.vertex_groups.new(name=f'Delete{idx}')
+        vg.add([num_vert - 1 - idx], 1.0, 'REPLACE')
+
+
+def _add_materials(obj, config: SceneConfig, name):
+    mesh = obj.data
+    for idx in range(config.num_materials):
+        mesh.materials.append(bpy.data.materials.new(f'{name}Mat{idx}'))
+        bpy.data.materials.new(f'{name}MatAlt{idx}')
+    num_poly = len(mesh.polygons)
+    mesh.polygons.foreach_set('material_index', [idx % max(1, config.num_materials) for idx in range(num_poly)])
+
+
+def _add_modifiers(obj, config: SceneConfig):
+    if config.use_mirror:
+        mirror = obj.modifiers.new(name='Mirror', type='MIRROR')
+        mirror.use_mirror_merge = False
+    for idx in range(config.num_commands):
+        displace = obj.modifiers.new(name=f'Delete{idx}', type='DISPLACE')
+        displace.strength = 0.0
+    if config.use_subsurf:
+        subsurf = obj.modifiers.new(name='Subdivision', type='SUBSURF')
+        subsurf.levels = 1
+
+
+def create_source_object(name, collection, config: SceneConfig, rng):
+    mesh = _grid_mesh(name, config.grid_segments, 1.5)
+    obj = bpy.data.objects.new(name, mesh)
+    collection.objects.link(obj)
+    for idx in range(config.num_uv_layers):
+        mesh.uv_layers.new(name=f'UVMap{idx}')
+    _add_materials(obj, config, name)
+    _add_vertex_groups(obj, config)
+    _add_shape_keys(obj, config, rng)
+    _add_modifiers(obj, config)
+    return obj
+
+
+def _set_command(obj, scope_type_name, strategy_name, properties):
+    scene = bpy.context.scene
+    if scene.samk.scope_type_to_edit != scope_type_name:
+        scene.samk.scope_type_to_edit = scope_type_name
+    command = command_index(obj).add(strategy_name.lower())
+    command.name = strategy_name.split(Syntax.UNDER)[1]
+    for property_name, value in properties.items():
+        setattr(command, property_name, value)
+
+
+def add_commands(obj, config: SceneConfig):
+    bpy.context.view_layer.objects.active = obj
+    name = obj.name
+    num_commands = config.num_commands
+    spec = {'spec': SYS_SPECS.DEFAULT}
+
+    # Key1以外の末尾のキーを適用元、Key0を適用先にする
+    num_apply = min(num_commands, max(0, config.num_shape_keys - 1))
+    for idx in range(num_apply):
+        source = f'Key{config.num_shape_keys - 1 - idx}'
+        _set_command(obj, 'SK', 'SK_ApplySingle', dict(source=source, destination='Key0', **spec))
+
+    for idx in range(num_commands):
+        _set_command(obj, 'MDF', 'MDF_Delete', dict(source=f'Delete{idx}', **spec))
+    if config.use_subsurf:
+        _set_command(obj, 'MDF', 'MDF_Undivision', dict(source='Subdivision', **spec))
+
+    if config.num_uv_layers > 0:
+        _set_command(obj, 'UV', 'UV_Select', dict(source='UVMap0', **spec))
+
+    for idx in range(min(num_commands, config.num_materials)):
+        _set_command(obj, 'MT', 'MT_Replace', dict(source=f'{name}Mat{idx}', destination=f'{name}MatAlt{idx}', **spec))
+
+    for idx in range(num_commands):
+        _set_command(obj, 'VG', 'VG_DeleteVertex', dict(source=f'Delete{idx}', **spec))
+
+
+def _link_new_collection(name, parent):
+    collection = bpy.data.collections.new(name)
+    parent.children.link(collection)
+    return collection
+
+
+def _fill_collection(collection, object_prefix, config: SceneConfig, rng, source_objects):
+    for idx in range(config.num_objects):
+        obj = create_source_object(f'{object_prefix}Obj{idx}', collection, config, rng)
+        source_objects.append(obj)
+
+
+def _create_subsources(parent, character_name, object_prefix, depth, config: SceneConfig, rng, source_objects):
+    if depth <= 0:
+        return
+    for idx in range(config.subsource_width):
+        sub_name = f'{character_name}{Syntax.DOT}Acc{idx}'
+        sub_prefix = f'{object_prefix}Acc{idx}'
+        collection = _link_new_collection(Syntax.COL_SUBSRC + sub_name, parent)
+        _fill_collection(collection, sub_prefix, config, rng, source_objects)
+        _create_subsources(collection, sub_name, sub_prefix, depth - 1, config, rng, source_objects)
+
+
+def write_profiles(directory, config: SceneConfig):
+    profile_bgroup = os.path.join(directory, 'benchmark_bonegroup.csv')
+    with open(profile_bgroup, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([Syntax.PROF_HEADER, Syntax.PROF_BG])
+        writer.writerow([Syntax.PROF_PRC, Syntax.PROF_MG])
+        for idx in range(1, config.num_vertex_groups, 2):
+            writer.writerow([f'Group{idx}', f'Group{idx - 1}'])
+        writer.writerow([Syntax.PROF_PRC, Syntax.PROF_RN])
+        writer.writerow(['Group', 'Bone'])
+
+    profile_skey = os.path.join(directory, 'benchmark_shapekey.csv')
+    with open(profile_skey, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([Syntax.PROF_HEADER, Syntax.PROF_SK])
+        for idx in range(config.num_shape_keys):
+            writer.writerow([f'Key{idx}', f'Morph{idx}'])
+
+    return profile_bgroup, profile_skey
+
+
+def generate(config: SceneConfig, directory) -> GeneratedScene:
+    logger.info('Generate benchmark scene : %s', config)
+    rng = random.Random(config.seed)
+    scene = bpy.context.scene
+
+    clear_scene()
+    update_specs(None, bpy.context)
+
+    _link_new_collection(Syntax.COL_AUTOGEN, scene.collection)
+
+    source_objects = list()
+    name = config.character_name
+    root_collection = _link_new_collection(Syntax.COL_SRC + name, scene.collection)
+    _fill_collection(root_collection, name, config, rng, source_objects)
+    _create_subsources(root_collection, name, name, config.subsource_depth, config, rng, source_objects)
+
+    for obj in source_objects:
+        add_commands(obj, config)
+
+    profile_bgroup, profile_skey = write_profiles(directory, config)
+    scene.samk.profile_bgroup.file_path = profile_bgroup
+    scene.samk.profile_bgroup.is_syntax_ok = True
+    scene.samk.profile_skey.file_path = profile_skey
+    scene.samk.profile_skey.is_syntax_ok = True
+
+    return GeneratedScene(root_collection, tuple(source_objects), profile_bgroup, profile_skey)
@@ -0,0 +1,62 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+from bpy.app.handlers import persistent
+
+
+# パネルの描画、poll、EnumPropertyのコールバックは再描画のたびに呼ばれるため、
+# シーンが変更されるまで(シーン変更カウンタが進むまで)計算結果を使い回す
+_scene_change_counter = 0
+
+# (scene pointer, key) : (scene change counter, value)
+_draw_cache = dict()
+
+
+def scene_change_counter():
+    return _scene_change_counter
+
+
+def notify_scene_changed():
+    global _scene_change_counter
+    _scene_change_counter += 1
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    notify_scene_changed()
+
+
+@persistent
+def on_file_changed(dummy):
+    notify_scene_changed()
+    _draw_cache.clear()
+
+
+def draw_cached(key, compute):
+    cache_key = (bpy.context.scene.as_pointer(), key)
+    try:
+        counter, value = _draw_cache[cache_key]
+    except KeyError:
+        pass
+    else:
+        if counter == _scene_change_counter:
+            return value
+    value = compute()
+    _draw_cache[cache_key] = (_scene_change_counter, value)
+    return value
@@ -0,0 +1,82 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+import logging
+
+from .syntax import Syntax
+
+
+logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
+
+
+# 削除順: オブジェクトが消えるとメッシュ、マテリアルの利用者数が減る
+DATABLOCK_TYPES = ('objects', 'meshes', 'materials', 'collections')
+
+
+def _pointers(data_type):
+    return set(datablock.as_pointer() for datablock in getattr(bpy.data, data_type))
+
+
+def _is_orphan(datablock):
+    return datablock.users == 0 and not datablock.use_fake_user
+
+
+class DatablockCensus:
+    # オペレータ実行前のデータブロックを記録し、実行後に増減と、実行中に作られて孤立したデータブロックを報告する
+    def __init__(self) -> None:
+        self._pointers = {data_type: _pointers(data_type) for data_type in DATABLOCK_TYPES}
+
+    def created_orphans(self, data_type):
+        return tuple(datablock for datablock in getattr(bpy.data, data_type)
+                     if datablock.as_pointer() not in self._pointers[data_type] and _is_orphan(datablock))
+
+    def differences(self):
+        return {data_type: len(getattr(bpy.data, data_type)) - len(self._pointers[data_type]) for data_type in DATABLOCK_TYPES}
+
+    def leaks(self):
+        leaks = dict()
+        for data_type in DATABLOCK_TYPES:
+            orphans = self.created_orphans(data_type)
+            if orphans:
+                leaks[data_type] = tuple(datablock.name for datablock in orphans)
+        return leaks
+
+    def purge(self):
+        # 実行中に作られた孤立データブロックだけを削除する。実行前から存在した孤立データには触れない
+        num_purged = 0
+        for data_type in DATABLOCK_TYPES:
+            data_collection = getattr(bpy.data, data_type)
+            for datablock in self.created_orphans(data_type):
+                logger.info('Purge orphan %s : %s', data_type, datablock.name)
+                data_collection.remove(datablock)
+                num_purged += 1
+        return num_purged
+
+    def report(self, is_purge=False):
+        differences = self.differences()
+        logger.info('Datablock differences : %s', differences)
+        leaks = self.leaks()
+        for data_type, names in leaks.items():
+            logger.warning('Leaked orphan %s (%d) : %s', data_type, len(names), names)
+        num_leaks = sum(len(names) for names in leaks.values())
+        if is_purge and num_leaks:
+            return f'{self.purge()} orphan datablocks purged'
+        if num_leaks:
+            return f'{num_leaks} orphan datablocks leaked ({", ".join(f"{data_type}: {len(names)}" for data_type, names in leaks.items())})'
+        return ''
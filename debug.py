@@ -16,50 +16,120 @@
 # along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import bpy
+
 import logging
 
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import queue
 
 from .syntax import Syntax
 
 import traceback
 
+
+LEVEL_OFF = logging.CRITICAL + 1
+
+LOG_LEVEL_ITEMS = [
+    ('OFF', 'Off', 'No logging'),
+    ('ERROR', 'Error', 'Errors only'),
+    ('WARNING', 'Warning', 'Warnings and errors'),
+    ('INFO', 'Info', 'Processing details'),
+    ('DEBUG', 'Debug', 'Everything'),
+]
+
+LOG_LEVELS = {
+    'OFF': LEVEL_OFF,
+    'ERROR': logging.ERROR,
+    'WARNING': logging.WARNING,
+    'INFO': logging.INFO,
+    'DEBUG': logging.DEBUG,
+}
+
+# subsystem name : logger name
+SUBSYSTEMS = {
+    'general': Syntax.TOOLNAME,
+    'setup': f'{Syntax.TOOLNAME}.{__package__}.setup',
+    'translate': f'{Syntax.TOOLNAME}.{__package__}.translate',
+}
+
+DEFAULT_LOG_LEVEL = 'WARNING'
+
+
+def preferences():
+    try:
+        return bpy.context.preferences.addons[__package__].preferences
+    except (AttributeError, KeyError):
+        return None
+
+
+def subsystem_levels():
+    prefs = preferences()
+    levels = dict()
+    for subsystem in SUBSYSTEMS.keys():
+        level_name = getattr(prefs, f'log_level_{subsystem}', DEFAULT_LOG_LEVEL)
+        levels[subsystem] = LOG_LEVELS[level_name]
+    return levels
+
+
+def is_enabled_log_file():
+    return getattr(preferences(), 'is_enabled_log_file', True)
+
+
 class LoggingContext:
-    def __init__(self, logger, level=None, handler=None, close=True):
+    # 各サブシステムのログレベルを設定し、ファイル出力はキュー経由で別スレッドに任せる
+    def __init__(self, logger, levels=None, handler=None, close=True):
         self.logger = logger
-        self.level = level
+        self.levels = levels
         self.handler = handler
         self.close = close
 
     def __enter__(self):
-        if self.level is not None:
-            self.old_level = self.logger.level
-            self.logger.setLevel(self.level)
+        if self.levels is not None:
+            self.old_levels = dict()
+            for subsystem, level in self.levels.items():
+                subsystem_logger = logging.getLogger(SUBSYSTEMS[subsystem])
+                self.old_levels[subsystem] = subsystem_logger.level
+                subsystem_logger.setLevel(level)
         if self.handler:
             formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
             self.handler.setFormatter(formatter)
-            self.logger.addHandler(self.handler)
+            # メッセージの整形はQueueHandlerが呼び出し側のスレッドで行う (bpyへのアクセスをメインスレッドに限定するため)
+            self.queue_handler = QueueHandler(queue.SimpleQueue())
+            self.listener = QueueListener(self.queue_handler.queue, self.handler)
+            self.listener.start()
+            self.logger.addHandler(self.queue_handler)
+        return self
 
     def __exit__(self, et, ev, tb):
-        if self.level is not None:
-            self.logger.setLevel(self.old_level)
+        if self.levels is not None:
+            for subsystem, level in self.old_levels.items():
+                logging.getLogger(SUBSYSTEMS[subsystem]).setLevel(level)
         if self.handler:
-            self.logger.removeHandler(self.handler)
+            self.logger.removeHandler(self.queue_handler)
+            self.listener.stop()
         if self.handler and self.close:
             self.handler.close()
 
 
+def _logging_context(logger, operator, mode='w'):
+    levels = subsystem_levels()
+    if all(level == LEVEL_OFF for level in levels.values()) or not is_enabled_log_file():
+        return LoggingContext(logger, levels=levels)
+    fh = RotatingFileHandler(filename=f'{Syntax.TOOLNAME}_{operator.__class__.__name__}.log', mode=mode, maxBytes=1000000, encoding='utf-8', delay=True)
+    return LoggingContext(logger, levels=levels, handler=fh)
+
+
 def debug_execute(logger):
     def __func_wrapper(func):
         def __wrapper(self, context):
-            fh = RotatingFileHandler(filename=f'{Syntax.TOOLNAME}_{self.__class__.__name__}.log', mode='w', maxBytes=1000000, encoding='utf-8')
-            
-            with LoggingContext(logger, level=logging.DEBUG, handler=fh) as _:            
+            with _logging_context(logger, self) as _:
                 try:
                     return func(self, context)
                 except Exception as e:
                     error_message = traceback.format_exc()
-                    logger.info(error_message)
+                    logger.error(error_message)
                     raise Exception(e)
 
         return __wrapper 
@@ -70,15 +140,43 @@ def debug_execute(logger):
 def debug_invoke(logger):
     def __func_wrapper(func):
         def __wrapper(self, context, event):
-            fh = RotatingFileHandler(filename=f'{Syntax.TOOLNAME}_{self.__class__.__name__}.log', mode='w', maxBytes=1000000, encoding='utf-8')
-            
-            with LoggingContext(logger, level=logging.DEBUG, handler=fh) as _:            
+            with _logging_context(logger, self) as _:
                 try:
                     return func(self, context, event)
                 except Exception as e:
                     error_message = traceback.format_exc()
-                    logger.info(error_message)
+                    logger.error(error_message)
                     raise Exception(e)
 
         return __wrapper   
     return __func_wrapper
+
+
+def end_modal_logging(operator):
+    context = getattr(operator, '_modal_logging_context', None)
+    if context is None:
+        return
+    operator._modal_logging_context = None
+    context.__exit__(None, None, None)
+
+
+def debug_modal(logger):
+    # modalはイベントごとに呼ばれるため、ログ設定は最初のイベントで一度だけ作成し、modalが終了した時に破棄する
+    # executeのログに続けて書き込むよう、ログファイルは上書きせずに追記する
+    def __func_wrapper(func):
+        def __wrapper(self, context, event):
+            if getattr(self, '_modal_logging_context', None) is None:
+                self._modal_logging_context = _logging_context(logger, self, mode='a').__enter__()
+            try:
+                result = func(self, context, event)
+            except Exception as e:
+                error_message = traceback.format_exc()
+                logger.error(error_message)
+                end_modal_logging(self)
+                raise Exception(e)
+            if 'RUNNING_MODAL' not in result:
+                end_modal_logging(self)
+            return result
+
+        return __wrapper
+    return __func_wrapper
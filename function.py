@@ -17,14 +17,23 @@
 
 import bpy
 
+from array import array
+
 import bmesh
 
+from contextlib import contextmanager
+
 from . import debug
 
 from functools import wraps
 
 import logging
 
+try:
+    import numpy
+except ImportError:  # Blender同梱以外のPythonではnumpyが無い場合がある
+    numpy = None
+
 import sys
 
 from .syntax import SAMKStructureError, Syntax
@@ -45,17 +54,145 @@ def set_active_object(obj):
     bpy.context.view_layer.objects.active = obj
 
 
-def clear_shape_keys(Name):
-    obj = bpy.context.active_object
+def clear_shape_keys(Name, obj=None):
+    # Nameのシェイプキーの形状をメッシュに残して、全てのシェイプキーを削除する
+    if obj is None:
+        obj = bpy.context.active_object
     if obj.data.shape_keys is None:
         return True
-    obj.active_shape_key_index = len(obj.data.shape_keys.key_blocks) - 1
-    while len(obj.data.shape_keys.key_blocks) > 1:
-        if obj.data.shape_keys.key_blocks[obj.active_shape_key_index].name == Name:
-            obj.active_shape_key_index = 0
+    key_blocks = obj.data.shape_keys.key_blocks
+    for key_name in reversed([key.name for key in key_blocks[1:]]):
+        if key_name != Name:
+            obj.shape_key_remove(key_blocks[key_name])
+    # 基準キーを削除すると残ったキーが基準になり、その形状がメッシュに適用される
+    while obj.data.shape_keys is not None:
+        obj.shape_key_remove(obj.data.shape_keys.key_blocks[0])
+
+
+def shape_key_coordinates(key_block):
+    num_values = len(key_block.data) * 3
+    if numpy is not None:
+        co = numpy.empty(num_values, dtype=numpy.float32)
+    else:
+        co = array('f', [0.0]) * num_values
+    key_block.data.foreach_get('co', co)
+    return co
+
+
+def shape_key_delta(co, co_relative, tolerance):
+    # (最大移動量, 移動した頂点数) を返す
+    if numpy is not None:
+        delta = numpy.abs(co - co_relative).reshape(-1, 3).max(axis=1)
+        if len(delta) == 0:
+            return 0.0, 0
+        return float(delta.max()), int(numpy.count_nonzero(delta > tolerance))
+    max_delta = 0.0
+    num_moved = 0
+    for idx in range(0, len(co), 3):
+        delta = max(abs(co[idx] - co_relative[idx]), abs(co[idx + 1] - co_relative[idx + 1]), abs(co[idx + 2] - co_relative[idx + 2]))
+        max_delta = max(max_delta, delta)
+        if delta > tolerance:
+            num_moved += 1
+    return max_delta, num_moved
+
+
+def compact_shape_keys_by_scene_setting(obj):
+    samk = bpy.context.scene.samk
+    if not samk.is_enabled_shape_key_compaction:
+        return tuple()
+    return compact_shape_keys(obj, samk.shape_key_compaction_tolerance, samk.is_enabled_shape_key_stats)
+
+
+def compact_shape_keys(obj, tolerance, should_store_stats=False):
+    # 基準となるキーからの移動量が許容値以下のシェイプキーを削除する
+    # 他のキーの基準になっているキーは残す
+    if obj.data.shape_keys is None:
+        return tuple()
+    key_blocks = obj.data.shape_keys.key_blocks
+    relative_key_names = set(key.relative_key.name for key in key_blocks if key.relative_key != key)
+    coordinates = dict()
+
+    def coordinates_of(key_block):
+        try:
+            return coordinates[key_block.name]
+        except KeyError:
+            co = shape_key_coordinates(key_block)
+            coordinates[key_block.name] = co
+            return co
+
+    removed_names = list()
+    stats = dict()
+    for key_block in key_blocks[1:]:
+        max_delta, num_moved = shape_key_delta(coordinates_of(key_block), coordinates_of(key_block.relative_key), tolerance)
+        stats[key_block.name] = num_moved
+        if max_delta <= tolerance and key_block.name not in relative_key_names:
+            removed_names.append(key_block.name)
+
+    for name in removed_names:
+        obj.shape_key_remove(key_blocks[name])
+        del stats[name]
+    if should_store_stats:
+        obj.data[Syntax.P_HEADER + 'shape_key_moved_vertices'] = stats
+
+    logger.info('Compact shape keys : %s, removed %s / %s : %s', obj.name, len(removed_names), len(removed_names) + len(stats), removed_names)
+    return tuple(removed_names)
+
+
+def consolidate_material_slots(obj):
+    # 同じマテリアルを参照するスロットを1つにまとめ、面のマテリアルインデックスを一括で付け替える
+    mesh = obj.data
+    num_slots_before = len(obj.material_slots)
+    slot_indices = dict()
+    remap = list()
+    duplicate_indices = list()
+    for idx, slot in enumerate(obj.material_slots):
+        key = (slot.link, slot.material)
+        if key in slot_indices:
+            duplicate_indices.append(idx)
         else:
-            bpy.ops.object.shape_key_remove()
-    bpy.ops.object.shape_key_remove()
+            slot_indices[key] = len(slot_indices)
+        remap.append(slot_indices[key])
+
+    if duplicate_indices:
+        material_indices = array('i', [0]) * len(mesh.polygons)
+        mesh.polygons.foreach_get('material_index', material_indices)
+        for idx in reversed(duplicate_indices):
+            mesh.materials.pop(index=idx)
+        # スロット削除時のインデックスの詰め直しに依存せず、最後にまとめて設定する
+        num_slots = len(remap)
+        for idx, material_index in enumerate(material_indices):
+            if material_index < num_slots:
+                material_indices[idx] = remap[material_index]
+        mesh.polygons.foreach_set('material_index', material_indices)
+        mesh.update()
+
+    logger.info('Consolidate material slots : %s, %s -> %s', obj.name, num_slots_before, len(obj.material_slots))
+    return num_slots_before, len(obj.material_slots)
+
+
+def hashable_value(value, is_persistent=False):
+    # is_persistentがTrueの場合は、セッションやファイルをまたいで比較できるようIDをポインタではなく名前で表す
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    if isinstance(value, bpy.types.ID):
+        return value.name_full if is_persistent else value.as_pointer()
+    if isinstance(value, bpy.types.bpy_struct):
+        # ID以外の構造体は比較できないため、キーには含めない
+        return None
+    return tuple(hashable_value(item, is_persistent) for item in value)
+
+
+def rna_values(data, is_persistent=False):
+    return tuple((prop.identifier, hashable_value(getattr(data, prop.identifier), is_persistent)) for prop in data.bl_rna.properties
+                 if prop.identifier != 'rna_type' and not prop.is_readonly)
+
+
+def consolidate_material_slots_by_scene_setting(obj):
+    if not bpy.context.scene.samk.is_enabled_material_consolidation:
+        return None
+    return consolidate_material_slots(obj)
 
 
 def clone_object(obj):
@@ -71,8 +208,18 @@ def clear_all_materials(data: bpy.types.Mesh):
     data.materials.clear()
 
 
+def remove_object(obj):
+    # オペレータを使わずにオブジェクトと、他に使われていないメッシュを削除する
+    logger.info('Removal object name : %s', obj.name)
+    mesh = obj.data
+    bpy.data.objects.remove(obj)
+    if mesh is not None and mesh.users == 0:
+        clear_all_materials(mesh)
+        bpy.data.meshes.remove(mesh)
+
+
 def delete_object(obj):
-    logger.info(f'Deletion object name : {obj.name}')
+    logger.info('Deletion object name : %s', obj.name)
     clear_all_materials(obj.data)
 
     bpy.ops.object.select_all(action='DESELECT')
@@ -96,6 +243,50 @@ def set_active_only(obj):
     set_active_object(obj)
 
 
+@contextmanager
+def object_context(obj, selected_objects=None):
+    # アクティブオブジェクトや選択状態を変更せずに、オペレータの対象をobjに限定する
+    if selected_objects is None:
+        selected_objects = [obj]
+    with bpy.context.temp_override(active_object=obj, object=obj, edit_object=obj, selected_objects=selected_objects, selected_editable_objects=selected_objects):
+        yield
+
+
+@contextmanager
+def edit_object_context(obj):
+    # mode_setや編集モードのオペレータはビューレイヤーのアクティブオブジェクトを対象にするため、
+    # 実行中だけobjをアクティブにし、終了後に元のアクティブオブジェクトへ戻す
+    view_layer = bpy.context.view_layer
+    previous_active = view_layer.objects.active
+    view_layer.objects.active = obj
+    try:
+        with object_context(obj):
+            yield
+    finally:
+        view_layer.objects.active = previous_active
+
+
+def vertex_group_selection(obj, group_index):
+    return [any(group.group == group_index for group in vert.groups) for vert in obj.data.vertices]
+
+
+def select_vertices(mesh, selection):
+    # 頂点の選択を辺と面にも反映させる(編集モードに入った時の選択状態になる)
+    mesh.vertices.foreach_set('select', selection)
+
+    edge_vertices = [0] * (len(mesh.edges) * 2)
+    mesh.edges.foreach_get('vertices', edge_vertices)
+    mesh.edges.foreach_set('select', [selection[v0] and selection[v1] for v0, v1 in zip(edge_vertices[0::2], edge_vertices[1::2])])
+
+    loop_vertices = [0] * len(mesh.loops)
+    mesh.loops.foreach_get('vertex_index', loop_vertices)
+    loop_starts = [0] * len(mesh.polygons)
+    loop_totals = [0] * len(mesh.polygons)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    mesh.polygons.foreach_set('select', [all(selection[v] for v in loop_vertices[start:start + total]) for start, total in zip(loop_starts, loop_totals)])
+
+
 def deselect_all_vert(obj):
     set_active_object(obj)
     bpy.ops.object.mode_set(mode='EDIT')
@@ -104,6 +295,30 @@ def deselect_all_vert(obj):
     bpy.ops.object.mode_set(mode='OBJECT')
 
 
+def deselect_all_elements(mesh):
+    mesh.vertices.foreach_set('select', [False] * len(mesh.vertices))
+    mesh.edges.foreach_set('select', [False] * len(mesh.edges))
+    mesh.polygons.foreach_set('select', [False] * len(mesh.polygons))
+
+
+def run_steps(steps):
+    # ステップ (進捗を返すジェネレータ) を最後まで実行し、戻り値を返す
+    while True:
+        try:
+            next(steps)
+        except StopIteration as e:
+            return e.value
+
+
+def scale_steps(steps, start, end):
+    while True:
+        try:
+            progress = next(steps)
+        except StopIteration as e:
+            return e.value
+        yield start + (end - start) * progress
+
+
 def update_progress(job_title, progress):
     length = 20  # modify this to change the length
     block = int(round(length * progress))
@@ -189,18 +404,67 @@ def search_coll(name, target_coll=None):
     return target_coll
 
 
-@deco_coll
-def exclude_coll(name, value, target_coll=None):
-    if not value:
-        target_coll.exclude = True
-        target_coll.exclude = False
-    else:
-        target_coll.exclude = True
-
-
-@deco_coll
-def hide_coll(name, value, target_coll=None):
-    target_coll.hide_viewport = value
+def layer_collection_index(view_layer=None):
+    if view_layer is None:
+        view_layer = bpy.context.view_layer
+    index = dict()
+    layer_collections = [view_layer.layer_collection]
+    while layer_collections:
+        layer_collection = layer_collections.pop()
+        index[layer_collection.name] = layer_collection
+        layer_collections.extend(layer_collection.children)
+    return index
+
+
+class VisibilityTransaction:
+    # 除外・非表示の変更はビューレイヤーの再同期を伴うため、要求を記録しておき、
+    # コミット時にレイヤーコレクションを一度だけ索引付けして、実際に変わるものだけをまとめて適用する
+    def __init__(self, view_layer=None) -> None:
+        self._view_layer = view_layer
+        self._exclude = dict()
+        self._hide = dict()
+
+    def exclude(self, name, value):
+        self._exclude[name] = value
+
+    def hide(self, name, value):
+        self._hide[name] = value
+
+    def exclude_and_hide(self, name, value):
+        self.exclude(name, value)
+        self.hide(name, value)
+
+    def commit(self):
+        if not self._exclude and not self._hide:
+            return
+        index = layer_collection_index(self._view_layer)
+        for states, attribute in ((self._exclude, 'exclude'), (self._hide, 'hide_viewport')):
+            for name, value in states.items():
+                try:
+                    layer_collection = index[name]
+                except KeyError:
+                    raise SAMKStructureError(f'Collection \'{name}\' not found.')
+                if getattr(layer_collection, attribute) != value:
+                    setattr(layer_collection, attribute, value)
+        self._exclude.clear()
+        self._hide.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, et, ev, tb):
+        if et is None:
+            self.commit()
+
+
+def exclude_coll(name, value):
+    with VisibilityTransaction() as transaction:
+        transaction.exclude(name, value)
+
+
+def hide_coll(name, value):
+    with VisibilityTransaction() as transaction:
+        transaction.hide(name, value)
 
 
 def exclude_all_child_coll(name, value):
@@ -21,9 +21,10 @@ from bpy.props import BoolProperty, StringProperty
 
 from bpy.types import Panel, PropertyGroup
 
-from .setting.setting_operators import SAMK_OT_CheckData, SAMK_OT_AddSpec, SAMK_OT_SetupOutliner, SAMK_UL_SpecList
+from .setting.setting_operators import SAMK_OT_CheckData, SAMK_OT_AddSpec, SAMK_OT_AddSpecVariant, SAMK_OT_SetupOutliner, SAMK_UL_SpecList, SAMK_UL_SpecVariantList
 
-from .operators import SAMK_OT_FeedBack, SAMK_OT_ProfileShapeKey, SAMK_OT_ProfileBoneGroup, SAMK_OT_SetUp, SAMK_OT_SetUpAll, SAMK_OT_Translate, SAMK_OT_DebugQueue, SAMK_OT_DebugStrategy
+from .operators import SAMK_OT_FeedBack, SAMK_OT_ProfileShapeKey, SAMK_OT_ProfileBoneGroup, SAMK_OT_SetUp, SAMK_OT_SetUpAll, SAMK_OT_SetUpMatrix, SAMK_OT_Translate, SAMK_OT_DebugQueue, SAMK_OT_DebugStrategy, \
+    SAMK_OT_RestoreBackup, SAMK_OT_SetUpAllUndoLight, SAMK_OT_SetUpUndoLight, SAMK_OT_TranslateUndoLight
 
 from .syntax import Syntax, UNSELECTABLE_SYS_SPECS
 
@@ -59,6 +60,14 @@ class SAMK_PT_Settings(Panel):
         tb1.operator(SAMK_OT_AddSpec.bl_idname, text='', icon='ADD')
         # tb1.operator(SAMK_OT_LoadSpecs.bl_idname, text='', icon='DOWNARROW_HLT')
 
+        column.label(text='Spec Variants')
+        row = column.row()
+        row.template_list(SAMK_UL_SpecVariantList.__name__, 'The_Variant_List', scene.samk, 'spec_variants', scene.samk, 'spec_variants_index')
+
+        tb = row.column()
+        tb1 = tb.column(align=True)
+        tb1.operator(SAMK_OT_AddSpecVariant.bl_idname, text='', icon='ADD')
+
         column.operator(SAMK_OT_SetupOutliner.bl_idname)
         column.operator(SAMK_OT_CheckData.bl_idname)
         layout.separator()
@@ -86,8 +95,22 @@ class SAMK_PT_Setup(Panel):
 
         # UIが変更されたオペレータプロパティを表示するボタンを配置する
         column = layout.column()
-        column.operator(SAMK_OT_SetUp.bl_idname)
-        column.operator(SAMK_OT_SetUpAll.bl_idname)
+        if scene.samk.is_enabled_undo_light:
+            column.operator(SAMK_OT_SetUpUndoLight.bl_idname)
+            column.operator(SAMK_OT_SetUpAllUndoLight.bl_idname)
+        else:
+            column.operator(SAMK_OT_SetUp.bl_idname)
+            column.operator(SAMK_OT_SetUpAll.bl_idname)
+        column.operator(SAMK_OT_SetUpMatrix.bl_idname)
+        column.prop(scene.samk, 'is_enabled_modal_setup')
+        column.prop(scene.samk, 'is_enabled_undo_light')
+        column.prop(scene.samk, 'is_enabled_orphan_purge')
+        column.prop(scene.samk, 'is_enabled_material_consolidation')
+        column.prop(scene.samk, 'is_enabled_shape_key_compaction')
+        if scene.samk.is_enabled_shape_key_compaction:
+            column.prop(scene.samk, 'shape_key_compaction_tolerance')
+            column.prop(scene.samk, 'is_enabled_shape_key_stats')
+        column.operator(SAMK_OT_RestoreBackup.bl_idname)
         layout.separator()
 
         if scene.samk.is_enabled_debug_mode:
@@ -120,8 +143,14 @@ class SAMK_PT_Translation(Panel):
         scene = context.scene
 
         column = layout.column()
-        column.operator(SAMK_OT_Translate.bl_idname)
+        if scene.samk.is_enabled_undo_light:
+            column.operator(SAMK_OT_TranslateUndoLight.bl_idname)
+        else:
+            column.operator(SAMK_OT_Translate.bl_idname)
         column.prop(scene.samk, 'translation_mode', text='Translate To')
+        column.prop(scene.samk, 'is_enabled_vertex_cache_reorder')
+        if scene.samk.is_enabled_vertex_cache_reorder:
+            column.prop(scene.samk, 'vertex_cache_size')
         layout.separator()
         column = layout.column()
         column.operator(SAMK_OT_FeedBack.bl_idname)
@@ -147,6 +176,14 @@ class SAMK_PT_Translation(Panel):
             column.operator(SAMK_OT_ProfileShapeKey.bl_idname)
             column.label(text=f'ShapeKey Profile : {scene.samk.profile_skey.file_path}')
             layout.separator()
+        if scene.samk.translation_mode == Syntax.MODE_GE:
+            column = layout.column()
+            column.prop(scene.samk, 'is_enabled_ge_skinning')
+            if scene.samk.is_enabled_ge_skinning:
+                column.prop(scene.samk, 'ge_max_influences')
+                column.prop(scene.samk, 'ge_weight_epsilon')
+                column.prop(scene.samk, 'ge_weight_quantize_steps')
+            layout.separator()
 
 
 class SAMKProfileProperty(PropertyGroup):
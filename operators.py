@@ -17,19 +17,31 @@
 
 import bpy
 
-from bpy.props import EnumProperty
+from bpy.props import BoolProperty, EnumProperty
 
 from . import debug
 
+from .backup import TargetedBackup, has_backup, restore_backup
+
+from .cache import draw_cached
+
+from .datablock import DatablockCensus
+
 from .setting.setting_check import check_data
 
 from .file import check_profile
 
-from .function import copy_nonlink, exclude_coll, delete_object, hide_coll, is_valid_objects, loop_process, select_object, set_active_object, set_active_only
+from .function import VisibilityTransaction, copy_nonlink, delete_object, is_valid_objects, loop_process, select_object, set_active_object, set_active_only
 
 import logging
 
-from .setup.setup_execute import SetupExecution
+import time
+
+from .setup.setup_execute import SetupExecution, SetupRollback, SpecMatrixExecution
+
+from .setup.setup_library import cache_directory, cache_entries, clear_library_cache
+
+from .setup.setup_plan import SetupDryRun
 
 from .setup.setup_queue import SetupAllQueue, SetupQueue
 
@@ -41,14 +53,24 @@ from .setup.setup_strategy import CleanupRelease_SK, CleanupRelease, CleanupRele
 
 from .setup.setup_strategy import strategy_classes_callback
 
+from .skinning import clear_skinning_stats, collected_skinning_stats
+
 from .syntax import SAMKProfileError, SAMKStructureError, SAMKSyntaxError, Syntax
 
-from .translate import do_translate
+from .translate import do_translate, translated_object_name
+
+from .vertexcache import clear_vertex_cache_stats, collected_vertex_cache_stats
 
 
 logger = logging.getLogger(f'{Syntax.TOOLNAME}')
 
 
+def report_leaks(operator, census: DatablockCensus):
+    leak_text = census.report(bpy.context.scene.samk.is_enabled_orphan_purge)
+    if leak_text:
+        operator.report({'INFO'}, f'WM Setup Tools: {leak_text}')
+
+
 class SAMKAbstractSetUp(bpy.types.Operator):
 
     bl_idname = ''
@@ -58,6 +80,19 @@ class SAMKAbstractSetUp(bpy.types.Operator):
 
     SetupQueueClass = None
 
+    # Trueの場合、グローバルなUndoの代わりに置き換え対象のReleaseオブジェクトだけをバックアップする
+    IS_UNDO_LIGHT = False
+
+    MODAL_TIME_STEP = 0.01
+    MODAL_TIME_SLICE = 0.1
+    PROGRESS_MAX = 1000
+
+    is_dry_run: BoolProperty(
+        name='Dry run',
+        description='Estimate the processing time of each collection and check for errors without running Setup',
+        default=False
+    )
+
     @classmethod
     def poll(cls, context):
         PREFIX = (Syntax.COL_SRC, Syntax.COL_SUBSRC)
@@ -71,42 +106,150 @@ class SAMKAbstractSetUp(bpy.types.Operator):
         scene = context.scene
 
         if self.can_setup:
-            logger.info(f'Start operator : {self.bl_idname}')
+            logger.info('Start operator : %s', self.bl_idname)
 
             obj = context.active_object
 
+            self._census = DatablockCensus()
+
             queue = self.SetupQueueClass(obj)
             order = queue.get_order()
 
-            execution = SetupExecution(order)
-            release_objects = execution.execute()
+            if self.is_dry_run:
+                return self.dry_run(order)
 
-            for obj in release_objects:
-                select_object(obj, True)
-            set_active_object(release_objects[-1])
+            if self.IS_UNDO_LIGHT:
+                self.backup(order)
 
-            self.report({'INFO'}, f'WM Setup Tools: Setup Model \'{tuple(obj.name for obj in release_objects)}\'')
-            print(f'Operator \'{self.bl_idname}\' is executed')
-            logger.info(f'Finished operator : {self.bl_idname}')
+            execution = self.create_execution(order)
+            if scene.samk.is_enabled_modal_setup:
+                return self.start_modal(context, execution)
 
-            return {'FINISHED'}
+            release_objects = execution.execute()
+            return self.finish(release_objects)
 
         self.report({'WARNING'}, f'WM Setup Tools: Setup error occurred. :\'{self.error_code}\'')
         print(f'Operator \'{self.bl_idname}\' is executed')
-        logger.warning(f'Setup error occurred. operator : {self.bl_idname}')
+        logger.warning('Setup error occurred. operator : %s', self.bl_idname)
 
         return {'FINISHED'}
 
+    def create_execution(self, order):
+        return SetupExecution(order)
+
+    def dry_run(self, order):
+        estimates = SetupDryRun(order).estimate()
+        num_errors = 0
+        for estimate in estimates:
+            print(f'{estimate.name} : cost {estimate.cost}, about {estimate.seconds:.1f}s')
+            for error in estimate.errors:
+                print(f'    {error}')
+                self.report({'WARNING'}, f'WM Setup Tools: {error}')
+            num_errors += len(estimate.errors)
+        total_seconds = sum(estimate.seconds for estimate in estimates)
+        self.report({'INFO'}, f'WM Setup Tools: Dry run : {len(estimates)} collections, about {total_seconds:.1f}s, {num_errors} errors')
+        print(f'Operator \'{self.bl_idname}\' is executed (dry run)')
+        logger.info('Finished operator (dry run) : %s', self.bl_idname)
+
+        return {'FINISHED'}
+
+    @staticmethod
+    def backup(order):
+        backup = TargetedBackup()
+        for collection in order:
+            if collection.is_pure_abstract_root:
+                continue
+            backup.backup_object_named(collection.release_object.name)
+
+    def finish(self, release_objects):
+        for obj in release_objects:
+            select_object(obj, True)
+        set_active_object(release_objects[-1])
+
+        self.report({'INFO'}, f'WM Setup Tools: Setup Model \'{tuple(obj.name for obj in release_objects)}\'')
+        report_leaks(self, self._census)
+        print(f'Operator \'{self.bl_idname}\' is executed')
+        logger.info('Finished operator : %s', self.bl_idname)
+
+        return {'FINISHED'}
+
+    def start_modal(self, context, execution: SetupExecution):
+        # セットアップをタイマーイベントごとに少しずつ進め、UIの応答と進捗表示を保つ
+        logger.info('Start modal setup : %s', self.bl_idname)
+        self._execution = execution
+        self._steps = execution.steps()
+        self._rollback = SetupRollback()
+        self._progress = 0.0
+        self._start_time = time.perf_counter()
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(self.MODAL_TIME_STEP, window=context.window)
+        wm.progress_begin(0, self.PROGRESS_MAX)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def end_modal(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def cancel_modal(self, context):
+        self._steps.close()
+        self._rollback.rollback(self._execution.finished_objects)
+        self.end_modal(context)
+
+    def cancel(self, context):
+        # ファイルの読み込みなどでmodalが外部から中断された場合。ダイアログのキャンセルでも呼ばれるため、modal開始前は何もしない
+        if getattr(self, '_steps', None) is None:
+            return
+        self.cancel_modal(context)
+        debug.end_modal_logging(self)
+
+    @debug.debug_modal(logger)
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.cancel_modal(context)
+            self.report({'WARNING'}, f'WM Setup Tools: Setup is cancelled at \'{self._execution.current_collection_name}\'')
+            logger.info('Cancelled modal setup : %s', self.bl_idname)
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'RUNNING_MODAL'}
+
+        time_limit = time.perf_counter() + self.MODAL_TIME_SLICE
+        try:
+            while time.perf_counter() < time_limit:
+                self._progress = next(self._steps)
+        except StopIteration as e:
+            self.end_modal(context)
+            return self.finish(e.value)
+        except Exception:
+            self.cancel_modal(context)
+            raise
+
+        context.window_manager.progress_update(int(self._progress * self.PROGRESS_MAX))
+        context.workspace.status_text_set(self.status_text())
+        return {'RUNNING_MODAL'}
+
+    def status_text(self):
+        elapsed = time.perf_counter() - self._start_time
+        text = f'WM Setup Tools: {self._execution.current_collection_name}  {self._progress * 100:.0f}%'
+        if self._progress > 0.0:
+            remaining = elapsed / self._progress * (1.0 - self._progress)
+            text += f'  ETA {remaining:.0f}s'
+        return text + '  (Esc to cancel)'
+
     def invoke(self, context, event):
         obj = context.active_object
         try:
             check_data(context.active_object)
         except SAMKStructureError as e:
-            logger.info(f'{SAMKStructureError.__name__} : {e}')
+            logger.info('%s : %s', SAMKStructureError.__name__, e)
             self.error_code = e
             self.can_setup = False
         except SAMKSyntaxError as e:
-            logger.info(f'{SAMKSyntaxError.__name__} : {e}')
+            logger.info('%s : %s', SAMKSyntaxError.__name__, e)
             self.error_code = e
             self.can_setup = False
         else:
@@ -125,6 +268,8 @@ class SAMKAbstractSetUp(bpy.types.Operator):
         if not self.can_setup:
             column.alert = True
             column.label(text=f'Error Code: {self.error_code}')
+            return
+        column.prop(self, 'is_dry_run')
 
 
 class SAMK_OT_SetUp(SAMKAbstractSetUp):
@@ -153,17 +298,55 @@ class SAMK_OT_SetUpAll(SAMKAbstractSetUp):
 
     SetupQueueClass = SetupAllQueue
 
+    is_resume: BoolProperty(
+        name='Resume',
+        description='Skip collections completed by the previous Setup All whose inputs are unchanged, and continue from the first incomplete collection',
+        default=False
+    )
+
+    def create_execution(self, order):
+        return SetupExecution(order, is_resume=self.is_resume)
+
     def draw(self, context):
         super().draw(context)
         if self.can_setup:
             layout = self.layout
             column = layout.column()
+            column.prop(self, 'is_resume')
             column.label(text='Start Setup All?')
             column.alert = True
             column.label(text='Note: All collections will be setup.')
             column.label(text='Note: Models with many shape keys will take a long time to process.')
 
 
+class SAMK_OT_SetUpMatrix(SAMKAbstractSetUp):
+
+    bl_idname = 'samk.setupmatrix'
+    bl_label = 'Setup Spec Matrix'
+    bl_description = 'Setup all collections of selected object\'s tree once per spec variant, sharing the work unaffected by the differing specs'
+
+    SetupQueueClass = SetupAllQueue
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.scene.samk.spec_variants) > 0 and super().poll(context)
+
+    def create_execution(self, order):
+        return SpecMatrixExecution(order, bpy.context.scene.samk.spec_variants)
+
+    def draw(self, context):
+        super().draw(context)
+        if self.can_setup:
+            layout = self.layout
+            column = layout.column()
+            for variant in context.scene.samk.spec_variants:
+                column.label(text=f'{variant.name}: {", ".join(variant.enabled_spec_names)}')
+            column.label(text='Start Setup Spec Matrix?')
+            column.alert = True
+            column.label(text='Note: Release objects are renamed for each variant.')
+            column.label(text='Note: Models with many shape keys will take a long time to process.')
+
+
 class SAMK_OT_Translate(bpy.types.Operator):
 
     bl_idname = 'samk.translate'
@@ -171,6 +354,8 @@ class SAMK_OT_Translate(bpy.types.Operator):
     bl_description = 'Translate in selected mode'
     bl_options = {'REGISTER', 'UNDO'}
 
+    IS_UNDO_LIGHT = False
+
     @classmethod
     def poll(cls, context):
         scene = context.scene
@@ -188,26 +373,39 @@ class SAMK_OT_Translate(bpy.types.Operator):
             is_enabled_profile_bgroup = scene.samk.profile_bgroup.is_syntax_ok or not scene.samk.profile_bgroup.is_enabled_translation
             is_enabled_profile_skey = scene.samk.profile_skey.is_syntax_ok or not scene.samk.profile_skey.is_enabled_translation
 
-        condition = (is_enabled_profile_bgroup, is_enabled_profile_skey, is_valid_objects(context, Syntax.OBJ_RELEASE))
+        condition = (is_enabled_profile_bgroup, is_enabled_profile_skey, draw_cached(('is_valid_objects', Syntax.OBJ_RELEASE), lambda: is_valid_objects(context, Syntax.OBJ_RELEASE)))
         return all(condition)
 
     @debug.debug_execute(logger)
     def execute(self, context):
-        logger.info(f'Start operator : {self.bl_idname}')
+        logger.info('Start operator : %s', self.bl_idname)
 
+        census = DatablockCensus()
+        clear_skinning_stats()
+        clear_vertex_cache_stats()
         objects = context.selected_objects
+        if self.IS_UNDO_LIGHT:
+            backup = TargetedBackup()
+            for obj in objects:
+                backup.backup_object_named(translated_object_name(obj))
+
         try:
             translated_objects_name = do_translate(objects)
         except SAMKStructureError as e:
             self.report({'WARNING'}, f'WM Setup Tools: Object structure error occurred. :\'{e}\'')
             print(f'Operator \'{self.bl_idname}\' is aborted')
-            logger.info(f'Translation error occurred. operator : {self.bl_idname}')
+            logger.info('Translation error occurred. operator : %s', self.bl_idname)
 
             return {'FINISHED'}
 
         self.report({'INFO'}, f'WM Setup Tools: Translate Model {translated_objects_name}')
+        for stats in collected_skinning_stats():
+            self.report({'INFO'}, f'WM Setup Tools: Skin weights {stats}')
+        for stats in collected_vertex_cache_stats():
+            self.report({'INFO'}, f'WM Setup Tools: Vertex cache {stats}')
+        report_leaks(self, census)
         print(f'Operator \'{self.bl_idname}\' is executed')
-        logger.info(f'Finished operator : {self.bl_idname}')
+        logger.info('Finished operator : %s', self.bl_idname)
 
         return {'FINISHED'}
 
@@ -223,6 +421,81 @@ class SAMK_OT_Translate(bpy.types.Operator):
         layout.separator()
 
 
+class SAMK_OT_SetUpUndoLight(SAMK_OT_SetUp):
+
+    bl_idname = 'samk.setup_undolight'
+    bl_options = {'REGISTER'}
+
+    IS_UNDO_LIGHT = True
+
+
+class SAMK_OT_SetUpAllUndoLight(SAMK_OT_SetUpAll):
+
+    bl_idname = 'samk.setupall_undolight'
+    bl_options = {'REGISTER'}
+
+    IS_UNDO_LIGHT = True
+
+
+class SAMK_OT_TranslateUndoLight(SAMK_OT_Translate):
+
+    bl_idname = 'samk.translate_undolight'
+    bl_options = {'REGISTER'}
+
+    IS_UNDO_LIGHT = True
+
+
+class SAMK_OT_RestoreBackup(bpy.types.Operator):
+
+    bl_idname = 'samk.restore_backup'
+    bl_label = 'Restore Backup'
+    bl_description = 'Restore objects backed up by the last undo-light Setup or Translate'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return draw_cached(('has_backup', ), has_backup)
+
+    @debug.debug_execute(logger)
+    def execute(self, context):
+        logger.info('Start operator : %s', self.bl_idname)
+        restored_objects = restore_backup()
+        self.report({'INFO'}, f'WM Setup Tools: Restore Model \'{tuple(obj.name for obj in restored_objects)}\'')
+        logger.info('Finished operator : %s', self.bl_idname)
+        return {'FINISHED'}
+
+
+class SAMK_OT_InspectLibraryCache(bpy.types.Operator):
+
+    bl_idname = 'samk.inspect_library_cache'
+    bl_label = 'Inspect Library Cache'
+    bl_description = 'Show the number and size of cached SubRelease objects'
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        entries = cache_entries()
+        for path, size, _ in reversed(entries):
+            print(f'{path} : {size / 1024 / 1024:.2f} MB')
+        total_size = sum(size for _, size, _ in entries)
+        self.report({'INFO'}, f'WM Setup Tools: Library cache \'{cache_directory()}\' : {len(entries)} entries, {total_size / 1024 / 1024:.2f} MB')
+
+        return {'FINISHED'}
+
+
+class SAMK_OT_ClearLibraryCache(bpy.types.Operator):
+
+    bl_idname = 'samk.clear_library_cache'
+    bl_label = 'Clear Library Cache'
+    bl_description = 'Delete all cached SubRelease objects'
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        num_evicted = clear_library_cache()
+        self.report({'INFO'}, f'WM Setup Tools: {num_evicted} library cache entries deleted')
+
+        return {'FINISHED'}
+
+
 class SAMK_OT_FeedBack(bpy.types.Operator):
 
     bl_idname = 'samk.feedback'
@@ -240,7 +513,7 @@ class SAMK_OT_FeedBack(bpy.types.Operator):
             Syntax.MODE_GE,
             scene.samk.udef_mode_name,)
 
-        return is_valid_objects(context, postfix)
+        return draw_cached(('is_valid_objects', postfix), lambda: is_valid_objects(context, postfix))
 
     @debug.debug_execute(logger)
     def execute(self, context):
@@ -258,8 +531,8 @@ class SAMK_OT_FeedBack(bpy.types.Operator):
                 coll = bpy.data.collections.new(Syntax.COL_AUTOGEN)
                 bpy.context.collection.children.link(coll)
             finally:
-                exclude_coll(coll.name, False)
-                hide_coll(coll.name, False)
+                with VisibilityTransaction() as transaction:
+                    transaction.exclude_and_hide(coll.name, False)
 
             try:
                 container = bpy.data.objects[container_name]
@@ -296,26 +569,28 @@ class SAMK_OT_FeedBack(bpy.types.Operator):
 
             container_new.hide_set(True)
 
-            exclude_coll(coll.name, True)
-            hide_coll(coll.name, True)
+            with VisibilityTransaction() as transaction:
+                transaction.exclude_and_hide(coll.name, True)
 
             return container_new
 
-        logger.info(f'Start operator : {self.bl_idname}')
+        logger.info('Start operator : %s', self.bl_idname)
 
+        census = DatablockCensus()
         objects = context.selected_objects
         try:
             containers_new_name = feedback_core(objects)
         except SAMKStructureError as e:
             self.report({'WARNING'}, f'WM Setup Tools: Object structure error occurred. :\'{e}\'')
             print(f'Operator \'{self.bl_idname}\' is aborted')
-            logger.info(f'Feedback error occurred. operator : {self.bl_idname}')
+            logger.info('Feedback error occurred. operator : %s', self.bl_idname)
 
             return {'FINISHED'}
 
         self.report({'INFO'}, f'WM Setup Tools: Feedback to {containers_new_name}')
+        report_leaks(self, census)
         print(f'Operator \'{self.bl_idname}\' is executed')
-        logger.info(f'Finished operator : {self.bl_idname}')
+        logger.info('Finished operator : %s', self.bl_idname)
 
         return {'FINISHED'}
 
@@ -332,19 +607,19 @@ class ReadProfile(bpy.types.Operator):
 
     @debug.debug_execute(logger)
     def execute(self, context):
-        logger.info(f'Start operator : {self.bl_idname}')
+        logger.info('Start operator : %s', self.bl_idname)
 
         if not self.profile:
             raise SAMKProfileError('Internal Error. Kind of profile is not selected.')
 
-        logger.info(f'Start operator : {self.__class__.__name__}')
+        logger.info('Start operator : %s', self.__class__.__name__)
         self.profile.is_syntax_ok = False
         try:
             check_profile(self.filepath, self.profile_type)
         except SAMKProfileError as e:
             self.report({'WARNING'}, f'WM Setup Tools : {self.profile_type.capitalize()} Profile, {e}')
             self.profile.file_path = '(Load Error)'
-            logger.info(f'Read file error occurred. operator : {self.__class__.__name__}')
+            logger.info('Read file error occurred. operator : %s', self.__class__.__name__)
             return {'FINISHED'}
 
         self.profile.is_syntax_ok = True
@@ -352,7 +627,7 @@ class ReadProfile(bpy.types.Operator):
         filepath_tmp = bpy.path.relpath(self.filepath)
         self.report({'INFO'}, f'WM Setup Tools : {self.profile_type.capitalize()} Profile, [FilePath] {self.filepath}')
         self.profile.file_path = filepath_tmp
-        logger.info(f'Finished operator : {self.__class__.__name__}')
+        logger.info('Finished operator : %s', self.__class__.__name__)
         return {'FINISHED'}
 
     def invoke(self, context, event):
@@ -403,7 +678,7 @@ class NewCollection(bpy.types.Operator):
         return True
 
     def execute(self, context):
-        logger.info(f'Start operator : {self.bl_idname}')
+        logger.info('Start operator : %s', self.bl_idname)
         
         scene = context.scene
 
@@ -413,7 +688,7 @@ class NewCollection(bpy.types.Operator):
 
         self.report({'INFO'}, f'WM Setup Tools: Add Collection \'{new_collection.name}\'')
         print(f'Operator \'{self.bl_idname}\' is executed')
-        logger.info(f'Finished operator : {self.bl_idname}')
+        logger.info('Finished operator : %s', self.bl_idname)
 
         return {'FINISHED'}
 
@@ -458,7 +733,7 @@ class SAMK_OT_DebugStrategy(bpy.types.Operator):
 
     @debug.debug_execute(logger)
     def execute(self, context: bpy.context):
-        logger.info(f'Start operator : {self.bl_idname}')
+        logger.info('Start operator : %s', self.bl_idname)
 
         collection = context.scene.collection
         act_obj = context.active_object
@@ -471,7 +746,7 @@ class SAMK_OT_DebugStrategy(bpy.types.Operator):
 
         self.report({'INFO'}, f'WM Setup Tools: debug {self.debug_strategy}')
         print(f'Operator \'{self.bl_idname}\' is executed')
-        logger.info(f'Finished operator : {self.bl_idname}')
+        logger.info('Finished operator : %s', self.bl_idname)
 
         return {'FINISHED'}
 
@@ -496,7 +771,7 @@ class SAMK_OT_DebugQueue(bpy.types.Operator):
 
     @debug.debug_execute(logger)
     def execute(self, context: bpy.context):
-        logger.info(f'Start operator : {self.bl_idname}')
+        logger.info('Start operator : %s', self.bl_idname)
 
         obj = context.active_object
 
@@ -505,7 +780,7 @@ class SAMK_OT_DebugQueue(bpy.types.Operator):
 
         self.report({'INFO'}, f'WM Setup Tools: debug queue / order : {[od.name for od in order]}')
         print(f'Operator \'{self.bl_idname}\' is executed')
-        logger.info(f'Finished operator : {self.bl_idname}')
+        logger.info('Finished operator : %s', self.bl_idname)
 
         return {'FINISHED'}
 
@@ -513,8 +788,15 @@ class SAMK_OT_DebugQueue(bpy.types.Operator):
 classes = [
     SAMK_OT_SetUp,
     SAMK_OT_SetUpAll,
+    SAMK_OT_SetUpMatrix,
     SAMK_OT_FeedBack,
     SAMK_OT_Translate,
+    SAMK_OT_SetUpUndoLight,
+    SAMK_OT_SetUpAllUndoLight,
+    SAMK_OT_TranslateUndoLight,
+    SAMK_OT_RestoreBackup,
+    SAMK_OT_InspectLibraryCache,
+    SAMK_OT_ClearLibraryCache,
     SAMK_OT_ProfileBoneGroup,
     SAMK_OT_ProfileShapeKey,
     SAMK_OT_NewSourceCollection,
@@ -17,16 +17,75 @@
 
 import bpy
 
+from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty
+
+from .debug import DEFAULT_LOG_LEVEL, LOG_LEVEL_ITEMS
+
 
 class SAMK_Preferences(bpy.types.AddonPreferences):
     bl_idname = __package__
 
+    log_level_general: EnumProperty(
+        name='General log level',
+        description='Log level of operators and settings',
+        items=LOG_LEVEL_ITEMS,
+        default=DEFAULT_LOG_LEVEL
+    )
+    log_level_setup: EnumProperty(
+        name='Setup log level',
+        description='Log level of setup processing',
+        items=LOG_LEVEL_ITEMS,
+        default=DEFAULT_LOG_LEVEL
+    )
+    log_level_translate: EnumProperty(
+        name='Translate log level',
+        description='Log level of translation processing',
+        items=LOG_LEVEL_ITEMS,
+        default=DEFAULT_LOG_LEVEL
+    )
+    is_enabled_log_file: BoolProperty(
+        name='Write log file',
+        description='Write operator log to file. If disabled or all log levels are Off, logging costs nothing',
+        default=True
+    )
+    is_enabled_library_cache: BoolProperty(
+        name='Library cache of SubRelease objects',
+        description='Save built SubRelease objects to .blend files keyed by their inputs, and append them instead of rebuilding unchanged subsource collections',
+        default=False
+    )
+    library_cache_directory: StringProperty(
+        name='Library cache directory',
+        description='Directory of the library cache. If empty, the user datafiles directory is used',
+        default='',
+        subtype='DIR_PATH'
+    )
+    library_cache_size_mb: IntProperty(
+        name='Library cache size (MB)',
+        description='Least recently used entries are deleted when the library cache exceeds this size',
+        default=1024,
+        min=1
+    )
+
     def draw(self, context):
         scene = context.scene
         layout = self.layout
         row = layout.row()
         row.prop(scene.samk, 'is_enabled_debug_mode')
 
+        column = layout.column()
+        column.prop(self, 'is_enabled_log_file')
+        column.prop(self, 'log_level_general')
+        column.prop(self, 'log_level_setup')
+        column.prop(self, 'log_level_translate')
+
+        column = layout.column()
+        column.prop(self, 'is_enabled_library_cache')
+        column.prop(self, 'library_cache_directory')
+        column.prop(self, 'library_cache_size_mb')
+        row = column.row()
+        row.operator('samk.inspect_library_cache')
+        row.operator('samk.clear_library_cache')
+
 
 classes = [
     SAMK_Preferences,
@@ -30,17 +30,15 @@ from . import setting_command
 
 # Mediator
 class Mediator(ABC):
+    PROPERTY_NAME = None
+
     def __init__(self, command) -> None:
         super().__init__()
         self.current_scope_type: setting_command.ScopeType = setting_command.current_scope()
         self.command = command
 
     def notify(self):
-        extracted_names = self._extracted_names()
-
-        for extracted_name in extracted_names:
-            new_extraction = self.extracted_list.add()
-            new_extraction.name = extracted_name
+        setting_command.store_candidates(self.command, self.PROPERTY_NAME, self._extracted_names())
 
     @abstractmethod
     def _names(self):
@@ -58,10 +56,7 @@ class Mediator(ABC):
 
 
 class SourceMediator(Mediator):
-    def __init__(self, command) -> None:
-        super().__init__(command)
-        self.extracted_list = self.command.extracted_source_candidates
-        self.extracted_list.clear()
+    PROPERTY_NAME = syntax.Props.SRC
 
     def _names(self):
         if type(self.command) is setting_command.MDF_Undivision:
@@ -89,10 +84,7 @@ class SourceMediator(Mediator):
 
 
 class DestinationMediator(Mediator):
-    def __init__(self, command) -> None:
-        super().__init__(command)
-        self.extracted_list = self.command.extracted_destination_candidates
-        self.extracted_list.clear()
+    PROPERTY_NAME = syntax.Props.DST
 
     def _names(self):
         if type(self.current_scope_type) is setting_command.Scope_MT:
@@ -112,10 +104,7 @@ class DestinationMediator(Mediator):
 
 
 class ModifierMediator(Mediator):
-    def __init__(self, command) -> None:
-        super().__init__(command)
-        self.extracted_list = self.command.extracted_destination_mdf_candidates
-        self.extracted_list.clear()
+    PROPERTY_NAME = syntax.Props.DST_MDF
 
     def _names(self):
         return set(modifier.name for modifier in bpy.context.active_object.modifiers if modifier.type == 'SUBSURF')
@@ -137,10 +126,7 @@ class ModifierMediator(Mediator):
 
 
 class ObjectMediator(Mediator):
-    def __init__(self, command) -> None:
-        super().__init__(command)
-        self.extracted_list = self.command.extracted_destination_obj_candidates
-        self.extracted_list.clear()
+    PROPERTY_NAME = syntax.Props.DST_OBJ
 
     def _names(self):
         obj = bpy.context.active_object
@@ -160,10 +146,10 @@ class ObjectMediator(Mediator):
 
 
 class VertexGroupMediator(Mediator):
+    PROPERTY_NAME = syntax.Props.DST_VG
+
     def __init__(self, command) -> None:
         super().__init__(command)
-        self.extracted_list = self.command.extracted_destination_vg_candidates
-        self.extracted_list.clear()
 
         try:
             self._destination_obj = bpy.data.objects[self.command.destination_obj]
@@ -210,17 +196,15 @@ class VertexGroupMediator(Mediator):
 
 
 class AbstractSpecMediator(ABC):
+    PROPERTY_NAME = None
+
     def __init__(self, command) -> None:
         super().__init__()
         self.current_scope_type: setting_command.ScopeType = setting_command.current_scope()
         self.command = command
 
     def notify(self):
-        extracted_names = self._extracted_names()
-
-        for extracted_name in extracted_names:
-            new_extraction = self.extracted_list.add()
-            new_extraction.name = extracted_name
+        setting_command.store_candidates(self.command, self.PROPERTY_NAME, self._extracted_names())
 
     @abstractmethod
     def _names(self):
@@ -238,10 +222,7 @@ class AbstractSpecMediator(ABC):
 
 
 class SpecMediator(AbstractSpecMediator):
-    def __init__(self, command) -> None:
-        super().__init__(command)
-        self.extracted_list = self.command.extracted_spec_candidates
-        self.extracted_list.clear()
+    PROPERTY_NAME = syntax.Props.SPEC
 
     def _names(self):
         return set(spec.name for spec in bpy.context.scene.samk.specs if spec.name not in syntax.SELECTABLE_SYS_SPECS)
@@ -251,10 +232,7 @@ class SpecMediator(AbstractSpecMediator):
 
 
 class UndivisionSpecMediator(AbstractSpecMediator):
-    def __init__(self, command) -> None:
-        super().__init__(command)
-        self.extracted_list = self.command.extracted_spec_candidates
-        self.extracted_list.clear()
+    PROPERTY_NAME = syntax.Props.SPEC
 
     def _names(self):
         names = set()
@@ -19,7 +19,7 @@ import bpy
 
 from ..function import select_object, set_active_only
 
-from ..setting.setting_command import ScopeType
+from ..setting.setting_command import ScopeType, candidate_names
 
 from ..syntax import Props, SAMKStructureError, SAMKSyntaxError, Syntax
 
@@ -62,11 +62,10 @@ def check_data(obj):
                 for command in current_scope_type.this_type_commands():
                     command.update(None)
                     for prop_name in (Props.SRC, Props.DST, Props.DST_MDF, Props.DST_OBJ, Props.DST_VG, Props.SPEC):
-                        candidates_name = 'extracted_' + prop_name + '_candidates'
                         if prop_name not in dir(command):
                             continue
                         prop = getattr(command, prop_name)
-                        candidates = getattr(command, candidates_name)
+                        candidates = candidate_names(command, prop_name)
                         if prop == '':
                             raise SAMKSyntaxError(f'Object: \'{source_obj.name}\' Command: \'{command.__class__.__name__}\' Property: \'{prop_name}\' Key is blank.')
                         if prop not in candidates:
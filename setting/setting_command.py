@@ -19,13 +19,15 @@ import bpy
 
 from abc import ABC, abstractmethod
 
+from bpy.app.handlers import persistent
+
 from bpy.props import CollectionProperty, EnumProperty, FloatProperty, IntProperty, StringProperty
 
 from bpy.types import Operator, PropertyGroup
 
 from . import setting_candidates
 
-from ..syntax import Icon, Syntax
+from ..syntax import Icon, Props, Syntax
 
 
 def sort_by_index(commands):
@@ -36,7 +38,106 @@ def current_scope(obj=None):
     return globals()['Scope_' + bpy.context.scene.samk.scope_type_to_edit](obj)
 
 
+# (scope type class name, name kind, object pointer) : names
+_names_cache = dict()
+
+
+# (object pointer, command pointer, property name) : candidate names
+# 候補リストはファイルに保存せず、実行時にのみ保持する
+_candidates_cache = dict()
+
+
+def clear_candidates_cache(obj=None):
+    if obj is None:
+        _candidates_cache.clear()
+        return
+    pointer = obj.as_pointer()
+    for key in tuple(_candidates_cache.keys()):
+        if key[0] == pointer:
+            del _candidates_cache[key]
+
+
+def candidates_key(command, property_name):
+    return (command.id_data.as_pointer(), command.as_pointer(), property_name)
+
+
+def store_candidates(command, property_name, names):
+    _candidates_cache[candidates_key(command, property_name)] = tuple(names)
+
+
+# property name : update method of command which extracts the candidates
+CANDIDATE_UPDATERS = {
+    Props.SRC: 'update_source',
+    Props.DST: 'update_destination',
+    Props.DST_MDF: 'update_modifier',
+    Props.DST_VG: 'update_vertexgroup',
+    Props.DST_OBJ: 'update_object',
+    Props.SPEC: 'update_spec',
+}
+
+
+def candidate_names(command, property_name) -> tuple:
+    key = candidates_key(command, property_name)
+    try:
+        return _candidates_cache[key]
+    except KeyError:
+        getattr(command, CANDIDATE_UPDATERS[property_name])(None)
+        return _candidates_cache.get(key, tuple())
+
+
+def candidate_search(property_name):
+    # StringPropertyの検索コールバック(Blender 3.3以降)で、検索ポップアップを開いた時に候補を生成する
+    def _search(self, context, edit_text):
+        edit_text = edit_text.lower()
+        return [name for name in candidate_names(self, property_name) if edit_text in name.lower()]
+
+    return {'search': _search}
+
+
+def clear_names_cache(obj=None, scope_type_name=None):
+    if obj is None:
+        clear_candidates_cache()
+    else:
+        clear_candidates_cache(obj)
+    if obj is None and scope_type_name is None:
+        _names_cache.clear()
+        return
+    pointer = None if obj is None else obj.as_pointer()
+    for key in tuple(_names_cache.keys()):
+        if pointer is not None and key[2] != pointer:
+            continue
+        if scope_type_name is not None and key[0] != scope_type_name:
+            continue
+        del _names_cache[key]
+
+
+@persistent
+def invalidate_names_cache(scene, depsgraph):
+    for update in depsgraph.updates:
+        id_orig = update.id.original
+        if isinstance(id_orig, bpy.types.Armature):
+            # アーマチュアのボーン名はScope_VGの全オブジェクトに影響する
+            clear_names_cache(scope_type_name=Scope_VG.__name__)
+            continue
+        if not isinstance(id_orig, bpy.types.Object):
+            continue
+        if id_orig.type == 'ARMATURE':
+            clear_names_cache(scope_type_name=Scope_VG.__name__)
+            continue
+        clear_names_cache(obj=id_orig)
+        _command_indices.pop(id_orig.session_uid, None)
+    prune_command_indices()
+
+
+@persistent
+def clear_caches(dummy):
+    clear_names_cache()
+    clear_command_indices()
+
+
 class ScopeType(ABC):
+    _strategies = tuple()
+
     def __init__(self, obj=None) -> None:
         super().__init__()
         if obj is None:
@@ -44,13 +145,12 @@ class ScopeType(ABC):
         else:
             self._obj = obj
 
+    @classmethod
+    def scope_type_name(cls):
+        return cls.__name__.split(Syntax.UNDER)[1]
+
     def this_type_strategies(self) -> tuple:
-        strategies = list()
-        scope_type_name = self.__class__.__name__.lstrip('Scope').lstrip(Syntax.UNDER)
-        for key, Class in globals().items():
-            if key.startswith(scope_type_name):
-                strategies.append(Class)
-        return strategies
+        return self._strategies
 
     def initialized_strategy_name(self):
         return self.this_type_strategies()[0].__name__
@@ -67,8 +167,20 @@ class ScopeType(ABC):
     def icon_data(self):
         pass
 
-    @abstractmethod
+    def _cached_names(self, kind, extract_names):
+        key = (self.__class__.__name__, kind, self._obj.as_pointer())
+        try:
+            return _names_cache[key]
+        except KeyError:
+            names = extract_names()
+            _names_cache[key] = names
+            return names
+
     def names(self):
+        return self._cached_names('names', self._names)
+
+    @abstractmethod
+    def _names(self):
         pass
 
     def update_all(self):
@@ -80,7 +192,7 @@ class Scope_VG(ScopeType):
     def icon_data(self):
         return Icon.VG
 
-    def names(self):
+    def _names(self):
         deform_bone_names = list()
         for mdf in self._obj.modifiers:
             if mdf.type != 'ARMATURE':
@@ -102,7 +214,7 @@ class Scope_SK(ScopeType):
     def icon_data(self):
         return Icon.SK
 
-    def names(self):
+    def _names(self):
         if self._obj.data.shape_keys is not None:
             return tuple(key.name for key in self._obj.data.shape_keys.key_blocks)
         return tuple()
@@ -112,7 +224,7 @@ class Scope_UV(ScopeType):
     def icon_data(self):
         return Icon.UV
 
-    def names(self):
+    def _names(self):
         return tuple(uv.name for uv in self._obj.data.uv_layers)
 
 
@@ -120,52 +232,24 @@ class Scope_MDF(ScopeType):
     def icon_data(self):
         return Icon.MDF
 
-    def names(self):
+    def _names(self):
         return tuple(modifier.name for modifier in self._obj.modifiers)
 
     def names_subdivision(self):
+        return self._cached_names('names_subdivision', self._names_subdivision)
+
+    def _names_subdivision(self):
         return tuple(modifier.name for modifier in self._obj.modifiers if modifier.type == 'SUBSURF')
 
 class Scope_MT(ScopeType):
     def icon_data(self):
         return Icon.MT
 
-    def names(self):
+    def _names(self):
         return tuple(mtslot.material.name for mtslot in self._obj.material_slots)
         # return tuple(material.name for material in bpy.data.materials)
 
 
-class SearchProperty(PropertyGroup):
-    name: StringProperty(
-        name='name for property search',
-        description='Name for property search.'
-    )
-
-
-class ExtractedSpecCandidate(SearchProperty):
-    pass
-
-
-class ExtractedSourceCandidate(SearchProperty):
-    pass
-
-
-class ExtractedDestinationCandidate(SearchProperty):
-    pass
-
-
-class ExtractedDestinationMDFCandidate(SearchProperty):
-    pass
-
-
-class ExtractedDestinationVGCandidate(SearchProperty):
-    pass
-
-
-class ExtractedDestinationOBJCandidate(SearchProperty):
-    pass
-
-
 def update_all(self, context):
     current_scope_type: ScopeType = current_scope()
     current_scope_type.update_all()
@@ -209,21 +293,15 @@ class SAMKPropertyGroup(PropertyGroup):
     spec: StringProperty(
         name='Spec name',
         description='Spec name for setup.',
-        update=update_all
-    )
-
-    extracted_spec_candidates: CollectionProperty(
-        type=ExtractedSpecCandidate
+        update=update_all,
+        **candidate_search(Props.SPEC)
     )
 
     source: StringProperty(
         name='Source item name',
         description='Source item name.',
-        update=update_all
-    )
-
-    extracted_source_candidates: CollectionProperty(
-        type=ExtractedSourceCandidate
+        update=update_all,
+        **candidate_search(Props.SRC)
     )
 
     @classmethod
@@ -253,10 +331,8 @@ class SAMKPropertyGroupWithDestination(SAMKPropertyGroup):
     destination: StringProperty(
         name='Destination item name',
         description='Destination item name.',
-        update=update_all
-    )
-    extracted_destination_candidates: CollectionProperty(
-        type=ExtractedDestinationCandidate
+        update=update_all,
+        **candidate_search(Props.DST)
     )
 
 
@@ -288,10 +364,8 @@ class VG_NonDecimate(SAMKPropertyGroup):
     destination_mdf: StringProperty(
         name='Destination modifier name',
         description='Destination modifier name.',
-        update=update_all
-    )
-    extracted_destination_mdf_candidates: CollectionProperty(
-        type=ExtractedDestinationMDFCandidate
+        update=update_all,
+        **candidate_search(Props.DST_MDF)
     )
 
 
@@ -318,10 +392,8 @@ class VG_MergeVertexDestination(SAMKPropertyGroup):
     destination_vg: StringProperty(
         name='Destination vertex group name',
         description='Destination vertex group name.',
-        update=update_all
-    )
-    extracted_destination_vg_candidates: CollectionProperty(
-        type=ExtractedDestinationVGCandidate
+        update=update_all,
+        **candidate_search(Props.DST_VG)
     )
 
     def update_object(self, context):
@@ -330,10 +402,8 @@ class VG_MergeVertexDestination(SAMKPropertyGroup):
     destination_obj: StringProperty(
         name='Destination object name',
         description='Destination object name.',
-        update=update_all
-    )
-    extracted_destination_obj_candidates: CollectionProperty(
-        type=ExtractedDestinationOBJCandidate
+        update=update_all,
+        **candidate_search(Props.DST_OBJ)
     )
 
 
@@ -341,6 +411,16 @@ class VG_DeleteVertex(SAMKPropertyGroup):
     pass
 
 
+def _register_scope_strategies():
+    # 戦略クラスはスコープタイプ名をプレフィックスに持つ (例: Scope_VG -> VG_DeleteLoop)
+    for ScopeTypeClass in ScopeType.__subclasses__():
+        scope_type_name = ScopeTypeClass.scope_type_name() + Syntax.UNDER
+        ScopeTypeClass._strategies = tuple(Class for key, Class in globals().items() if key.startswith(scope_type_name))
+
+
+_register_scope_strategies()
+
+
 def get_commands_for_add_callback(scene, context):
     items = list()
 
@@ -402,18 +482,144 @@ class SAMKStrategies(PropertyGroup):
     )
 
 
-def all_commands(obj=None):
+# object session uid : CommandIndex
+# ポインタは削除後に別のオブジェクトで再利用されることがあるため、セッション内で一意なIDをキーにする
+_command_indices = dict()
+
+
+def clear_command_indices():
+    _command_indices.clear()
+
+
+def prune_command_indices():
+    # 削除されたオブジェクトのインデックスを破棄する
+    for key, index in tuple(_command_indices.items()):
+        if not index.is_valid():
+            del _command_indices[key]
+
+
+# 以前のバージョンでコマンドごとに保存されていた候補リストのプロパティ名
+LEGACY_CANDIDATE_PROPERTIES = (
+    'extracted_spec_candidates',
+    'extracted_source_candidates',
+    'extracted_destination_candidates',
+    'extracted_destination_mdf_candidates',
+    'extracted_destination_vg_candidates',
+    'extracted_destination_obj_candidates',
+)
+
+
+def strip_legacy_candidates():
+    num_stripped = 0
+    for obj in bpy.data.objects:
+        for property_name in CommandIndex.property_names():
+            for command in getattr(obj.samk_strategies, property_name):
+                for legacy_property_name in LEGACY_CANDIDATE_PROPERTIES:
+                    if command.get(legacy_property_name) is not None:
+                        del command[legacy_property_name]
+                        num_stripped += 1
+    return num_stripped
+
+
+@persistent
+def migrate_legacy_candidates(dummy):
+    num_stripped = strip_legacy_candidates()
+    if num_stripped > 0:
+        print(f'WM Setup Tools: Removed {num_stripped} persisted candidate lists')
+
+
+class CommandIndex:
+    # グローバルインデックス -> (コマンドのCollectionProperty名, ローカルインデックス, 作成時のコマンド番号)
+    def __init__(self, obj) -> None:
+        self._obj = obj
+        self._entries = list()
+        self.rebuild()
+
+    @staticmethod
+    def property_names():
+        return tuple(Strategy.__name__.lower() for ScopeTypeClass in ScopeType.__subclasses__() for Strategy in ScopeTypeClass._strategies)
+
+    def _commands_of(self, property_name):
+        return getattr(self._obj.samk_strategies, property_name)
+
+    def rebuild(self):
+        entries = list()
+        for property_name in self.property_names():
+            for index_local, command in enumerate(self._commands_of(property_name)):
+                entries.append((command.index, property_name, index_local))
+        entries.sort(key=lambda entry: entry[0])
+        self._entries = [(property_name, index_local, command_number) for command_number, property_name, index_local in entries]
+
+    def is_valid(self, obj=None):
+        # 保持しているオブジェクトが削除されていないか、指定されたオブジェクトと同じかを確かめる
+        try:
+            session_uid = self._obj.session_uid
+        except ReferenceError:
+            return False
+        return obj is None or session_uid == obj.session_uid
+
+    def is_stale(self):
+        if len(self._entries) != sum(len(self._commands_of(property_name)) for property_name in self.property_names()):
+            return True
+        # コマンド数が変わらない並べ替えや編集も、コマンド番号の変化で検出する
+        try:
+            return any(self._commands_of(property_name)[index_local].index != command_number for property_name, index_local, command_number in self._entries)
+        except IndexError:
+            return True
+
+    def __len__(self):
+        return len(self._entries)
+
+    def command(self, index):
+        property_name, index_local, _ = self._entries[index]
+        return self._commands_of(property_name)[index_local]
+
+    def commands(self):
+        return tuple(self.command(index) for index in range(len(self._entries)))
+
+    def add(self, property_name):
+        commands = self._commands_of(property_name)
+        command = commands.add()
+        command.index = len(self._entries)
+        self._entries.append((property_name, len(commands) - 1, command.index))
+        return command
+
+    def remove(self, index):
+        property_name_removed, index_local_removed, _ = self._entries.pop(index)
+        self._commands_of(property_name_removed).remove(index_local_removed)
+
+        for index_global, (property_name, index_local, command_number) in enumerate(self._entries):
+            if property_name == property_name_removed and index_local > index_local_removed:
+                self._entries[index_global] = (property_name, index_local - 1, command_number)
+
+        # 削除したコマンドより後ろのコマンドだけ番号を振り直す
+        for index_global in range(index, len(self._entries)):
+            self.command(index_global).index = index_global
+            property_name, index_local, _ = self._entries[index_global]
+            self._entries[index_global] = (property_name, index_local, index_global)
+
+
+def command_index(obj=None) -> CommandIndex:
     if obj is None:
         obj = bpy.context.active_object
-    commands = list()
-    for ScopeTypeClass in ScopeType.__subclasses__():
-        commands.extend(ScopeTypeClass(obj).this_type_commands())
-    return sort_by_index(commands)
+    key = obj.session_uid
+    try:
+        index = _command_indices[key]
+    except KeyError:
+        index = CommandIndex(obj)
+        _command_indices[key] = index
+        return index
+    if not index.is_valid(obj):
+        index = CommandIndex(obj)
+        _command_indices[key] = index
+        return index
+    if index.is_stale():
+        index.rebuild()
+    return index
 
 
-def renumber():
-    for idx, command in enumerate(all_commands()):
-        command.index = idx
+def all_commands(obj=None):
+    return command_index(obj).commands()
 
 
 class SAMK_OT_AddCommand(Operator):
@@ -423,15 +629,11 @@ class SAMK_OT_AddCommand(Operator):
     def execute(self, context: bpy.context):
         command_next_name = context.scene.samk.command_for_add.strategy
         command_for_add = command_next_name.lower()
-        commands = eval(f'context.active_object.samk_strategies.{command_for_add}')
-        next_index = len(all_commands())
-        command_next = commands.add()
-        command_next.index = next_index
+        command_next = command_index(context.active_object).add(command_for_add)
         command_next.name = command_next_name.split(Syntax.UNDER)[1]
 
-        renumber()
-
-        update_all(None, None)
+        # 新規コマンドはspecが空なので他のコマンドの候補には影響しない
+        command_next.update(None)
 
         return {'FINISHED'}
 
@@ -451,27 +653,24 @@ class SAMK_OT_RemoveCommand(Operator):
         return True
 
     def execute(self, context):
-        current_scope_type: ScopeType = current_scope()
-        for strategy in current_scope_type.this_type_strategies():
-            commands = strategy.commands()
-            for index_local, command in enumerate(commands):
-                if command.index == self.index:
-                    commands.remove(index_local)
+        index = command_index(context.active_object)
+        if not 0 <= self.index < len(index):
+            return {'CANCELLED'}
 
-        renumber()
+        spec_removed = index.command(self.index).spec
+        index.remove(self.index)
 
-        update_all(None, None)
+        # 同じspecを持つコマンドの候補のみ、削除したコマンドのブラックリストの影響を受ける
+        if spec_removed != '':
+            current_scope_type: ScopeType = current_scope()
+            for command in current_scope_type.this_type_commands():
+                if command.spec == spec_removed:
+                    command.update(None)
 
         return {'FINISHED'}
 
 
 classes = [
-    ExtractedSourceCandidate,
-    ExtractedDestinationCandidate,
-    ExtractedDestinationMDFCandidate,
-    ExtractedDestinationVGCandidate,
-    ExtractedDestinationOBJCandidate,
-    ExtractedSpecCandidate,
     SK_ApplySingle,
     MDF_Undivision,
     MDF_Delete,
@@ -25,6 +25,8 @@ from bpy.props import BoolProperty, StringProperty
 
 from .. import debug
 
+from ..cache import draw_cached
+
 from ..setting.setting_check import check_data
 
 from ..syntax import Icon, Props, SAMKStructureError, SAMKSyntaxError, Syntax, SYS_SPECS, ALL_SYS_SPECS, SELECTABLE_SYS_SPECS
@@ -35,7 +37,7 @@ import logging
 
 from ..setup import setup_collection as sucoll
 
-from ..setting.setting_command import SAMK_OT_AddCommand, SAMK_OT_RemoveCommand, ScopeType, current_scope
+from ..setting.setting_command import SAMK_OT_AddCommand, SAMK_OT_RemoveCommand, ScopeType, candidate_names, current_scope
 
 
 logger = logging.getLogger(f'{Syntax.TOOLNAME}')
@@ -101,6 +103,23 @@ class SAMKSpecUserDef(PropertyGroup):
     )
 
 
+class SAMKSpecVariant(PropertyGroup):
+    # ビルドマトリクスの1バリアント。追加時のスペックの有効状態を保持する
+    name: StringProperty(
+        name='Variant name',
+        description='Variant name added to release object names.',
+        default=''
+    )
+
+    specs: bpy.props.CollectionProperty(
+        type=SAMKSpec
+    )
+
+    @property
+    def enabled_spec_names(self):
+        return tuple(spec.name for spec in self.specs if spec.is_enabled)
+
+
 class SAMK_UL_SpecList(UIList):
     def draw_item(self, context: bpy.context, layout, data, item, icon, active_data,
                   active_propname, index):
@@ -118,6 +137,18 @@ class SAMK_UL_SpecList(UIList):
         remove_op.index_delete = index
 
 
+class SAMK_UL_SpecVariantList(UIList):
+    def draw_item(self, context: bpy.context, layout, data, item, icon, active_data,
+                  active_propname, index):
+
+        row = layout.row()
+
+        row.label(text=item.name, icon=Icon.SPEC)
+        row.label(text=', '.join(item.enabled_spec_names))
+        remove_op = row.operator(SAMK_OT_RemoveSpecVariant.bl_idname, text='', icon='TRASH')
+        remove_op.index_delete = index
+
+
 class SAMK_OT_AddSpec(Operator):
     bl_idname = 'samk.add_spec'
     bl_label = 'Add new spec'
@@ -193,6 +224,72 @@ class SAMK_OT_RemoveSpec(Operator):
         return {'FINISHED'}
 
 
+class SAMK_OT_AddSpecVariant(Operator):
+    bl_idname = 'samk.add_spec_variant'
+    bl_label = 'Add spec variant'
+    bl_description = 'Add the current spec selection as a variant of the build matrix'
+
+    @debug.debug_execute(logger)
+    def execute(self, context):
+        scene = context.scene
+        if self.is_already_exist_variant(context):
+            return {'FINISHED'}
+        if self.is_invalid_variant_name(context):
+            return {'FINISHED'}
+        new_variant = scene.samk.spec_variants.add()
+        new_variant.name = scene.samk.new_variant_name
+        for spec_userdef in scene.samk.specs_userdef:
+            new_spec = new_variant.specs.add()
+            new_spec.name = spec_userdef.name
+            new_spec.is_enabled = spec_userdef.is_enabled
+
+        return {'FINISHED'}
+
+    @debug.debug_invoke(logger)
+    def invoke(self, context, event):
+        scene = context.scene
+        scene.samk.new_variant_name = ''
+
+        wm = context.window_manager
+        return wm.invoke_props_dialog(self, width=800)
+
+    def draw(self, context: bpy.context):
+        scene = context.scene
+        layout = self.layout
+        column = layout.column()
+
+        column.prop(scene.samk, 'new_variant_name')
+        column.label(text=f'Enabled specs: {", ".join(spec.name for spec in scene.samk.specs_userdef if spec.is_enabled)}')
+
+        column.alert = True
+        if self.is_already_exist_variant(context):
+            column.label(text='Typed variant name is already exist.')
+        if self.is_invalid_variant_name(context):
+            column.label(text=f'Typed variant name is empty or contains \'{Syntax.UNDER}\'.')
+
+    def is_already_exist_variant(self, context):
+        scene = context.scene
+        return scene.samk.new_variant_name in [variant.name for variant in scene.samk.spec_variants]
+
+    def is_invalid_variant_name(self, context):
+        # バリアント名はReleaseオブジェクト名に含まれるため、名前解析に使う区切り文字を許可しない
+        scene = context.scene
+        return scene.samk.new_variant_name == '' or Syntax.UNDER in scene.samk.new_variant_name
+
+
+class SAMK_OT_RemoveSpecVariant(Operator):
+    bl_idname = 'samk.remove_spec_variant'
+    bl_label = 'Delete spec variant'
+
+    index_delete: bpy.props.IntProperty(default=0)
+
+    @debug.debug_execute(logger)
+    def execute(self, context: bpy.context):
+        context.scene.samk.spec_variants.remove(self.index_delete)
+
+        return {'FINISHED'}
+
+
 class SAMK_OT_LoadSpecs(Operator):
     bl_idname = 'samk.load_specs'
     bl_label = 'Load specs from objects'
@@ -248,7 +345,11 @@ def exclude_source_collections(is_exclude: bool = False):
         collection.exclude(is_exclude)
 
 
-def scoped_collection_candidates(self, context: bpy.context):
+def source_object_pointers():
+    return draw_cached(('source_object_pointers', ), lambda: frozenset(obj.as_pointer() for collection in source_collections() for obj in collection.real_source_objects))
+
+
+def _scoped_collection_candidates():
     collection_candidates = list()
     for collection in source_collections():
         if len(collection.source_objects):
@@ -257,9 +358,13 @@ def scoped_collection_candidates(self, context: bpy.context):
     return collection_candidates
 
 
-def scoped_object_candidates(self, context: bpy.context):
+def scoped_collection_candidates(self, context: bpy.context):
+    # キャッシュしたリストを返すことで、列挙アイテムの文字列への参照も保持される
+    return draw_cached(('scoped_collection_candidates', ), _scoped_collection_candidates)
+
+
+def _scoped_object_candidates(scoped_collection_name):
     object_candidates = list()
-    scoped_collection_name = context.scene.samk.scoped_collection
     try:
         scoped_real_collection = bpy.data.collections[scoped_collection_name]
     except KeyError:
@@ -273,6 +378,11 @@ def scoped_object_candidates(self, context: bpy.context):
     return object_candidates
 
 
+def scoped_object_candidates(self, context: bpy.context):
+    scoped_collection_name = context.scene.samk.scoped_collection
+    return draw_cached(('scoped_object_candidates', scoped_collection_name), lambda: _scoped_object_candidates(scoped_collection_name))
+
+
 def update_active_object(self, context):
     object_to_active = bpy.data.objects[context.scene.samk.scoped_object]
     set_active_only(object_to_active)
@@ -289,16 +399,10 @@ class SAMK_OT_SetupOutliner(bpy.types.Operator):
     @classmethod
     def poll(cls, context: bpy.context):
         active_obj = context.active_object
-
-        collections = source_collections()
-
-        if len(collections) == 0:
+        if active_obj is None:
             return False
 
-        for collection in collections:
-            if active_obj in collection.real_source_objects:
-                return True
-        return False
+        return active_obj.as_pointer() in source_object_pointers()
 
     @debug.debug_execute(logger)
     def execute(self, context):
@@ -456,23 +560,23 @@ class LayoutProperty:
     def put(layout: bpy.types.UILayout, scope_type, scene, num_properties):
         scope_type_icon = scope_type.icon_data()
 
-        # property name : candidates, icon, position
+        # property name : icon, position
         properties_alignment_order = {
-            Props.SRC: ('extracted_source_candidates', scope_type_icon, 0),
-            Props.DST_MDF: ('extracted_destination_mdf_candidates', Icon.MDF, 1),
-            Props.DST_OBJ: ('extracted_destination_obj_candidates', Icon.OBJ, 1),
-            Props.DST_VG: ('extracted_destination_vg_candidates', Icon.VG, 2),
-            Props.DST: ('extracted_destination_candidates', scope_type_icon, 1),
-            Props.MERGE_DIST: ('merge_distance', Icon.OPT, 1),
-            Props.SPEC: ('extracted_spec_candidates', Icon.SPEC, 3),
+            Props.SRC: (scope_type_icon, 0),
+            Props.DST_MDF: (Icon.MDF, 1),
+            Props.DST_OBJ: (Icon.OBJ, 1),
+            Props.DST_VG: (Icon.VG, 2),
+            Props.DST: (scope_type_icon, 1),
+            Props.MERGE_DIST: (Icon.OPT, 1),
+            Props.SPEC: (Icon.SPEC, 3),
         }
 
         for position in range(num_properties):
 
             extracted_properties_by_now_position = dict()
-            for property_name, (candidates_name, icon_name, position_setting) in properties_alignment_order.items():
+            for property_name, (icon_name, position_setting) in properties_alignment_order.items():
                 if position == position_setting:
-                    extracted_properties_by_now_position[property_name] = (candidates_name, icon_name)
+                    extracted_properties_by_now_position[property_name] = icon_name
 
             split = layout.split()
             column = split.column()
@@ -484,20 +588,20 @@ class LayoutProperty:
                     column.label(text='')
                     continue
 
-                for property_name, (candidates_name, icon_name) in extracted_properties_by_now_position.items():
+                for property_name, icon_name in extracted_properties_by_now_position.items():
                     if property_name == Props.MERGE_DIST and property_name in dir(command):
                         column.prop(command, property_name, text='Merge distance', icon=icon_name)
                         break
                     if property_name in dir(command):
                         prop = getattr(command, property_name)
-                        candidates = getattr(command, candidates_name)
-                        is_exist_property = prop in [candidate.name for candidate in candidates]
-                                
+                        # 候補は実行時のキャッシュから取得する(検索ポップアップはプロパティの検索コールバックが生成する)
+                        is_exist_property = prop in candidate_names(command, property_name)
+
                         row = column.row()
                         row.alert = not is_exist_property
                         if not is_exist_property:
                             row.label(icon=Icon.GHOST)
-                        row.prop_search(command, property_name, command, candidates_name, text='', icon=icon_name)
+                        row.prop(command, property_name, text='', icon=icon_name)
                         break
 
 
@@ -557,10 +661,14 @@ class SAMK_OT_CheckData(bpy.types.Operator):
 classes = [
     SAMK_OT_AddSpec,
     SAMK_OT_RemoveSpec,
+    SAMK_OT_AddSpecVariant,
+    SAMK_OT_RemoveSpecVariant,
     SAMK_OT_LoadSpecs,
     SAMK_OT_SetupOutliner,
     SAMK_OT_CheckData,
     SAMKSpec,
     SAMKSpecUserDef,
+    SAMKSpecVariant,
     SAMK_UL_SpecList,
+    SAMK_UL_SpecVariantList,
 ]
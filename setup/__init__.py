@@ -18,15 +18,21 @@
 if 'bpy' in locals():
     import imp
     imp.reload(setup_apply)
+    imp.reload(setup_checkpoint)
     imp.reload(setup_collection)
     imp.reload(setup_execute)
+    imp.reload(setup_library)
     imp.reload(setup_objects)
+    imp.reload(setup_plan)
     imp.reload(setup_queue)
     imp.reload(setup_strategy)
 else:
     from . import setup_apply
+    from . import setup_checkpoint
     from . import setup_collection
     from . import setup_execute
+    from . import setup_library
     from . import setup_objects
+    from . import setup_plan
     from . import setup_queue
     from . import setup_strategy
@@ -17,7 +17,9 @@
 
 import bpy
 
-from ..function import clear_shape_keys, clone_object, delete_object, get_active_object, select_object, set_active_object, update_progress
+from array import array
+
+from ..function import clear_shape_keys, clone_object, get_active_object, object_context, remove_object, run_steps, update_progress
 
 import logging
 
@@ -27,22 +29,153 @@ from ..syntax import SAMKStructureError, Syntax
 logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
 
 
+# 頂点位置に対して線形で、形状によってトポロジーが変わらないモディファイア
+LINEAR_MODIFIER_TYPES = {'SUBSURF', 'MIRROR'}
+
+
+def _vertex_coordinates(vertices):
+    co = array('f', [0.0]) * (len(vertices) * 3)
+    vertices.foreach_get('co', co)
+    return co
+
+
+def is_linear_modifiers(obj, target_modifiers):
+    # 対象モディファイアが全て線形で、スタック順に並んでいる場合のみ高速化する
+    stack_names = [mdf.name for mdf in obj.modifiers if mdf.name in target_modifiers]
+    if stack_names != list(target_modifiers):
+        return False
+    return all(obj.modifiers[name].type in LINEAR_MODIFIER_TYPES for name in target_modifiers)
+
+
+def transfer_linear_shape_keys_steps(obj_src, obj_fin, target_modifiers, tmpcoll=None):
+    # シェイプキーごとにオブジェクトを複製してモディファイアを適用する代わりに、
+    # 1つの作業用オブジェクトの頂点座標を書き換えて評価し、結果の座標をシェイプキーに書き込む
+    # 基準キーと同じ座標のキーは、線形なので評価せずに基準キーの結果を使う
+    key_blocks = obj_src.data.shape_keys.key_blocks
+    num_keys = len(key_blocks)
+
+    obj_probe = clone_object(obj_src)
+    if tmpcoll is not None:
+        bpy.context.scene.collection.objects.unlink(obj_probe)
+        tmpcoll.objects.link(obj_probe)
+    clear_shape_keys('Basis', obj_probe)
+    for mdf in tuple(obj_probe.modifiers):
+        if mdf.name not in target_modifiers:
+            obj_probe.modifiers.remove(mdf)
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+
+    def evaluate(co):
+        obj_probe.data.vertices.foreach_set('co', co)
+        obj_probe.data.update()
+        depsgraph.update()
+        obj_eval = obj_probe.evaluated_get(depsgraph)
+        mesh_eval = obj_eval.to_mesh()
+        co_eval = _vertex_coordinates(mesh_eval.vertices)
+        obj_eval.to_mesh_clear()
+        return co_eval
+
+    basis_co = _vertex_coordinates(key_blocks[0].data)
+    basis_co_fin = _vertex_coordinates(obj_fin.data.vertices)
+    basis_co_eval = evaluate(basis_co)
+    # 評価結果がモディファイア適用結果と一致しない場合は、通常の処理に任せる
+    if len(basis_co_eval) != len(basis_co_fin) or any(abs(a - b) > 1e-4 for a, b in zip(basis_co_eval, basis_co_fin)):
+        logger.info('Linear fast path is not available : %s', obj_src.name)
+        remove_object(obj_probe)
+        return False
+
+    if obj_fin.data.shape_keys is None:
+        obj_fin.shape_key_add(name='Basis', from_mix=False)
+
+    num_skipped = 0
+    for i in range(1, num_keys):
+        key_block = key_blocks[i]
+        key_co = _vertex_coordinates(key_block.data)
+        if key_co == basis_co:
+            co_fin = basis_co_fin
+            num_skipped += 1
+        else:
+            co_fin = evaluate(key_co)
+            if len(co_fin) != len(basis_co_fin):
+                remove_object(obj_probe)
+                raise SAMKStructureError(f'The number of vertices does not match. Skipped keys : {[key_block.name]}')
+        new_key = obj_fin.shape_key_add(name=key_block.name, from_mix=False)
+        new_key.data.foreach_set('co', co_fin)
+
+        update_progress('Object \'' + obj_src.name + '\' Apply', i / num_keys)
+        yield i / num_keys
+        logger.info('Object \'%s\' / Mesh\'%s\' Apply : %s / %s', obj_src.name, obj_src.data.name, i, num_keys)
+
+    logger.info('Skipped zero-delta keys : %s', num_skipped)
+    remove_object(obj_probe)
+    return True
+
+
+def transfer_shape_keys_steps(obj_src, obj_fin, target_modifiers, tmpcoll=None):
+    list_skipped = []
+
+    for i in range(1, len(obj_src.data.shape_keys.key_blocks)):
+        tmp_name = obj_src.data.shape_keys.key_blocks[i].name
+        obj_tmp = clone_object(obj_src)
+
+        if tmpcoll is None:
+            pass
+        else:
+            bpy.context.scene.collection.objects.unlink(obj_tmp)
+            tmpcoll.objects.link(obj_tmp)
+
+        clear_shape_keys(tmp_name, obj_tmp)
+
+        with object_context(obj_tmp):
+            for x in target_modifiers:
+                try:
+                    bpy.ops.object.modifier_apply(modifier=x)
+                except RuntimeError:
+                    pass
+
+        # modified by SyureOjisan
+        with object_context(obj_fin, selected_objects=[obj_fin, obj_tmp]):
+            result = bpy.ops.object.join_shapes()
+        if result == {'CANCELLED'}:
+            list_skipped.append(tmp_name)
+            raise SAMKStructureError(f'The number of vertices does not match. Skipped keys : {list_skipped}')
+
+        obj_fin.data.shape_keys.key_blocks[-1].name = tmp_name
+
+        remove_object(obj_tmp)
+
+        update_progress(
+            'Object \'' + obj_src.name + '\' Apply', i / len(obj_src.data.shape_keys.key_blocks))
+        yield i / len(obj_src.data.shape_keys.key_blocks)
+        logger.info('Object \'%s\' / Mesh\'%s\' Apply : %s / %s', obj_src.name, obj_src.data.name, i, len(obj_src.data.shape_keys.key_blocks))
+
+
 # Original Author : mato.sus304
 
 
 def apply_modifier(target_object=None, target_modifiers=None, tmpcoll=None):
+    return run_steps(apply_modifier_steps(target_object, target_modifiers, tmpcoll))
+
+
+def apply_modifier_steps(target_object=None, target_modifiers=None, tmpcoll=None):
     if target_object is None:
         obj_src = get_active_object()
     else:
         obj_src = target_object
-        set_active_object(obj_src)  # added by SyureOjisan
+
+    # vertex counts before applying and after each target modifier (added by SyureOjisan)
+    vertex_counts = [len(obj_src.data.vertices)]
 
     if not obj_src.modifiers:
-        logger.info(f'no modifier')
-        logger.info(f'target_object(apply modifier) : {target_object}')
-        logger.info(f'obj_src(apply modifier) : {obj_src}')
+        logger.info('no modifier')
+        logger.info('target_object(apply modifier) : %s', target_object)
+        logger.info('obj_src(apply modifier) : %s', obj_src)
         # if object has no modifier then skip
-        return True
+        return tuple(vertex_counts)
+
+    if target_modifiers is not None and len(target_modifiers) == 0:
+        # nothing to apply, skip cloning per shape key (added by SyureOjisan)
+        return tuple(vertex_counts)
 
     # make single user
     if obj_src.data.users != 1:
@@ -55,10 +188,12 @@ def apply_modifier(target_object=None, target_modifiers=None, tmpcoll=None):
         for name in target_modifiers:
             try:
                 # modified by SyureOjisan
-                bpy.ops.object.modifier_apply(modifier=name)
+                with object_context(obj_src):
+                    bpy.ops.object.modifier_apply(modifier=name)
             except RuntimeError:
                 pass
-        return True
+            vertex_counts.append(len(obj_src.data.vertices))
+        return tuple(vertex_counts)
     obj_fin = clone_object(obj_src)
 
     if tmpcoll is None:
@@ -67,8 +202,7 @@ def apply_modifier(target_object=None, target_modifiers=None, tmpcoll=None):
         bpy.context.scene.collection.objects.unlink(obj_fin)
         tmpcoll.objects.link(obj_fin)
 
-    set_active_object(obj_fin)
-    clear_shape_keys('Basis')
+    clear_shape_keys('Basis', obj_fin)
 
     if target_modifiers is None:
         target_modifiers = []
@@ -78,48 +212,20 @@ def apply_modifier(target_object=None, target_modifiers=None, tmpcoll=None):
 
     for x in target_modifiers:
         try:
-            bpy.ops.object.modifier_apply(modifier=x)
+            with object_context(obj_fin):
+                bpy.ops.object.modifier_apply(modifier=x)
         except RuntimeError:
             pass
+        vertex_counts.append(len(obj_fin.data.vertices))
 
-    list_skipped = []
-
-    for i in range(1, len(obj_src.data.shape_keys.key_blocks)):
-        tmp_name = obj_src.data.shape_keys.key_blocks[i].name
-        obj_tmp = clone_object(obj_src)
-
-        if tmpcoll is None:
-            pass
-        else:
-            bpy.context.scene.collection.objects.unlink(obj_tmp)
-            tmpcoll.objects.link(obj_tmp)
-
-        set_active_object(obj_tmp)
-        clear_shape_keys(tmp_name)
-
-        for x in target_modifiers:
-            try:
-                bpy.ops.object.modifier_apply(modifier=x)
-            except RuntimeError:
-                pass
-
-        bpy.ops.object.select_all(action='DESELECT')  # added by SyureOjisan
-        select_object(obj_tmp, True)
-        set_active_object(obj_fin)
-
-        if bpy.ops.object.join_shapes() == {'CANCELLED'}:
-            list_skipped.append(tmp_name)
-            raise SAMKStructureError(f'The number of vertices does not match. Skipped keys : {list_skipped}')
-
-        obj_fin.data.shape_keys.key_blocks[-1].name = tmp_name
-
-        delete_object(obj_tmp)
-
-        update_progress(
-            'Object \'' + obj_src.name + '\' Apply', i / len(obj_src.data.shape_keys.key_blocks))
-        logger.info(f'Object \'{obj_src.name}\' / Mesh\'{obj_src.data.name}\' Apply : {i} / {len(obj_src.data.shape_keys.key_blocks)}')
+    # modified by SyureOjisan
+    is_transferred = False
+    if is_linear_modifiers(obj_src, target_modifiers):
+        is_transferred = yield from transfer_linear_shape_keys_steps(obj_src, obj_fin, target_modifiers, tmpcoll)
+    if not is_transferred:
+        yield from transfer_shape_keys_steps(obj_src, obj_fin, target_modifiers, tmpcoll)
     update_progress('Object \'' + obj_src.name + '\' Apply', 1)
-    logger.info(f'Object \'{obj_src.name}\' / Mesh\'{obj_src.data.name}\' Apply : {len(obj_src.data.shape_keys.key_blocks)} / {len(obj_src.data.shape_keys.key_blocks)}')
+    logger.info('Object \'%s\' / Mesh\'%s\' Apply : %s / %s', obj_src.name, obj_src.data.name, len(obj_src.data.shape_keys.key_blocks), len(obj_src.data.shape_keys.key_blocks))
 
     # modified by SyureOjisan
 
@@ -133,9 +239,10 @@ def apply_modifier(target_object=None, target_modifiers=None, tmpcoll=None):
     for x in target_modifiers:
         obj_src.modifiers.remove(obj_src.modifiers[x])
 
-    logger.info(f'target_object / mesh (apply modifier) : {target_object}, {target_object.data}')
-    logger.info(f'obj_fin / mesh (apply modifier) : {obj_fin}, {obj_fin.data}')
-    logger.info(f'obj_src / mesh (apply modifier) : {obj_src}, {obj_src.data}')
+    logger.info('target_object / mesh (apply modifier) : %s, %s', target_object, target_object.data)
+    logger.info('obj_fin / mesh (apply modifier) : %s, %s', obj_fin, obj_fin.data)
+    logger.info('obj_src / mesh (apply modifier) : %s, %s', obj_src, obj_src.data)
+
+    remove_object(obj_fin)
 
-    delete_object(obj_fin)
-    set_active_object(obj_src)
+    return tuple(vertex_counts)
@@ -0,0 +1,248 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+from bpy.props import StringProperty
+
+from bpy.types import PropertyGroup
+
+from array import array
+
+import hashlib
+
+import logging
+
+from ..function import hashable_value, rna_values
+
+from ..setting.setting_command import all_commands
+
+from ..syntax import Syntax
+
+
+logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
+
+
+COMMAND_VALUE_TYPES = {'BOOLEAN', 'ENUM', 'FLOAT', 'INT', 'STRING'}
+
+# 属性の型 : (foreach_getの属性名, arrayの型コード, 1要素あたりの値の数)
+# 型コードがNoneの型はバッファで受け取れないためリストで読み出す
+ATTRIBUTE_FIELDS = {
+    'FLOAT': ('value', 'f', 1),
+    'INT': ('value', 'i', 1),
+    'FLOAT_VECTOR': ('vector', 'f', 3),
+    'FLOAT2': ('vector', 'f', 2),
+    'FLOAT_COLOR': ('color', 'f', 4),
+    'BYTE_COLOR': ('color', 'f', 4),
+    'INT32_2D': ('value', 'i', 2),
+    'QUATERNION': ('value', 'f', 4),
+    'BOOLEAN': ('value', None, 1),
+    'INT8': ('value', None, 1),
+}
+
+
+class SAMKSetupCheckpoint(PropertyGroup):
+    name: StringProperty(
+        name='Collection name',
+        default=''
+    )
+    release_object_name: StringProperty(
+        name='Release object name',
+        default=''
+    )
+    fingerprint: StringProperty(
+        name='Input fingerprint',
+        default=''
+    )
+    weights_fingerprint: StringProperty(
+        name='Input deform weights fingerprint',
+        default=''
+    )
+
+
+def _command_values(command):
+    return tuple((prop.identifier, getattr(command, prop.identifier)) for prop in command.bl_rna.properties
+                 if prop.type in COMMAND_VALUE_TYPES and prop.identifier != 'rna_type')
+
+
+def _custom_property_values(data):
+    # ジオメトリノードの入力はRNAのプロパティではなくカスタムプロパティとして保持される
+    return tuple((key, hashable_value(data[key], is_persistent=True)) for key in data.keys())
+
+
+def _object_fingerprint(obj: bpy.types.Object):
+    mesh = obj.data
+    shape_keys = tuple((key.name, key.relative_key.name, key.value, key.mute, key.vertex_group) for key in mesh.shape_keys.key_blocks) if mesh.shape_keys else tuple()
+    return (
+        obj.name,
+        mesh.name,
+        len(mesh.vertices),
+        len(mesh.edges),
+        len(mesh.polygons),
+        tuple(tuple(row) for row in obj.matrix_world),
+        shape_keys,
+        tuple((mdf.name, mdf.type, rna_values(mdf, is_persistent=True), _custom_property_values(mdf)) for mdf in obj.modifiers),
+        tuple(vg.name for vg in obj.vertex_groups),
+        tuple((slot.name, slot.link) for slot in obj.material_slots),
+        tuple(uv.name for uv in mesh.uv_layers),
+        tuple((command.__class__.__name__, _command_values(command)) for command in all_commands(obj)),
+    )
+
+
+def _foreach_bytes(data, attribute, typecode, width):
+    if typecode is None:
+        values = [0] * (len(data) * width)
+        data.foreach_get(attribute, values)
+        return array('i', values).tobytes()
+    values = array(typecode, [0]) * (len(data) * width)
+    data.foreach_get(attribute, values)
+    return values.tobytes()
+
+
+def _deform_weights_bytes(mesh: bpy.types.Mesh):
+    # 頂点グループのウェイトはメッシュ全体をforeach_getで読めないため、頂点ごとの要素をまとめて読み出す
+    # 読み出し用のバッファは要素数ごとに使い回す
+    counts = array('i', [0]) * len(mesh.vertices)
+    groups = array('i')
+    weights = array('f')
+    buffers = dict()
+    for index, vert in enumerate(mesh.vertices):
+        elements = vert.groups
+        num_elements = len(elements)
+        if num_elements == 0:
+            continue
+        try:
+            group_buffer, weight_buffer = buffers[num_elements]
+        except KeyError:
+            group_buffer = array('i', [0]) * num_elements
+            weight_buffer = array('f', [0.0]) * num_elements
+            buffers[num_elements] = (group_buffer, weight_buffer)
+        elements.foreach_get('group', group_buffer)
+        elements.foreach_get('weight', weight_buffer)
+        counts[index] = num_elements
+        groups.extend(group_buffer)
+        weights.extend(weight_buffer)
+    return counts.tobytes() + groups.tobytes() + weights.tobytes()
+
+
+def _object_contents(obj: bpy.types.Object):
+    # 形状、トポロジー、UV、属性、マテリアルの割り当てなど、名前や要素数では区別できない内容
+    # 頂点グループのウェイトは読み出しが遅いため含めず、CollectionFingerprint.weightsで別にハッシュする
+    mesh = obj.data
+    yield _foreach_bytes(mesh.vertices, 'co', 'f', 3)
+    yield _foreach_bytes(mesh.edges, 'vertices', 'i', 2)
+    yield _foreach_bytes(mesh.loops, 'vertex_index', 'i', 1)
+    yield _foreach_bytes(mesh.polygons, 'material_index', 'i', 1)
+    if mesh.shape_keys:
+        for key_block in mesh.shape_keys.key_blocks:
+            yield _foreach_bytes(key_block.data, 'co', 'f', 3)
+    for uv_layer in mesh.uv_layers:
+        yield _foreach_bytes(uv_layer.data, 'uv', 'f', 2)
+    for attribute in getattr(mesh, 'attributes', tuple()):
+        try:
+            field = ATTRIBUTE_FIELDS[attribute.data_type]
+        except KeyError:
+            continue
+        yield (attribute.name + attribute.domain + attribute.data_type).encode('utf-8')
+        yield _foreach_bytes(attribute.data, *field)
+
+
+class CollectionFingerprint:
+    # セットアップ結果に影響する入力(ソースオブジェクト、子のReleaseオブジェクト、有効なスペック)の指紋
+    # keyはforeach_getで読める内容だけから作り、頂点グループのウェイトは必要になった時に一度だけハッシュする
+    # ライブラリキャッシュのキーにも使うため、セッションやファイルをまたいで同じ入力から同じ値になるようにする
+    def __init__(self, collection) -> None:
+        specs = tuple((spec.name, spec.is_enabled) for spec in bpy.context.scene.samk.specs)
+        sources = sorted(collection.real_source_objects, key=lambda obj: obj.name)
+        children = sorted((obj.real for obj in collection.child_release_objects), key=lambda obj: obj.name)
+        self._objects = sources + children
+        sha1 = hashlib.sha1(repr((
+            collection.name,
+            specs,
+            tuple(_object_fingerprint(obj) for obj in sources),
+            tuple(_object_fingerprint(obj) for obj in children),
+        )).encode('utf-8'))
+        for obj in self._objects:
+            for content in _object_contents(obj):
+                sha1.update(content)
+        self.key = sha1.hexdigest()
+        self._weights = None
+
+    @property
+    def weights(self) -> str:
+        if self._weights is None:
+            sha1 = hashlib.sha1()
+            for obj in self._objects:
+                sha1.update(_deform_weights_bytes(obj.data))
+            self._weights = sha1.hexdigest()
+        return self._weights
+
+    @property
+    def full(self) -> str:
+        return hashlib.sha1((self.key + self.weights).encode('utf-8')).hexdigest()
+
+
+class SetupCheckpoint:
+    def __init__(self, scene=None) -> None:
+        if scene is None:
+            scene = bpy.context.scene
+        self._checkpoints = scene.samk.setup_checkpoints
+
+    def _find(self, collection_name):
+        for idx, checkpoint in enumerate(self._checkpoints):
+            if checkpoint.name == collection_name:
+                return idx, checkpoint
+        return -1, None
+
+    def clear(self, collections=None):
+        if collections is None:
+            self._checkpoints.clear()
+            return
+        for collection in collections:
+            idx, _ = self._find(collection.name)
+            if idx >= 0:
+                self._checkpoints.remove(idx)
+
+    def completed_release_object(self, collection, input_fingerprint: CollectionFingerprint):
+        # チェックポイントが存在し、Releaseオブジェクトが残っていて、入力が変わっていなければ完了済みとみなす
+        # ウェイトのハッシュは、安価なキーが一致した場合だけ求める
+        _, checkpoint = self._find(collection.name)
+        if checkpoint is None:
+            return None
+        if collection.release_object.name != checkpoint.release_object_name:
+            return None
+        try:
+            release_object = bpy.data.objects[checkpoint.release_object_name]
+        except KeyError:
+            return None
+        if checkpoint.fingerprint != input_fingerprint.key or checkpoint.weights_fingerprint != input_fingerprint.weights:
+            logger.info('Checkpoint of collection \'%s\' is outdated.', collection.name)
+            return None
+        return release_object
+
+    def record(self, collection, release_obj: bpy.types.Object, input_fingerprint: CollectionFingerprint):
+        _, checkpoint = self._find(collection.name)
+        if checkpoint is None:
+            checkpoint = self._checkpoints.add()
+            checkpoint.name = collection.name
+        checkpoint.release_object_name = release_obj.name
+        checkpoint.fingerprint = input_fingerprint.key
+        checkpoint.weights_fingerprint = input_fingerprint.weights
+        logger.info('Record checkpoint : %s', collection.name)
+
+
+classes = [SAMKSetupCheckpoint, ]
@@ -19,7 +19,7 @@ import bpy
 
 from abc import ABC, abstractmethod
 
-from ..function import exclude_coll, hide_coll, root_name_in
+from ..function import VisibilityTransaction, root_name_in, run_steps, scale_steps
 
 import logging
 
@@ -51,8 +51,8 @@ class CollectionStatus(ABC):
         return setup_collection
 
     def exclude(self, is_exclude: bool):
-        exclude_coll(self._collection.name, is_exclude)
-        hide_coll(self._collection.name, is_exclude)
+        with VisibilityTransaction() as transaction:
+            transaction.exclude_and_hide(self._collection.name, is_exclude)
 
     @property
     def character_name(self):
@@ -201,15 +201,13 @@ class SetupCollection(ABC):
 
     def __init__(self, collection_status: CollectionStatus) -> None:
         super().__init__()
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         self.collection_status = collection_status
         self._collection = self.collection_status.real
         self.name = self.collection_status.name
         self._character_name = self.collection_status.character_name
         
-        logger.info(f'Collection name : {self.name}')
-
-        self.exclude(False)
+        logger.info('Collection name : %s', self.name)
 
         if type(self.collection_status.release_collection) is CollectionNotFound:
             release_collection_name = root_name_in(self._character_name) + Syntax.COL_RELEASE
@@ -217,8 +215,10 @@ class SetupCollection(ABC):
         else:
             self._release_collection = self.collection_status.release_collection
 
-        exclude_coll(self._release_collection.name, False)
-        hide_coll(self._release_collection.name, False)
+        # 自身とリリースコレクションの表示をまとめて切り替える
+        with VisibilityTransaction() as transaction:
+            transaction.exclude_and_hide(self._collection.name, False)
+            transaction.exclude_and_hide(self._release_collection.name, False)
 
         if type(self.collection_status.release_object) is suobj.ObjectNotFound:
             self.release_object = self.collection_status.release_object
@@ -226,28 +226,32 @@ class SetupCollection(ABC):
             self.release_object = self.ReleaseObjectClass(self.collection_status.release_object.real)
 
     def exclude(self, is_exclude: bool):
-        exclude_coll(self._collection.name, is_exclude)
-        hide_coll(self._collection.name, is_exclude)
+        with VisibilityTransaction() as transaction:
+            transaction.exclude_and_hide(self._collection.name, is_exclude)
+
+    def setup(self, shared_results=None):
+        return run_steps(self.setup_steps(shared_results))
 
-    def setup(self):
-        logger.info(f'Start setup collection : {self.name}')
+    def setup_steps(self, shared_results=None):
+        logger.info('Start setup collection : %s', self.name)
         tmp_collection = TemporaryCollection(Syntax.COL_TMP)
 
         self.child_release_objects = tuple(suobj.ChildReleaseObject(obj.real, tmp_collection) for obj in self.collection_status.child_release_objects)
         self.source_objects = tuple(suobj.SourceObject(obj.real, tmp_collection) for obj in self.collection_status.source_objects)
 
-        self.release_object.delete()
-
         new_release_obj = suobj.NewReleaseObject()
         self.link_to_release_collection(new_release_obj)
 
-        for source_obj in self.source_objects:
-            source_obj.do_strategy()
+        num_sources = max(len(self.source_objects), 1)
+        for idx, source_obj in enumerate(self.source_objects):
+            yield from scale_steps(source_obj.do_strategy_steps(shared_results), idx / num_sources, (idx + 1) / num_sources)
             source_obj.merge_to(new_release_obj)
 
         for child_release_obj in self.child_release_objects:
             child_release_obj.merge_to(new_release_obj)
 
+        # 途中でキャンセルされても既存のReleaseオブジェクトが残るよう、削除は置き換えの直前に行う
+        self.release_object.delete()
         self.rename(new_release_obj)
         self.cleanup(new_release_obj)
 
@@ -255,7 +259,7 @@ class SetupCollection(ABC):
 
         del tmp_collection
 
-        logger.info(f'Finished setup collection : {self.name}')
+        logger.info('Finished setup collection : %s', self.name)
 
         return new_release_obj.real
 
@@ -420,14 +424,14 @@ class CollectionFactory:
 class NewCollection(ABC):
     def __init__(self, collection_name: str):
         super().__init__()
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         self._name = collection_name
         new_collection = bpy.data.collections.new(self._name)
         bpy.context.scene.collection.children.link(new_collection)
         self._collection = new_collection
 
         
-        logger.info(f'Collection name : {self.name}')
+        logger.info('Collection name : %s', self.name)
 
         self.exclude(False)
 
@@ -440,8 +444,8 @@ class NewCollection(ABC):
         return self._name
 
     def exclude(self, is_exclude: bool):
-        exclude_coll(self.name, is_exclude)
-        hide_coll(self.name, is_exclude)
+        with VisibilityTransaction() as transaction:
+            transaction.exclude_and_hide(self.name, is_exclude)
 
 
 class NewReleaseCollection(NewCollection):
@@ -450,5 +454,5 @@ class NewReleaseCollection(NewCollection):
 
 class TemporaryCollection(NewCollection):
     def __del__(self):
-        logger.info(f'Delete temporary collection name : {self.name}')
+        logger.info('Delete temporary collection name : %s', self.name)
         bpy.data.collections.remove(self._collection)
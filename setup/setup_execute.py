@@ -19,33 +19,213 @@ import bpy
 
 import logging
 
-from .setup_collection import CollectionStatus, SourceCollectionStatus, SetupCollection
+import time
 
-from ..syntax import Syntax
+from .setup_collection import CollectionStatus, SourceCollectionStatus, SubSourceCollectionStatus, SetupCollection
+
+from ..function import remove_object, run_steps, scale_steps
+
+from ..setting.setting_operators import update_specs
+
+from .setup_checkpoint import CollectionFingerprint, SetupCheckpoint
+
+from .setup_library import LibraryCache, is_enabled_library_cache
+
+from .setup_objects import ObjectNotFound, SharedSourceResults
+
+from .setup_plan import collection_cost, record_timing
+
+from ..syntax import ALL_SYS_SPECS, Syntax
 
 
 logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
 
 
 class SetupExecution:
-    def __init__(self, order: tuple[CollectionStatus]) -> bpy.types.Object:
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+    def __init__(self, order: tuple[CollectionStatus], is_resume=False, shared_results=None) -> bpy.types.Object:
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         self.order = order
+        self.is_resume = is_resume
+        self.shared_results = shared_results
+        self.library_cache = LibraryCache() if is_enabled_library_cache() else None
+        self.current_collection_name = ''
+        self.finished_objects = list()
 
     def execute(self):
+        return run_steps(self.steps())
+
+    def steps(self):
+        # 全体の進捗(0.0-1.0)を返しながらセットアップを進める。モーダル実行ではタイマーイベントごとに再開される
+        if self.shared_results is not None:
+            return (yield from self._steps(self.shared_results))
+        # 同じメッシュを使うソースオブジェクトは、コレクションをまたいで処理結果を共有する
+        shared_results = SharedSourceResults()
+        try:
+            return (yield from self._steps(shared_results))
+        finally:
+            shared_results.clear()
+
+    def _steps(self, shared_results):
         release_objects = list()
         is_exist_pure_abstract_root_collection = False
-        for collection in reversed(self.order):
-            logger.info(f'Setup collection : {collection.name}')
-            # MemberObjectからSourceObjectとChildReleaseObjectに、CollectionStatusからSetupCollectionに移行・生成。
-            setup_collection: SetupCollection = collection.migrate()
+        num_collections = max(len(self.order), 1)
+        checkpoint = SetupCheckpoint()
+        is_resuming = self.is_resume
+        if not is_resuming:
+            checkpoint.clear(self.order)
+        for idx, collection in enumerate(reversed(self.order)):
+            logger.info('Setup collection : %s', collection.name)
+            self.current_collection_name = collection.name
             if collection.is_pure_abstract_root:
+                collection.migrate()
                 is_exist_pure_abstract_root_collection = True
                 continue
-            release_obj = setup_collection.setup()
+
+            # 指紋はコレクションごとに一度だけ作り、チェックポイントの確認と記録、ライブラリキャッシュで共有する
+            input_fingerprint = CollectionFingerprint(collection)
+            # 再開時は最初の未完了コレクションまで、チェックポイントに記録されたReleaseオブジェクトをそのまま使う
+            release_obj = checkpoint.completed_release_object(collection, input_fingerprint) if is_resuming else None
+            if release_obj is not None:
+                logger.info('Skip completed collection : %s', collection.name)
+                collection.exclude(True)
+                yield (idx + 1) / num_collections
+            else:
+                is_resuming = False
+                # SubReleaseオブジェクトは、入力が同じものをライブラリキャッシュから読み込む
+                # チェックポイントの指紋は形状やウェイトまで含み、ファイルをまたいで比較できるため、そのままキーに使う
+                library_key = None
+                if self.library_cache is not None and type(collection) is SubSourceCollectionStatus:
+                    library_key = input_fingerprint.full
+                release_obj = self.library_cache.load(library_key) if library_key is not None else None
+                if release_obj is not None:
+                    logger.info('Use library cache : %s', collection.name)
+                    self.replace_release_object(collection, release_obj)
+                    yield (idx + 1) / num_collections
+                else:
+                    cost = collection_cost(collection)
+                    start_time = time.perf_counter()
+                    # MemberObjectからSourceObjectとChildReleaseObjectに、CollectionStatusからSetupCollectionに移行・生成。
+                    setup_collection: SetupCollection = collection.migrate()
+                    release_obj = yield from scale_steps(setup_collection.setup_steps(shared_results), idx / num_collections, (idx + 1) / num_collections)
+                    # 実行時間を記録し、ドライランの見積もりを補正する
+                    record_timing(cost, time.perf_counter() - start_time)
+                    if library_key is not None:
+                        self.library_cache.store(library_key, release_obj)
+                checkpoint.record(collection, release_obj, input_fingerprint)
+                self.finished_objects.append(release_obj)
             if type(collection) is SourceCollectionStatus:
                 release_objects.append(release_obj)
 
         if is_exist_pure_abstract_root_collection:
             return tuple(release_objects)
         return (release_obj, )
+
+    @staticmethod
+    def replace_release_object(collection: CollectionStatus, release_obj: bpy.types.Object):
+        old_release_object = collection.release_object
+        if type(old_release_object) is not ObjectNotFound:
+            remove_object(old_release_object.real)
+        collection.release_collection.real.objects.link(release_obj)
+        release_obj.name = collection.character_name + collection.RELEASE_OBJ_POSTFIX
+        release_obj.data.name = collection.character_name + collection.RELEASE_OBJ_POSTFIX
+        collection.exclude(True)
+
+
+class SpecMatrixExecution:
+    # スペックの組み合わせ(バリアント)ごとにセットアップし、バリアント名付きのReleaseオブジェクトを出力する
+    # バリアント間で差分のあるスペックに影響されないソースオブジェクトは、一度だけ処理して結果を共有する
+    def __init__(self, order: tuple[CollectionStatus], variants) -> None:
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
+        self.order = order
+        self.variants = tuple((variant.name, {spec.name: spec.is_enabled for spec in variant.specs}) for variant in variants)
+        self.current_variant_name = ''
+        self._execution = None
+        self.finished_objects = list()
+
+    @property
+    def current_collection_name(self):
+        if self._execution is None:
+            return ''
+        return f'{self.current_variant_name}: {self._execution.current_collection_name}'
+
+    def execute(self):
+        return run_steps(self.steps())
+
+    @staticmethod
+    def apply_spec_states(spec_states: dict):
+        for spec in bpy.context.scene.samk.specs:
+            if spec.name in ALL_SYS_SPECS:
+                continue
+            spec.is_enabled = spec_states.get(spec.name, False)
+
+    @staticmethod
+    def variant_object_name(name, variant_name):
+        # 翻訳時の名前解析が崩れないよう、バリアント名はポストフィックスの前にドットで繋ぐ
+        for postfix in (Syntax.OBJ_SUBRELEASE, Syntax.OBJ_RELEASE):
+            if name.endswith(postfix):
+                return name[:-len(postfix)] + Syntax.DOT + variant_name + postfix
+        return name + Syntax.DOT + variant_name
+
+    def rename_to_variant(self, obj: bpy.types.Object, variant_name):
+        new_name = self.variant_object_name(obj.name, variant_name)
+        try:
+            old_obj = bpy.data.objects[new_name]
+        except KeyError:
+            pass
+        else:
+            remove_object(old_obj)
+        obj.name = new_name
+        obj.data.name = new_name
+
+    def steps(self):
+        release_objects = list()
+        # 同じソースオブジェクトをバリアントごとに繰り返し処理するため、全ての処理結果を保持する
+        shared_results = SharedSourceResults(is_storing_all=True)
+        num_variants = max(len(self.variants), 1)
+        try:
+            for idx, (variant_name, spec_states) in enumerate(self.variants):
+                logger.info('Setup variant : %s', variant_name)
+                self.current_variant_name = variant_name
+                self.apply_spec_states(spec_states)
+                self._execution = SetupExecution(self.order, shared_results=shared_results)
+                variant_release_objects = yield from scale_steps(self._execution.steps(), idx / num_variants, (idx + 1) / num_variants)
+                # 次のバリアントが同名のReleaseオブジェクトを置き換えないよう、バリアントごとに名前を変えて残す
+                for obj in self._execution.finished_objects:
+                    self.rename_to_variant(obj, variant_name)
+                    self.finished_objects.append(obj)
+                release_objects.extend(variant_release_objects)
+        finally:
+            shared_results.clear()
+            update_specs(None, bpy.context)
+        return tuple(release_objects)
+
+
+class SetupRollback:
+    # セットアップ開始時点のデータブロックを記録し、中断時に途中で生成されたものを取り除く
+    def __init__(self) -> None:
+        self._objects = set(obj.as_pointer() for obj in bpy.data.objects)
+        self._collections = set(coll.as_pointer() for coll in bpy.data.collections)
+        self._meshes = set(mesh.as_pointer() for mesh in bpy.data.meshes)
+        # Strategy_MT_Replaceはマテリアルを複製するため、マテリアルも記録する
+        self._materials = set(material.as_pointer() for material in bpy.data.materials)
+
+    def rollback(self, keep_objects=tuple()):
+        keep = set(obj.as_pointer() for obj in keep_objects)
+        for obj in tuple(bpy.data.objects):
+            if obj.as_pointer() not in self._objects and obj.as_pointer() not in keep:
+                logger.info('Rollback object : %s', obj.name)
+                bpy.data.objects.remove(obj)
+        for coll in tuple(bpy.data.collections):
+            if coll.as_pointer() in self._collections:
+                continue
+            if coll.name.startswith(Syntax.COL_TMP) or (not coll.objects and not coll.children):
+                logger.info('Rollback collection : %s', coll.name)
+                bpy.data.collections.remove(coll)
+        for mesh in tuple(bpy.data.meshes):
+            if mesh.as_pointer() not in self._meshes and mesh.users == 0:
+                bpy.data.meshes.remove(mesh)
+        # 残したReleaseオブジェクトが使うマテリアルは残す
+        for material in tuple(bpy.data.materials):
+            if material.as_pointer() not in self._materials and material.users == 0:
+                logger.info('Rollback material : %s', material.name)
+                bpy.data.materials.remove(material)
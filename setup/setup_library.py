@@ -0,0 +1,191 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+import json
+
+import logging
+
+import os
+
+from ..debug import preferences
+
+from ..syntax import Syntax
+
+
+logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
+
+
+CACHE_DIRECTORY_NAME = Syntax.P_HEADER + 'library_cache'
+CACHE_EXTENSION = '.blend'
+DEFAULT_SIZE_MB = 1024
+
+# ライブラリに書き出す前に外したオブジェクト参照。読み込み時に名前で戻す
+KEY_REFERENCES = Syntax.P_HEADER + 'library_references'
+
+
+def is_enabled_library_cache():
+    return getattr(preferences(), 'is_enabled_library_cache', False)
+
+
+def cache_directory():
+    directory = getattr(preferences(), 'library_cache_directory', '')
+    if directory:
+        return bpy.path.abspath(directory)
+    return os.path.join(bpy.utils.user_resource('DATAFILES'), CACHE_DIRECTORY_NAME)
+
+
+def cache_size_limit():
+    return getattr(preferences(), 'library_cache_size_mb', DEFAULT_SIZE_MB) * 1024 * 1024
+
+
+def _cache_path(key):
+    return os.path.join(cache_directory(), key + CACHE_EXTENSION)
+
+
+def cache_entries():
+    # (パス, サイズ, 最終使用時刻) を古い順に返す
+    directory = cache_directory()
+    if not os.path.isdir(directory):
+        return tuple()
+    entries = list()
+    for file_name in os.listdir(directory):
+        if not file_name.endswith(CACHE_EXTENSION):
+            continue
+        path = os.path.join(directory, file_name)
+        stat = os.stat(path)
+        entries.append((path, stat.st_size, stat.st_mtime))
+    return tuple(sorted(entries, key=lambda entry: entry[2]))
+
+
+def evict(size_limit=None):
+    # 最終使用時刻の古いものから削除し、合計サイズを上限以下にする
+    if size_limit is None:
+        size_limit = cache_size_limit()
+    entries = cache_entries()
+    total_size = sum(size for _, size, _ in entries)
+    num_evicted = 0
+    for path, size, _ in entries:
+        if total_size <= size_limit:
+            break
+        os.remove(path)
+        total_size -= size
+        num_evicted += 1
+        logger.info('Evict library cache : %s', path)
+    return num_evicted
+
+
+def clear_library_cache():
+    return evict(0)
+
+
+def _strip_references(obj: bpy.types.Object):
+    # 親やモディファイアが参照するオブジェクトまで書き出されないよう、名前に置き換えて外す
+    references = {'parent': None, 'modifiers': dict()}
+    if obj.parent is not None:
+        references['parent'] = {
+            'name': obj.parent.name,
+            'type': obj.parent_type,
+            'bone': obj.parent_bone,
+            'inverse': [list(row) for row in obj.matrix_parent_inverse],
+        }
+        matrix_basis = obj.matrix_basis.copy()
+        obj.parent = None
+        obj.matrix_basis = matrix_basis
+    for mdf in obj.modifiers:
+        for prop in mdf.bl_rna.properties:
+            if prop.type != 'POINTER' or prop.is_readonly:
+                continue
+            value = getattr(mdf, prop.identifier)
+            if isinstance(value, bpy.types.Object):
+                references['modifiers'].setdefault(mdf.name, dict())[prop.identifier] = value.name
+                setattr(mdf, prop.identifier, None)
+    obj[KEY_REFERENCES] = json.dumps(references)
+
+
+def _restore_references(obj: bpy.types.Object):
+    try:
+        references = json.loads(obj[KEY_REFERENCES])
+    except KeyError:
+        return
+    del obj[KEY_REFERENCES]
+    parent = references['parent']
+    if parent is not None and parent['name'] in bpy.data.objects:
+        matrix_basis = obj.matrix_basis.copy()
+        obj.parent = bpy.data.objects[parent['name']]
+        obj.parent_type = parent['type']
+        obj.parent_bone = parent['bone']
+        for idx, row in enumerate(parent['inverse']):
+            obj.matrix_parent_inverse[idx] = row
+        obj.matrix_basis = matrix_basis
+    for mdf_name, props in references['modifiers'].items():
+        for prop_name, obj_name in props.items():
+            if obj_name in bpy.data.objects:
+                setattr(obj.modifiers[mdf_name], prop_name, bpy.data.objects[obj_name])
+
+
+def _remap_materials(obj: bpy.types.Object, material_names):
+    # 追加読み込みで複製されたマテリアルを、現在のファイルにある同名のマテリアルに置き換える
+    for slot, material_name in zip(obj.material_slots, material_names):
+        appended = slot.material
+        existing = bpy.data.materials.get(material_name)
+        if appended is None or existing is None or appended == existing:
+            continue
+        slot.material = existing
+        if appended.users == 0:
+            bpy.data.materials.remove(appended)
+
+
+class LibraryCache:
+    # 組み立て済みのSubReleaseオブジェクトを、入力の指紋をキーにして別の.blendファイルに保存する
+    # ファイルの更新時刻を最終使用時刻として使い、サイズ上限を超えたら古いものから削除する
+    def load(self, key):
+        path = _cache_path(key)
+        if not os.path.isfile(path):
+            return None
+        with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+            data_to.objects = list(data_from.objects)
+        if not data_to.objects or data_to.objects[0] is None:
+            logger.info('Library cache has no object : %s', path)
+            return None
+        obj = data_to.objects[0]
+        obj.use_fake_user = False
+        obj.data.use_fake_user = False
+        material_names = json.loads(obj.get(KEY_REFERENCES, '{}')).get('materials', list())
+        _restore_references(obj)
+        _remap_materials(obj, material_names)
+        os.utime(path)
+        logger.info('Load library cache : %s', path)
+        return obj
+
+    def store(self, key, obj: bpy.types.Object):
+        directory = cache_directory()
+        os.makedirs(directory, exist_ok=True)
+        copy_obj = obj.copy()
+        copy_obj.data = obj.data.copy()
+        _strip_references(copy_obj)
+        references = json.loads(copy_obj[KEY_REFERENCES])
+        references['materials'] = [slot.material.name if slot.material else '' for slot in obj.material_slots]
+        copy_obj[KEY_REFERENCES] = json.dumps(references)
+        path = _cache_path(key)
+        bpy.data.libraries.write(path, {copy_obj}, fake_user=True, compress=True)
+        mesh = copy_obj.data
+        bpy.data.objects.remove(copy_obj)
+        bpy.data.meshes.remove(mesh)
+        logger.info('Store library cache : %s', path)
+        evict()
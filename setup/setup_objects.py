@@ -21,7 +21,7 @@ from abc import ABC
 
 from . import setup_collection as sucoll
 
-from ..function import copy_nonlink, create_new_mesh_obj, delete_object, select_object, set_active_object, set_active_only
+from ..function import compact_shape_keys_by_scene_setting, consolidate_material_slots_by_scene_setting, copy_nonlink, create_new_mesh_obj, delete_object, hashable_value, remove_object, rna_values, run_steps, scale_steps, select_object, set_active_object, set_active_only
 
 import logging
 
@@ -65,36 +65,40 @@ class ObjectNotFound:
 
 class NewReleaseObject:
     def __init__(self) -> None:
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         release_obj = create_new_mesh_obj(Syntax.OBJ_RELEASE_TMP)
         self.name = release_obj.name
         self._obj = release_obj
-        logger.info(f'Object name : {self.name}')
+        logger.info('Object name : %s', self.name)
 
     @property
     def real(self) -> bpy.types.Object:
         return self._obj
 
     def cleanup(self):
-        logger.info(f'Cleanup object : {self.name}')
+        logger.info('Cleanup object : %s', self.name)
         sust.Prefix_VG_MergeVertex(self._obj).execute()
         sust.CleanupRelease_SK(self._obj).execute()
         sust.CleanupRelease_VG(self._obj).execute()
+        compact_shape_keys_by_scene_setting(self._obj)
+        consolidate_material_slots_by_scene_setting(self._obj)
 
     def rename(self, character_name, postfix):
         self._obj.name = character_name + postfix
         self._obj.data.name = character_name + postfix
-        logger.info(f'Rename object : {self.name} -> {self._obj.name}')
+        logger.info('Rename object : %s -> %s', self.name, self._obj.name)
 
 
 class SetupObject(ABC):
     def __init__(self, real_obj: bpy.types.Object, tmp_collection):
         super().__init__()
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         self.name = real_obj.name
+        self.source_mesh_pointer = real_obj.data.as_pointer()
+        self.source_mesh_users = real_obj.data.users
         self._obj = self.copy(real_obj)
         tmp_collection.real.objects.link(self._obj)
-        logger.info(f'Object name : {self.name}')
+        logger.info('Object name : %s', self.name)
 
     @property
     def real(self):
@@ -105,12 +109,18 @@ class SetupObject(ABC):
 
         return copy_obj
 
+    def prune(self):
+        # 結合は全オブジェクトのレイヤーの和集合を扱うため、最終的に残らないものを先に取り除く
+        sust.PruneBeforeJoin_SK(self._obj).execute()
+        sust.PruneBeforeJoin_VG(self._obj).execute()
+
     def merge_to(self, new_release_obj: NewReleaseObject):
         # Join function should be defined in the future.
-        logger.info(f'Merge object : {self._obj.name} -> {new_release_obj.real.name}')
+        self.prune()
+        logger.info('Merge object : %s -> %s', self._obj.name, new_release_obj.real.name)
         bpy.ops.object.select_all(action='DESELECT')
         orphan_mesh_name = self._obj.data.name
-        logger.info(f'merged mesh name : {orphan_mesh_name}')
+        logger.info('merged mesh name : %s', orphan_mesh_name)
         select_object(self._obj, True)
         select_object(new_release_obj.real, True)
         set_active_object(new_release_obj.real)
@@ -121,8 +131,8 @@ class SetupObject(ABC):
         orphan_obj = bpy.data.objects.new(orphan_mesh_name, bpy.data.meshes[orphan_mesh_name])
         tmp_collection.real.objects.link(orphan_obj)
 
-        logger.info(f'Deleted orphan object name : {orphan_obj.name}')
-        logger.info(f'Deleted orphan mesh name (must be equal to merged mesh) : {orphan_obj.data.name}')
+        logger.info('Deleted orphan object name : %s', orphan_obj.name)
+        logger.info('Deleted orphan mesh name (must be equal to merged mesh) : %s', orphan_obj.data.name)
         delete_object(orphan_obj)
         
         bpy.ops.object.select_all(action='DESELECT')
@@ -132,26 +142,101 @@ class SetupObject(ABC):
         del tmp_collection
 
 
+def _object_key(obj: bpy.types.Object):
+    # メッシュ以外で処理結果に影響するオブジェクト側の設定
+    return (
+        tuple(rna_values(mdf) for mdf in obj.modifiers),
+        tuple(vg.name for vg in obj.vertex_groups),
+        tuple((slot.link, hashable_value(slot.material)) for slot in obj.material_slots),
+    )
+
+
+class SharedSourceResults:
+    # 同じメッシュを使うソースオブジェクトや、スペックの組み合わせ違いで繰り返しセットアップするソースオブジェクトの処理結果を使い回す
+    # 処理結果はシーンにリンクしないコレクションに保持する
+    def __init__(self, is_storing_all=False) -> None:
+        # is_storing_allがFalseの場合は、他のオブジェクトとメッシュを共有するソースオブジェクトの結果だけを保持する
+        self._collection = bpy.data.collections.new(Syntax.COL_TMP_SHARED)
+        self._results = dict()
+        self._is_storing_all = is_storing_all
+
+    @staticmethod
+    def key(source_obj, plan):
+        # メッシュ、オブジェクトの設定、コマンド、コマンドが参照するスペックの有効状態が同じなら、処理結果も同じになる
+        # VG_MergeVertexSourceは頂点グループ名にオブジェクト名を書き込むため、その場合はオブジェクト名も含める
+        object_name = source_obj.name if plan.commands('vg_mergevertexsource') else None
+        return (source_obj.source_mesh_pointer, object_name, _object_key(source_obj.real), plan.commands_key(), plan.spec_state())
+
+    def should_store(self, source_obj):
+        return self._is_storing_all or source_obj.source_mesh_users > 1
+
+    def restore(self, key):
+        try:
+            result_obj = self._results[key]
+        except KeyError:
+            return None
+        logger.info('Reuse shared result : %s', result_obj.name)
+        return copy_nonlink(result_obj)
+
+    def store(self, key, obj: bpy.types.Object):
+        result_obj = copy_nonlink(obj)
+        self._collection.objects.link(result_obj)
+        self._results[key] = result_obj
+
+    def clear(self):
+        for obj in tuple(self._collection.objects):
+            remove_object(obj)
+        bpy.data.collections.remove(self._collection)
+        self._results.clear()
+
+
 class SourceObject(SetupObject):
-    def do_strategy(self):
-        logger.info(f'Do strategy object : {self.name}')
-        sust.Strategy_SK_ApplySingle(self).execute()
-        sust.Strategy_VG_DeleteLoop(self).execute()
-        sust.Strategy_MDF_Delete(self).execute()
+    def do_strategy(self, shared_results: SharedSourceResults = None):
+        run_steps(self.do_strategy_steps(shared_results))
+
+    def replace_with(self, obj: bpy.types.Object):
+        # 処理結果は別のオブジェクトから作られている場合があるため、トランスフォームは自身のものを使う
+        obj.parent = self._obj.parent
+        obj.matrix_world = self._obj.matrix_world.copy()
+        for collection in self._obj.users_collection:
+            collection.objects.link(obj)
+        remove_object(self._obj)
+        self._obj = obj
+
+    def do_strategy_steps(self, shared_results: SharedSourceResults = None):
+        # モディファイア適用が処理時間の大半を占めるため、進捗の大部分をアンディビジョンに割り当てる
+        logger.info('Do strategy object : %s', self.name)
+        # コマンドは対象オブジェクトから一度だけ読み出し、各ストラテジーに明示的に渡す
+        plan = sust.CommandPlan(self._obj)
+        if shared_results is not None:
+            key = shared_results.key(self, plan)
+            result_obj = shared_results.restore(key)
+            if result_obj is not None:
+                self.replace_with(result_obj)
+                yield 1.0
+                return
+        sust.Strategy_SK_ApplySingle(self, plan).execute()
+        sust.Strategy_VG_DeleteLoop(self, plan).execute()
+        sust.Strategy_MDF_Delete(self, plan).execute()
+        yield 0.05
 
         tmp_collection = sucoll.TemporaryCollection(Syntax.COL_TMP_STRATEGY)
-        sust.Strategy_MDF_Undivision(self, tmp_collection.real, None).execute()
-        sust.Strategy_VG_MergeVertexDestination(self).execute()
-        sust.Strategy_VG_MergeVertexSource(self).execute()
-        sust.Strategy_VG_DeleteVertex(self).execute()
+        yield from scale_steps(sust.Strategy_MDF_Undivision(self, tmp_collection.real, None, plan).execute_steps(), 0.05, 0.85)
+        sust.Strategy_VG_MergeVertexDestination(self, plan).execute()
+        sust.Strategy_VG_MergeVertexSource(self, plan).execute()
+        sust.Strategy_VG_DeleteVertex(self, plan).execute()
+        yield 0.9
 
-        sust.Strategy_UV_Select(self).execute()
-        sust.Strategy_MT_Replace(self).execute()
+        sust.Strategy_UV_Select(self, plan).execute()
+        sust.Strategy_MT_Replace(self, plan).execute()
 
         sust.CleanupPropertySource_SK(self).execute()
         sust.CleanupPropertySource_VG(self).execute()
-        
-        logger.info(f'Source object name(do_strategy) : {self._obj.name}')
+        if shared_results is not None and shared_results.should_store(self):
+            shared_results.store(key, self._obj)
+        yield 1.0
+
+        logger.info('Source object name(do_strategy) : %s', self._obj.name)
 
         del tmp_collection
 
@@ -162,17 +247,17 @@ class ChildReleaseObject(SetupObject):
 
 class DeletableObject:
     def delete(self):
-        logger.info(f'Delete object : {self.name}')
+        logger.info('Delete object : %s', self.name)
         delete_object(self._obj)
 
 
 class ReleaseObjectClass(ABC):
     def __init__(self, real_obj: bpy.types.Object):
         super().__init__()
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         self.name = real_obj.name
         self._obj = real_obj
-        logger.info(f'Object name : {self.name}')
+        logger.info('Object name : %s', self.name)
 
     @property
     def real(self):
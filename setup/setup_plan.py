@@ -0,0 +1,156 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+import logging
+
+from . import setup_collection as sucoll
+
+from .setup_strategy import CommandPlan, Strategy_VG_NonDecimate
+
+from ..syntax import Props, Syntax
+
+
+logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
+
+
+# 実測値が無い場合の 頂点数 x シェイプキー数 x モディファイア適用フェーズ数 あたりの秒数
+DEFAULT_SECONDS_PER_UNIT = 5e-6
+
+# 実測値を反映する割合
+CALIBRATION_WEIGHT = 0.3
+
+
+def seconds_per_unit():
+    rate = bpy.context.scene.samk.setup_seconds_per_unit
+    return rate if rate > 0.0 else DEFAULT_SECONDS_PER_UNIT
+
+
+def record_timing(cost, seconds):
+    # 過去の実行時間から1単位あたりの秒数を求め、見積もりに使う
+    if cost <= 0:
+        return
+    samk = bpy.context.scene.samk
+    observed = seconds / cost
+    if samk.setup_seconds_per_unit > 0.0:
+        observed = samk.setup_seconds_per_unit * (1.0 - CALIBRATION_WEIGHT) + observed * CALIBRATION_WEIGHT
+    samk.setup_seconds_per_unit = observed
+    logger.info('Calibrated seconds per unit : %s', observed)
+
+
+def object_cost(obj: bpy.types.Object, plan: CommandPlan):
+    # シェイプキーごとにモディファイアを適用するため、頂点数 x シェイプキー数 x フェーズ数 に比例する
+    if len(obj.modifiers) == 0:
+        return 0
+    num_phases = 2 if Strategy_VG_NonDecimate.is_required(obj, plan) else 1
+    num_keys = len(obj.data.shape_keys.key_blocks) if obj.data.shape_keys else 1
+    return len(obj.data.vertices) * num_keys * num_phases
+
+
+def collection_cost(collection):
+    return sum(object_cost(obj, CommandPlan(obj)) for obj in collection.real_source_objects)
+
+
+def _evaluated_vertex_count(obj_eval_source, depsgraph, key_index):
+    obj_eval_source.active_shape_key_index = key_index
+    depsgraph.update()
+    obj_eval = obj_eval_source.evaluated_get(depsgraph)
+    mesh_eval = obj_eval.to_mesh()
+    num_vertices = len(mesh_eval.vertices)
+    obj_eval.to_mesh_clear()
+    return num_vertices
+
+
+def check_topology(obj: bpy.types.Object, tmp_collection):
+    # 全キーオフと1キーオンで評価し、モディファイア適用後の頂点数が変わらないことを確認する
+    if obj.data.shape_keys is None or len(obj.modifiers) == 0:
+        return list()
+    key_blocks = obj.data.shape_keys.key_blocks
+    num_keys = len(key_blocks)
+    if num_keys <= 1:
+        return list()
+
+    # メッシュは共有したまま、評価用のオブジェクトだけを複製する
+    obj_eval_source = obj.copy()
+    tmp_collection.real.objects.link(obj_eval_source)
+    obj_eval_source.show_only_shape_key = True
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+
+    errors = list()
+    num_vertices_basis = _evaluated_vertex_count(obj_eval_source, depsgraph, 0)
+    # 先頭、中間、末尾のキーだけを確認する
+    sample_indices = sorted(set((1, num_keys // 2, num_keys - 1)))
+    for key_index in sample_indices:
+        num_vertices_key = _evaluated_vertex_count(obj_eval_source, depsgraph, key_index)
+        if num_vertices_key != num_vertices_basis:
+            errors.append(f'\'{obj.name}\': The number of vertices does not match after applying modifiers. key \'{key_blocks[key_index].name}\' : {num_vertices_key} / Basis : {num_vertices_basis}')
+
+    bpy.data.objects.remove(obj_eval_source)
+    return errors
+
+
+def check_apply_single(obj: bpy.types.Object, plan: CommandPlan):
+    errors = list()
+    commands = plan.commands('sk_applysingle')
+    if not commands:
+        return errors
+    if obj.data.shape_keys is None:
+        return [f'\'{obj.name}\': SK_ApplySingle commands exist but the object has no shape keys.']
+    key_names = set(key.name for key in obj.data.shape_keys.key_blocks)
+    if 'Basis' not in key_names:
+        errors.append(f'\'{obj.name}\': \'Basis\' shapekey not found. Don\'t change Basis key name.')
+    for source_name, command in commands.items():
+        if not plan.specs.get(command[Props.SPEC], False) or source_name not in key_names:
+            continue
+        if command[Props.DST] not in key_names:
+            errors.append(f'\'{obj.name}\': Destination shapekey \'{command[Props.DST]}\' of \'{source_name}\' not found.')
+    return errors
+
+
+class CollectionEstimate:
+    def __init__(self, name, cost, seconds, errors) -> None:
+        self.name = name
+        self.cost = cost
+        self.seconds = seconds
+        self.errors = errors
+
+
+class SetupDryRun:
+    # セットアップを実行せずに、キューの順序とコマンドから処理コストを見積もり、エラーを事前に洗い出す
+    def __init__(self, order) -> None:
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
+        self.order = order
+
+    def estimate(self) -> tuple:
+        estimates = list()
+        rate = seconds_per_unit()
+        tmp_collection = sucoll.TemporaryCollection(Syntax.COL_TMP)
+        for collection in reversed(self.order):
+            if collection.is_pure_abstract_root:
+                continue
+            errors = list()
+            cost = 0
+            for obj in collection.real_source_objects:
+                plan = CommandPlan(obj)
+                errors.extend(check_apply_single(obj, plan))
+                errors.extend(check_topology(obj, tmp_collection))
+                cost += object_cost(obj, plan)
+            estimates.append(CollectionEstimate(collection.name, cost, cost * rate, errors))
+            logger.info('Estimate collection : %s, cost : %s, seconds : %s, errors : %s', collection.name, cost, cost * rate, errors)
+        del tmp_collection
+        return tuple(estimates)
@@ -34,7 +34,7 @@ logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
 class AbstractSetupQueue(ABC):
     def __init__(self, obj: bpy.types.Object) -> None:
         super().__init__()
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         self._obj = obj
 
     def queue(self, current_collection: CollectionStatus, recursive_count: int = 0) -> list[CollectionStatus]:
@@ -88,38 +88,38 @@ class SetupQueue(AbstractSetupQueue):
         release_object = current_collection.release_object
         if type(release_object) is ObjectNotFound:
             # リリースオブジェクトがどこにも無い場合は、セットアップする。
-            logger.info(f'[{current_collection.name}] release object\'{release_object.name}\' not found in anywhere. Setup collection will be added to setup queue.')
+            logger.info('[%s] release object\'%s\' not found in anywhere. Setup collection will be added to setup queue.', current_collection.name, release_object.name)
             should_append_to_order = True
         else:
-            logger.info(f'[{current_collection.name}] release object\'{release_object.name}\' found.')
+            logger.info('[%s] release object\'%s\' found.', current_collection.name, release_object.name)
 
         if current_collection.is_exist_release_object_in_strange_place:
             # リリースオブジェクトはあるけど関係のない別のコレクションにある場合はリリースオブジェクトを消去してからセットアップし直し
-            logger.info(f'[{current_collection.name}] release object\'{release_object.name}\' exist but not in release collection\'{current_collection.release_collection.name}\'. Delete the release object and add setup collection to the setup queue.')
+            logger.info('[%s] release object\'%s\' exist but not in release collection\'%s\'. Delete the release object and add setup collection to the setup queue.', current_collection.name, release_object.name, current_collection.release_collection.name)
             should_append_to_order = True
         else:
-            logger.info(f'[{current_collection.name}] release object\'{release_object.name}\' exist in release collection\'{current_collection.release_collection.name}\'.')
+            logger.info('[%s] release object\'%s\' exist in release collection\'%s\'.', current_collection.name, release_object.name, current_collection.release_collection.name)
 
         if current_collection.should_append_queue_in_this_tree:
             # 子コレクション以下の階層のコレクションのセットアップがされていない場合(リリースオブジェクトが無い)は芋づる式に親コレクションをセットアップ
-            logger.info(f'[{current_collection.name}] Because child collections of the setup collection are not set up, collections of the same tree are also added to the setup queue.')
+            logger.info('[%s] Because child collections of the setup collection are not set up, collections of the same tree are also added to the setup queue.', current_collection.name)
             should_append_to_order = True
         else:
-            logger.info(f'[{current_collection.name}] setup of this collection tree is not required.')
+            logger.info('[%s] setup of this collection tree is not required.', current_collection.name)
 
         if (recursive_count == 0) and not current_collection.is_pure_abstract_root:
             # 選択したオブジェクトがある階層のコレクションは、ピュアアブストラクトルートコレクションである場合を除きセットアップする
-            logger.info(f'[{current_collection.name}] Setup collection with selected objects are set up unless it is a pure abstract root collection')
+            logger.info('[%s] Setup collection with selected objects are set up unless it is a pure abstract root collection', current_collection.name)
             should_append_to_order = True
         else:
-            logger.info(f'[{current_collection.name}] No setup is required for this collection as it is the second or later tier collection.')
+            logger.info('[%s] No setup is required for this collection as it is the second or later tier collection.', current_collection.name)
 
         if (not current_collection.is_root) and current_collection.parent_collection.is_pure_abstract_root:
             # 親コレクションがソースオブジェクトが無くソースコレクションしかないルートソースコレクションの場合は、セットアップする
-            logger.info(f'[{current_collection.name}] If the parent collection is a root source collection with no source objects and only source collections, set up')
+            logger.info('[%s] If the parent collection is a root source collection with no source objects and only source collections, set up', current_collection.name)
             should_append_to_order = True
         else:
-            logger.info(f'[{current_collection.name}] Parent collection is not the pure abstract root collection, so setup is skipped.')
+            logger.info('[%s] Parent collection is not the pure abstract root collection, so setup is skipped.', current_collection.name)
             
 
         return should_append_to_order
@@ -135,5 +135,5 @@ class SetupAllQueue(AbstractSetupQueue):
         return tuple(order)
 
     def setup_condition(self, current_collection: CollectionStatus, recursive_count) -> bool:
-        logger.info(f'[{current_collection.name}] Setup Collections are always set up in Setup All operator.')
+        logger.info('[%s] Setup Collections are always set up in Setup All operator.', current_collection.name)
         return True
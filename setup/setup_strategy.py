@@ -21,15 +21,19 @@ from functools import wraps
 
 import bpy
 
+import bmesh
+
+import mathutils
+
 from ..setting import setting_command
 
 from . import setup_objects
 
 import logging
 
-from .setup_apply import apply_modifier
+from .setup_apply import apply_modifier_steps
 
-from ..function import apply_single, select_vert, set_active_object, set_active_only
+from ..function import apply_single, deselect_all_elements, edit_object_context, run_steps, scale_steps, select_vert, select_vertices, vertex_group_selection
 
 from ..syntax import ALL_PROPS, Props, SAMKSyntaxError, Syntax, del_parser
 
@@ -38,13 +42,14 @@ logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
 
 
 def mesh_operator(func):
+    # 選択はデータAPIで行い、編集モードのオペレータは対象オブジェクトに限定したコンテキストで実行する
     @wraps(func)
-    def __wrapper(*args, **kwargs):
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='DESELECT')
-        func(*args, **kwargs)
-        bpy.ops.mesh.select_all(action='DESELECT')
-        bpy.ops.object.mode_set(mode='OBJECT')
+    def __wrapper(self, *args, **kwargs):
+        deselect_all_elements(self._obj.data)
+        with edit_object_context(self._obj):
+            func(self, *args, **kwargs)
+            bpy.ops.object.mode_set(mode='OBJECT')
+        deselect_all_elements(self._obj.data)
     return __wrapper
 
 
@@ -54,15 +59,117 @@ def delete_selected_edgeloop():
     bpy.ops.mesh.delete_edgeloop()
 
 
-class SetupStrategy(ABC):
+def delete_vertex_group_vertices(obj, group_index):
+    mesh = obj.data
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    deform_layer = bm.verts.layers.deform.verify()
+    verts = [vert for vert in bm.verts if group_index in vert[deform_layer].keys()]
+    bmesh.ops.delete(bm, geom=verts, context='VERTS')
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+
+
+def merge_vertex_group_pairs(obj, source_group_index, destination_group_indices, merge_distance):
+    # 移動先グループの頂点だけでKDツリーを作り、距離の近い組から1対1で溶接する
+    # 同じ側の頂点同士は結合しないため、パーツ内の重複頂点は保たれる
+    mesh = obj.data
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    deform_layer = bm.verts.layers.deform.verify()
+    destination_group_indices = set(destination_group_indices)
+    destination_verts = list()
+    source_verts = list()
+    for vert in bm.verts:
+        group_indices = vert[deform_layer].keys()
+        if destination_group_indices.intersection(group_indices):
+            destination_verts.append(vert)
+        elif source_group_index in group_indices:
+            source_verts.append(vert)
+
+    kd = mathutils.kdtree.KDTree(len(destination_verts))
+    for idx, vert in enumerate(destination_verts):
+        kd.insert(vert.co, idx)
+    kd.balance()
+
+    candidates = list()
+    for source_idx, vert in enumerate(source_verts):
+        for _, destination_idx, distance in kd.find_range(vert.co, merge_distance):
+            candidates.append((distance, source_idx, destination_idx))
+    candidates.sort()
+
+    targetmap = dict()
+    used_destinations = set()
+    for _, source_idx, destination_idx in candidates:
+        source_vert = source_verts[source_idx]
+        if source_vert in targetmap or destination_idx in used_destinations:
+            continue
+        targetmap[source_vert] = destination_verts[destination_idx]
+        used_destinations.add(destination_idx)
+
+    logger.info('Weld vertices : %d', len(targetmap))
+    if targetmap:
+        bmesh.ops.weld_verts(bm, targetmap=targetmap)
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+
+
+class CommandPlan:
+    # 対象オブジェクトのコマンドとスペックの有効状態を、アクティブオブジェクトに依存せずに保持する
     def __init__(self, obj) -> None:
+        self._strategies = obj.samk_strategies
+        self.specs = {spec.name: spec.is_enabled for spec in bpy.context.scene.samk.specs}
+        self._commands = dict()
+
+    def commands(self, command_property_name) -> dict:
+        try:
+            return self._commands[command_property_name]
+        except KeyError:
+            pass
+        commands = dict()
+        for command_source in getattr(self._strategies, command_property_name):
+            properties_for_add = dict()
+            # for property_name in ('source', 'destination', 'destination_obj', 'merge_distance', 'spec'):
+            for property_name in ALL_PROPS:
+                try:
+                    properties_for_add[property_name] = getattr(command_source, property_name)
+                except AttributeError:
+                    logger.info('property \'%s\' is not found, skipped.', property_name)
+                    continue
+                commands[command_source.source] = properties_for_add
+        self._commands[command_property_name] = commands
+        return commands
+
+    def commands_key(self) -> tuple:
+        keys = list()
+        for prop in self._strategies.bl_rna.properties:
+            if prop.type != 'COLLECTION':
+                continue
+            commands = self.commands(prop.identifier)
+            keys.append((prop.identifier, tuple(sorted((source, tuple(sorted(command.items()))) for source, command in commands.items()))))
+        return tuple(keys)
+
+    def spec_state(self) -> tuple:
+        # コマンドが参照するスペックの有効状態のみを返す。参照されないスペックを切り替えても処理結果は変わらない
+        spec_names = set()
+        for prop in self._strategies.bl_rna.properties:
+            if prop.type != 'COLLECTION':
+                continue
+            spec_names.update(command[Props.SPEC] for command in self.commands(prop.identifier).values() if Props.SPEC in command)
+        return tuple(sorted((spec_name, self.specs.get(spec_name, False)) for spec_name in spec_names))
+
+
+class SetupStrategy(ABC):
+    def __init__(self, obj, plan: CommandPlan = None) -> None:
         if type(obj) is not setup_objects.SourceObject:
             raise TypeError('')
         super().__init__()
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         self._obj = obj.real
         self._obj_name = obj.name
-        set_active_only(self._obj)
+        self.plan = plan if plan is not None else CommandPlan(self._obj)
 
     @abstractmethod
     def execute_if_processing(self, idx, element, command):
@@ -77,8 +184,8 @@ class SetupStrategy(ABC):
 
 
 class Strategy_SK_ApplySingle(SetupStrategy):
-    def __init__(self, obj) -> None:
-        super().__init__(obj)
+    def __init__(self, obj, plan: CommandPlan = None) -> None:
+        super().__init__(obj, plan)
         if self._obj.data.shape_keys:
             self._it = self._obj.data.shape_keys.key_blocks
         else:
@@ -93,15 +200,13 @@ class Strategy_SK_ApplySingle(SetupStrategy):
 
 
 class Strategy_VG_DeleteLoop(SetupStrategy):
-    def __init__(self, obj) -> None:
-        super().__init__(obj)
+    def __init__(self, obj, plan: CommandPlan = None) -> None:
+        super().__init__(obj, plan)
         self._it = self._obj.vertex_groups
 
     @mesh_operator
     def execute_if_processing(self, idx, element: bpy.types.VertexGroup, command):
-        self._obj.vertex_groups.active_index = idx
-        bpy.ops.object.vertex_group_select()
-
+        select_vertices(self._obj.data, vertex_group_selection(self._obj, element.index))
         delete_selected_edgeloop()
 
     def execute_if_not_processing(self, idx, element, command):
@@ -109,24 +214,31 @@ class Strategy_VG_DeleteLoop(SetupStrategy):
 
 
 class Strategy_MDF_Delete(SetupStrategy):
-    def __init__(self, obj) -> None:
-        super().__init__(obj)
+    def __init__(self, obj, plan: CommandPlan = None) -> None:
+        super().__init__(obj, plan)
         self._it = self._obj.modifiers
+        self._elements_to_remove = list()
 
     def execute_if_processing(self, idx, element, command):
-        bpy.ops.object.modifier_remove(modifier=element.name)
-        bpy.ops.object.select_all(action='DESELECT')
+        self._elements_to_remove.append(element.name)
 
     def execute_if_not_processing(self, idx, element, command):
         pass
 
+    def execute(self):
+        super().execute()
+
+        # 走査中のコレクションを変更しないよう、削除は走査後にまとめて行う
+        for element_name in self._elements_to_remove:
+            self._it.remove(self._it[element_name])
+
 
 class Strategy_UV_Select(SetupStrategy):
     _elements_to_remove: list[bpy.types.MeshUVLoopLayer] = list()
     _is_processed_once: bool = False
 
-    def __init__(self, obj) -> None:
-        super().__init__(obj)
+    def __init__(self, obj, plan: CommandPlan = None) -> None:
+        super().__init__(obj, plan)
         self._it = self._obj.data.uv_layers
 
     def execute_if_processing(self, idx, element, command):
@@ -145,13 +257,11 @@ class Strategy_UV_Select(SetupStrategy):
         for element in reversed(self._elements_to_remove):
             if len(self._it) > 1:
                 self._it.remove(element)
-        set_active_object(self._obj)
-        bpy.ops.object.select_all(action='DESELECT')
 
 
 class Strategy_MT_Replace(SetupStrategy):
-    def __init__(self, obj) -> None:
-        super().__init__(obj)
+    def __init__(self, obj, plan: CommandPlan = None) -> None:
+        super().__init__(obj, plan)
         self._it = self._obj.material_slots
 
     def execute_if_processing(self, idx, element: bpy.types.MaterialSlot, command):
@@ -170,8 +280,8 @@ class Strategy_MT_Replace(SetupStrategy):
 
 
 class Strategy_VG_MergeVertexSource(SetupStrategy):
-    def __init__(self, obj) -> None:
-        super().__init__(obj)
+    def __init__(self, obj, plan: CommandPlan = None) -> None:
+        super().__init__(obj, plan)
         self._it = self._obj.vertex_groups
 
     def execute_if_processing(self, idx, element: bpy.types.VertexGroup, command):
@@ -186,8 +296,8 @@ class Strategy_VG_MergeVertexSource(SetupStrategy):
 
 
 class Strategy_VG_MergeVertexDestination(SetupStrategy):
-    def __init__(self, obj) -> None:
-        super().__init__(obj)
+    def __init__(self, obj, plan: CommandPlan = None) -> None:
+        super().__init__(obj, plan)
         self._it = self._obj.vertex_groups
 
     def execute_if_processing(self, idx, element, command):
@@ -198,29 +308,26 @@ class Strategy_VG_MergeVertexDestination(SetupStrategy):
 
 
 class Strategy_VG_DeleteVertex(SetupStrategy):
-    def __init__(self, obj) -> None:
-        super().__init__(obj)
+    def __init__(self, obj, plan: CommandPlan = None) -> None:
+        super().__init__(obj, plan)
         self._it = self._obj.vertex_groups
 
-    @mesh_operator
     def execute_if_processing(self, idx, element, command):
-        self._obj.vertex_groups.active_index = element.index
-        bpy.ops.object.vertex_group_select()
-        bpy.ops.mesh.delete(type='VERT')
+        delete_vertex_group_vertices(self._obj, element.index)
 
     def execute_if_not_processing(self, idx, element, command):
         pass
 
 
 class SetupStrategyMDF(ABC):
-    def __init__(self, obj, collection: bpy.types.Collection = None, preview_instance: SetupStrategy = None) -> None:
+    def __init__(self, obj, collection: bpy.types.Collection = None, preview_instance: SetupStrategy = None, plan: CommandPlan = None) -> None:
         if type(obj) is not setup_objects.SourceObject:
             raise TypeError('')
         super().__init__()
         self._obj = obj.real
         self._obj_name = obj.name
         self._self = obj
-        set_active_only(self._obj)
+        self.plan = plan if plan is not None else CommandPlan(self._obj)
 
         if collection is None:
             self._collection = bpy.context.scene.collection
@@ -233,53 +340,82 @@ class SetupStrategyMDF(ABC):
 
 
 class Strategy_MDF_Undivision(SetupStrategyMDF):
-    def __init__(self, obj, collection: bpy.types.Collection = None, preview_instance: SetupStrategy = None) -> None:
-        super().__init__(obj, collection, preview_instance)
+    def __init__(self, obj, collection: bpy.types.Collection = None, preview_instance: SetupStrategy = None, plan: CommandPlan = None) -> None:
+        super().__init__(obj, collection, preview_instance, plan)
         self._it = self._obj.modifiers
 
-    def execute_if_undiv(self, elements_name):
-        self.elements_name = elements_name
-        set_active_only(self._obj)
-        self.update_num_vert()
+    def set_phases(self, elements_name_before, elements_name_undiv, elements_name_after):
+        self.elements_name_before = elements_name_before
+        self.elements_name = elements_name_undiv
+        self.elements_name_after = elements_name_after
+
+    def execute_phases_steps(self, elements_name_before, elements_name_undiv, elements_name_after):
+        # シェイプキーごとのクローンと評価を1回にまとめるため、3つのフェーズを1パスで適用する
+        self.elements_name = elements_name_undiv
+
+        if not Strategy_VG_NonDecimate.is_required(self._obj, self.plan):
+            yield from apply_modifier_steps(
+                target_object=self._obj,
+                target_modifiers=elements_name_before + elements_name_undiv + elements_name_after,
+                tmpcoll=self._collection
+            )
+            return
 
-        apply_modifier(
+        # VG_NonDecimateはアンディビジョン適用直後のメッシュに対して実行する必要があるため、後続フェーズは分ける
+        vertex_counts = yield from scale_steps(apply_modifier_steps(
             target_object=self._obj,
-            target_modifiers=elements_name,
+            target_modifiers=elements_name_before + elements_name_undiv,
             tmpcoll=self._collection
-        )
+        ), 0.0, 0.5)
+        self._num_vert = vertex_counts[len(elements_name_before)]
 
-        Strategy_VG_NonDecimate(self._self, None, self).execute()
+        Strategy_VG_NonDecimate(self._self, None, self, self.plan).execute()
+        yield 0.5
 
-    def execute_if_not_undiv(self, elements_name):
-        set_active_only(self._obj)
-        apply_modifier(
+        yield from scale_steps(apply_modifier_steps(
             target_object=self._obj,
-            target_modifiers=elements_name,
+            target_modifiers=elements_name_after,
             tmpcoll=self._collection
-        )
+        ), 0.5, 1.0)
 
-    def execute(self):
+    def execute_steps(self):
+        # モディファイアの振り分けだけを先に行い、適用はシェイプキー単位の進捗を返しながら進める
         ModifierParser.parser(self)
+        yield from self.execute_phases_steps(self.elements_name_before, self.elements_name, self.elements_name_after)
+
+        deselect_all_elements(self._obj.data)
+
+    def execute(self):
+        run_steps(self.execute_steps())
 
 
 class Strategy_VG_NonDecimate(SetupStrategyMDF):
-    def __init__(self, obj, collection: bpy.types.Collection = None, preview_instance: SetupStrategy = None) -> None:
-        super().__init__(obj, collection, preview_instance)
+    def __init__(self, obj, collection: bpy.types.Collection = None, preview_instance: SetupStrategy = None, plan: CommandPlan = None) -> None:
+        super().__init__(obj, collection, preview_instance, plan)
         self._it = self._obj.vertex_groups
 
     @property
     def preview_instance(self):
         return self._preview_instance
 
+    @staticmethod
+    def is_required(obj, plan: CommandPlan):
+        # 実際に実行されるコマンドと同じスペックの有効状態で判定する
+        vertex_group_names = set(vg.name for vg in obj.vertex_groups)
+        for source, command in plan.commands('vg_nondecimate').items():
+            if source in vertex_group_names and plan.specs.get(command.get(Props.SPEC), False):
+                return True
+        return False
+
     def execute_if_processing(self, idx, element, command):
         num_vert_old = self._preview_instance._num_vert
         self.update_num_vert()
         num_vert_new = self._num_vert
         select_vert(self._obj, element.name, num_vert_old, num_vert_new)
-        delete_selected_edgeloop()
-
-        bpy.ops.mesh.select_all(action='DESELECT')
-        bpy.ops.object.mode_set(mode='OBJECT')
+        with edit_object_context(self._obj):
+            delete_selected_edgeloop()
+            bpy.ops.object.mode_set(mode='OBJECT')
+        deselect_all_elements(self._obj.data)
 
     def execute_if_not_processing(self, idx, element, command):
         pass
@@ -292,22 +428,12 @@ class Prefix_VG_MergeVertex:
     def __init__(self, obj: bpy.types.Object) -> None:
         self._obj = obj
         self._it = obj.vertex_groups
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
 
-    @mesh_operator
     def execute_if_processing(self, idx, element: bpy.types.VertexGroup, source_obj_name, source_name, merge_distance):
-        self._obj.vertex_groups.active_index = element.index
-        bpy.ops.object.vertex_group_select()
         destination_name = Syntax.VG_MERGE_VTX_DST + source_obj_name + Syntax.UNDER + source_name
-        for element_destination in self._it:
-            if element_destination.name.startswith(destination_name):
-                try:
-                    self._obj.vertex_groups.active_index = element_destination.index
-                except KeyError:
-                    logger.info('Not destination prefix.')
-                    pass
-                bpy.ops.object.vertex_group_select()
-        bpy.ops.mesh.remove_doubles(threshold=merge_distance)
+        destination_group_indices = tuple(element_destination.index for element_destination in self._it if element_destination.name.startswith(destination_name))
+        merge_vertex_group_pairs(self._obj, element.index, destination_group_indices, merge_distance)
 
     def execute(self):
         for idx, element in enumerate(self._it):
@@ -330,21 +456,20 @@ class Prefix_VG_MergeVertex:
             except ValueError as e:
                 raise SAMKSyntaxError(f'Not float number. code: {e}')
 
-            logger.info(f'Source object : {source_obj_name}, Source : {source_name}, Merge distance : {merge_distance}')
+            logger.info('Source object : %s, Source : %s, Merge distance : %s', source_obj_name, source_name, merge_distance)
 
             self.execute_if_processing(idx, element, source_obj_name, source_name, merge_distance)
 
 
 class MTReplaceForTranslating:
     def __init__(self, obj: bpy.types.Object, postfix: str = '_postfixname') -> None:
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         self._obj = obj
-        set_active_only(self._obj)
         self._postfix = postfix
         self._it = self._obj.material_slots
 
     def execute(self):
-        logger.info(f'Do execute : {self.__class__.__name__}')
+        logger.info('Do execute : %s', self.__class__.__name__)
         for idx, element in enumerate(self._it):
             mat_orig = element.material
             mat_name_new = mat_orig.name + self._postfix
@@ -358,25 +483,25 @@ class MTReplaceForTranslating:
 
 class CleanupPropertySource(ABC):
     def __init__(self, obj) -> None:
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         super().__init__()
         if type(obj) is not setup_objects.SourceObject:
             raise TypeError('')
         self._obj = obj.real
-        set_active_only(self._obj)
 
     @abstractmethod
     def execute_if_processing(self, element):
         pass
 
     def execute(self):
-        logger.info(f'Do execute : {self.__class__.__name__}')
+        logger.info('Do execute : %s', self.__class__.__name__)
         strategy_class_name = self.__class__.__name__
 
-        bpy.context.scene.samk.scope_type_to_edit = strategy_class_name.lstrip('CleanupPropertySource').lstrip(Syntax.UNDER)
-        current_scope_type = setting_command.current_scope()
+        # UIのスコープ(scope_type_to_edit)を切り替えずに、対象オブジェクトのスコープから直接コマンドを得る
+        scope_type_name = strategy_class_name.lstrip('CleanupPropertySource').lstrip(Syntax.UNDER)
+        scope_type = getattr(setting_command, 'Scope' + Syntax.UNDER + scope_type_name)(self._obj)
 
-        command_source_names = [command.source for command in current_scope_type.this_type_commands()]
+        command_source_names = [command.source for command in scope_type.this_type_commands()]
 
         for element in reversed(self._it):
             if element.name in command_source_names:
@@ -392,7 +517,7 @@ class CleanupPropertySource_SK(CleanupPropertySource):
             self._it = tuple()
 
     def execute_if_processing(self, element):
-        logger.info(f'Cleanp key : {element.name}')
+        logger.info('Cleanp key : %s', element.name)
         self._obj.shape_key_remove(element)
 
 
@@ -402,17 +527,15 @@ class CleanupPropertySource_VG(CleanupPropertySource):
         self._it = self._obj.vertex_groups
 
     def execute_if_processing(self, element):
-        logger.info(f'Cleanp key : {element.name}')
-        self._it.active_index = element.index
-        bpy.ops.object.vertex_group_remove()
+        logger.info('Cleanp key : %s', element.name)
+        self._it.remove(element)
 
 
 class CleanupRelease(ABC):
     def __init__(self, obj: bpy.types.Object) -> None:
         super().__init__()
-        logger.info(f'Start Initiating Instance : {self.__class__.__name__}')
+        logger.info('Start Initiating Instance : %s', self.__class__.__name__)
         self._obj = obj
-        set_active_only(self._obj)
         self._keys = (Syntax.P_HEADER, Syntax.DISABLED)
 
     @abstractmethod
@@ -420,7 +543,7 @@ class CleanupRelease(ABC):
         pass
 
     def execute(self):
-        logger.info(f'Do execute : {self.__class__.__name__}')
+        logger.info('Do execute : %s', self.__class__.__name__)
         del_parser(self._obj, self._it, self._keys, self.execute_if_processing)
 
 
@@ -433,7 +556,7 @@ class CleanupRelease_SK(CleanupRelease):
             self._it = tuple()
 
     def execute_if_processing(self, obj: bpy.types.Object, element):
-        logger.info(f'Cleanp key : {element.name}')
+        logger.info('Cleanp key : %s', element.name)
         obj.shape_key_remove(element)
 
 
@@ -443,9 +566,22 @@ class CleanupRelease_VG(CleanupRelease):
         self._it = obj.vertex_groups
 
     def execute_if_processing(self, obj: bpy.types.Object, element):
-        logger.info(f'Cleanp key : {element.name}')
-        self._it.active_index = element.index
-        bpy.ops.object.vertex_group_remove()
+        logger.info('Cleanp key : %s', element.name)
+        self._it.remove(element)
+
+
+class PruneBeforeJoin_SK(CleanupRelease_SK):
+    # 結合後のCleanupRelease_SKで削除されるシェイプキーは、結合前に各オブジェクトから削除しておく
+    pass
+
+
+class PruneBeforeJoin_VG(CleanupRelease_VG):
+    # 結合後のCleanupRelease_VGで削除される頂点グループは、結合前に各オブジェクトから削除しておく
+    # ただし頂点の結合に使うグループは、結合後のPrefix_VG_MergeVertexで使うため残す
+    def execute_if_processing(self, obj: bpy.types.Object, element):
+        if element.name.startswith(Syntax.VG_MERGE_VTX):
+            return
+        super().execute_if_processing(obj, element)
 
 
 strategy_classes = [
@@ -475,27 +611,12 @@ def strategy_classes_callback(scene, context):
 class Parser(ABC):
     @classmethod
     def parser(cls, setup_strategy_instance: SetupStrategy):
-        logger.info(f'Start Parser Class : {cls.__name__}')
+        logger.info('Start Parser Class : %s', cls.__name__)
         cls.setup_strategy = setup_strategy_instance
         strategy_class_name = cls.setup_strategy.__class__.__name__
         command_property_name = strategy_class_name.lstrip('Strategy').lstrip(Syntax.UNDER).lower()
-        commands_source = eval(f'bpy.context.active_object.samk_strategies.{command_property_name}')
-
-        commands = dict()
-        for command_source in commands_source:
-            properties_for_add = dict()
-            # for property_name in ('source', 'destination', 'destination_obj', 'merge_distance', 'spec'):
-            for property_name in ALL_PROPS:
-                try:
-                    properties_for_add[property_name] = getattr(command_source, property_name)
-                except AttributeError:
-                    logger.info(f'property \'{property_name}\' is not found, skipped.')
-                    continue
-                commands[command_source.source] = properties_for_add
-
-        specs = dict()
-        for spec in bpy.context.scene.samk.specs:
-            specs[spec.name] = spec.is_enabled
+        commands = cls.setup_strategy.plan.commands(command_property_name)
+        specs = cls.setup_strategy.plan.specs
 
         cls._initialize_preprocess()
 
@@ -503,11 +624,11 @@ class Parser(ABC):
             try:
                 command = commands[element.name]
             except KeyError:
-                logger.info(f'source key \'{element.name}\' is not found in commands. \'do_process\' is set to False.')
+                logger.info('source key \'%s\' is not found in commands. \'do_process\' is set to False.', element.name)
                 cls.do_process = False
                 command = None
             else:
-                logger.info(f'source key \'{element.name}\' is found in commands. \'do_process\' is set to True.')
+                logger.info('source key \'%s\' is found in commands. \'do_process\' is set to True.', element.name)
                 cls.do_process = True
 
                 spec_name = command[Props.SPEC]
@@ -515,10 +636,10 @@ class Parser(ABC):
                 try:
                     cls.is_enabled_spec = specs[spec_name]
                 except KeyError:
-                    logger.info(f'spec \'{spec_name}\' is not found in specs. \'is_enabled_spec\' is set to False.')
+                    logger.info('spec \'%s\' is not found in specs. \'is_enabled_spec\' is set to False.', spec_name)
                     cls.is_enabled_spec = False
                 else:
-                    logger.info(f'spec \'{spec_name}\' is found in specs. \'is_enabled_spec\' is set to {cls.is_enabled_spec}.')
+                    logger.info('spec \'%s\' is found in specs. \'is_enabled_spec\' is set to %s.', spec_name, cls.is_enabled_spec)
 
                 cls._eval_destination_mdf(command)
 
@@ -538,10 +659,10 @@ class Parser(ABC):
     def _execute_loop_part(cls, idx, element, command):
         if cls.do_process and cls.is_enabled_spec:
             cls.setup_strategy.execute_if_processing(idx, element, command)
-            logger.info(f'{cls.setup_strategy.__class__.__name__}\'s execute_if_processing func is executed.')
+            logger.info('%s\'s execute_if_processing func is executed.', cls.setup_strategy.__class__.__name__)
             return
         cls.setup_strategy.execute_if_not_processing(idx, element, command)
-        logger.info(f'{cls.setup_strategy.__class__.__name__}\'s execute_if_not_processing func is executed.')
+        logger.info('%s\'s execute_if_not_processing func is executed.', cls.setup_strategy.__class__.__name__)
 
     @classmethod
     @abstractmethod
@@ -560,10 +681,10 @@ class CommandParser(Parser):
     def _execute_loop_part(cls, idx, element, command):
         if cls.do_process and cls.is_enabled_spec:
             cls.setup_strategy.execute_if_processing(idx, element, command)
-            logger.info(f'{cls.setup_strategy.__class__.__name__}\'s execute_if_processing func is executed.')
+            logger.info('%s\'s execute_if_processing func is executed.', cls.setup_strategy.__class__.__name__)
             return
         cls.setup_strategy.execute_if_not_processing(idx, element, command)
-        logger.info(f'{cls.setup_strategy.__class__.__name__}\'s execute_if_not_processing func is executed.')
+        logger.info('%s\'s execute_if_not_processing func is executed.', cls.setup_strategy.__class__.__name__)
 
     @classmethod
     def _eval_destination_mdf(cls, command):
@@ -586,12 +707,12 @@ class NonDecimateParser(Parser):
             else:
                 raise SAMKSyntaxError('The number of Subdivision modifiers with undivision command that can be set on an object is limited to one.')
 
-            logger.info(f'{destination_mdf}, {element_name}')
+            logger.info('%s, %s', destination_mdf, element_name)
             if destination_mdf == element_name:
                 cls.do_process = True
             else:
                 cls.do_process = False
-            logger.info(f'Key \'destination_mdf\' is found in command. \'do_process\' is set to {cls.do_process}.')
+            logger.info('Key \'destination_mdf\' is found in command. \'do_process\' is set to %s.', cls.do_process)
 
 
 class ModifierParser(Parser):
@@ -619,16 +740,8 @@ class ModifierParser(Parser):
 
     @classmethod
     def _execute_postprocess(cls):
-        logger.info(f'Do execute keys : {cls.modifier_names_before_undiv}')
-        cls.setup_strategy.execute_if_not_undiv(cls.modifier_names_before_undiv)
-        logger.info(f'Do execute keys : {cls.modifier_names_undiv}')
-        cls.setup_strategy.execute_if_undiv(cls.modifier_names_undiv)
-        logger.info(f'Do execute keys : {cls.modifier_names_after_undiv}')
-        cls.setup_strategy.execute_if_not_undiv(cls.modifier_names_after_undiv)
-
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='DESELECT')
-        bpy.ops.object.mode_set(mode='OBJECT')
+        logger.info('Do execute keys : %s / %s / %s', cls.modifier_names_before_undiv, cls.modifier_names_undiv, cls.modifier_names_after_undiv)
+        cls.setup_strategy.set_phases(cls.modifier_names_before_undiv, cls.modifier_names_undiv, cls.modifier_names_after_undiv)
 
     @classmethod
     def _eval_destination_mdf(cls, command):
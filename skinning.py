@@ -0,0 +1,186 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+
+import logging
+
+try:
+    import numpy
+except ImportError:  # Blender同梱以外のPythonではnumpyが無い場合がある
+    numpy = None
+
+from .syntax import Syntax
+
+
+logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
+
+
+# 直近の翻訳で最適化したオブジェクトの統計。オペレータの報告に使う
+_stats = list()
+
+
+class SkinningStats:
+    def __init__(self, name, num_entries_before, num_entries_after, max_influences_before, max_influences_after, num_capped_vertices) -> None:
+        self.name = name
+        self.num_entries_before = num_entries_before
+        self.num_entries_after = num_entries_after
+        self.max_influences_before = max_influences_before
+        self.max_influences_after = max_influences_after
+        self.num_capped_vertices = num_capped_vertices
+
+    def __str__(self):
+        return (f'{self.name}: weights {self.num_entries_before} -> {self.num_entries_after}, '
+                f'max influences {self.max_influences_before} -> {self.max_influences_after}, '
+                f'{self.num_capped_vertices} vertices capped')
+
+
+def clear_skinning_stats():
+    _stats.clear()
+
+
+def collected_skinning_stats():
+    return tuple(_stats)
+
+
+def deform_group_indices(obj: bpy.types.Object):
+    # アーマチュアの変形ボーンに対応する頂点グループだけを対象にする
+    armatures = [mdf.object for mdf in obj.modifiers if mdf.type == 'ARMATURE' and mdf.object is not None]
+    if obj.parent is not None and obj.parent.type == 'ARMATURE':
+        armatures.append(obj.parent)
+    deform_bone_names = set(bone.name for armature in armatures for bone in armature.data.bones if bone.use_deform)
+    return set(vg.index for vg in obj.vertex_groups if vg.name in deform_bone_names)
+
+
+def extract_weights(obj: bpy.types.Object, group_indices):
+    # 疎な重み行列を (頂点, グループ, 重み) の3つの列として一度だけ読み出す
+    vertex_column = list()
+    group_column = list()
+    weight_column = list()
+    for vert in obj.data.vertices:
+        for element in vert.groups:
+            if element.group in group_indices:
+                vertex_column.append(vert.index)
+                group_column.append(element.group)
+                weight_column.append(element.weight)
+    return vertex_column, group_column, weight_column
+
+
+def _optimize_numpy(vertex_column, group_column, weight_column, epsilon, max_influences, quantize_steps):
+    v = numpy.array(vertex_column, dtype=numpy.int64)
+    g = numpy.array(group_column, dtype=numpy.int64)
+    w = numpy.array(weight_column, dtype=numpy.float64)
+
+    # 頂点ごとに重みの大きい順に並べ、頂点内の順位を求める
+    order = numpy.lexsort((-w, v))
+    v, g, w = v[order], g[order], w[order]
+    starts = numpy.flatnonzero(numpy.r_[True, numpy.diff(v) != 0])
+    counts = numpy.diff(numpy.r_[starts, len(v)])
+    rank = numpy.arange(len(v)) - numpy.repeat(starts, counts)
+
+    # 最大の重みは、しきい値未満でも頂点がどのボーンにも追従しなくならないよう残す
+    keep = (rank < max_influences) & (w > 0.0) & ((w > epsilon) | (rank == 0))
+    v, g, w, rank = v[keep], g[keep], w[keep], rank[keep]
+    if len(v) == 0:
+        return v, g, w
+
+    sums = numpy.bincount(v, weights=w)
+    w = w / sums[v]
+    if quantize_steps > 0:
+        w = numpy.round(w * quantize_steps) / quantize_steps
+        # 量子化の誤差は各頂点の最大の重みに寄せ、合計を1に保つ
+        residual = 1.0 - numpy.bincount(v, weights=w)
+        first = rank == 0
+        w[first] += residual[v[first]]
+        # 0に丸められた重みは影響なしとして削除する
+        nonzero = w > 0.0
+        v, g, w = v[nonzero], g[nonzero], w[nonzero]
+    return v, g, w
+
+
+def _optimize_python(vertex_column, group_column, weight_column, epsilon, max_influences, quantize_steps):
+    influences = dict()
+    for vertex, group, weight in zip(vertex_column, group_column, weight_column):
+        influences.setdefault(vertex, list()).append((weight, group))
+    v, g, w = list(), list(), list()
+    for vertex, elements in influences.items():
+        elements.sort(key=lambda element: (-element[0], element[1]))
+        elements = [element for rank, element in enumerate(elements[:max_influences])
+                    if element[0] > 0.0 and (element[0] > epsilon or rank == 0)]
+        total = sum(weight for weight, _ in elements)
+        if total <= 0.0:
+            continue
+        weights = [weight / total for weight, _ in elements]
+        if quantize_steps > 0:
+            weights = [round(weight * quantize_steps) / quantize_steps for weight in weights]
+            weights[0] += 1.0 - sum(weights)
+        for weight, (_, group) in zip(weights, elements):
+            if weight <= 0.0:
+                continue
+            v.append(vertex)
+            g.append(group)
+            w.append(weight)
+    return v, g, w
+
+
+def _max_influences(vertex_column):
+    counts = dict()
+    for vertex in vertex_column:
+        counts[vertex] = counts.get(vertex, 0) + 1
+    return max(counts.values(), default=0), counts
+
+
+def write_weights(obj: bpy.types.Object, group_indices, vertex_column, group_column, weight_column):
+    # 削除はグループごと、更新はグループと重みが同じものごとにまとめて書き込む
+    new_weights = dict()
+    for vertex, group, weight in zip(vertex_column, group_column, weight_column):
+        new_weights[(int(vertex), int(group))] = float(weight)
+
+    removals = dict()
+    for vert in obj.data.vertices:
+        for element in vert.groups:
+            if element.group in group_indices and (vert.index, element.group) not in new_weights:
+                removals.setdefault(element.group, list()).append(vert.index)
+    updates = dict()
+    for (vertex, group), weight in new_weights.items():
+        updates.setdefault((group, weight), list()).append(vertex)
+
+    vertex_groups = {vg.index: vg for vg in obj.vertex_groups}
+    for group, vertices in removals.items():
+        vertex_groups[group].remove(vertices)
+    for (group, weight), vertices in updates.items():
+        vertex_groups[group].add(vertices, weight, 'REPLACE')
+
+
+def optimize_skin_weights(obj: bpy.types.Object, epsilon, max_influences, quantize_steps=0):
+    group_indices = deform_group_indices(obj)
+    if not group_indices:
+        logger.info('No deform vertex group : %s', obj.name)
+        return None
+    vertex_column, group_column, weight_column = extract_weights(obj, group_indices)
+    max_influences_before, counts = _max_influences(vertex_column)
+    num_capped_vertices = sum(1 for count in counts.values() if count > max_influences)
+
+    optimize = _optimize_numpy if numpy is not None else _optimize_python
+    new_vertex_column, new_group_column, new_weight_column = optimize(vertex_column, group_column, weight_column, epsilon, max_influences, quantize_steps)
+    write_weights(obj, group_indices, new_vertex_column, new_group_column, new_weight_column)
+
+    max_influences_after, _ = _max_influences(int(vertex) for vertex in new_vertex_column)
+    stats = SkinningStats(obj.name, len(vertex_column), len(new_vertex_column), max_influences_before, max_influences_after, num_capped_vertices)
+    logger.info('Optimize skin weights : %s', stats)
+    _stats.append(stats)
+    return stats
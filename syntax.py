@@ -94,6 +94,8 @@ class Syntax:
 
     COL_TMP = P_HEADER + 'temporary'  # automatic generation
     COL_TMP_STRATEGY = COL_TMP + '_strategy'  # automatic generation
+    COL_TMP_SHARED = COL_TMP + '_shared'  # automatic generation
+    COL_BACKUP = P_HEADER + 'backup'  # automatic generation
     # COL_SRC = P_HEADER + 'src' + UNDER
     # COL_SUBSRC = P_HEADER + 'subsrc' + UNDER
     COL_SRC = 'src' + UNDER
@@ -21,14 +21,18 @@ import bpy
 
 from .file import read_profile
 
-from .function import clear_shape_keys, copy_nonlink, create_new_mesh_obj, delete_object, exclude_coll, root_name_in, select_object, set_active_object
+from .function import VisibilityTransaction, clear_shape_keys, compact_shape_keys_by_scene_setting, consolidate_material_slots_by_scene_setting, copy_nonlink, create_new_mesh_obj, delete_object, root_name_in, select_object, set_active_object
 
 import logging
 
 from .setup.setup_strategy import MTReplaceForTranslating
 
+from .skinning import optimize_skin_weights
+
 from .syntax import SAMKStructureError, Syntax
 
+from .vertexcache import reorder_for_vertex_cache_by_scene_setting
+
 
 logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
 
@@ -36,9 +40,9 @@ logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
 def logger_deco(func):
     @wraps(func)
     def __wrapper(*args, **kwargs):
-        logger.info(f'Start Processing function : {func.__name__}')
+        logger.info('Start Processing function : %s', func.__name__)
         ret = func(*args, **kwargs)
-        logger.info(f'Finished Processing function : {func.__name__}')
+        logger.info('Finished Processing function : %s', func.__name__)
         return ret
     return __wrapper
 
@@ -86,7 +90,6 @@ def translate_obj_check(obj, postfix):
         collection_autogen = bpy.data.collections[Syntax.COL_AUTOGEN]
     except KeyError:
         raise SAMKStructureError(f'Collection \'{collection_src_name}\' not found.')
-    exclude_coll(collection_autogen.name, False)
 
     try:
         container_orig = bpy.data.objects[container_name + postfix]
@@ -99,7 +102,10 @@ def translate_obj_check(obj, postfix):
     except KeyError:
         collection_trans = bpy.data.collections.new(root_name_in(src_name) + postfix)
         bpy.context.scene.collection.children.link(collection_trans)  # シーンとコレクションの紐づけ
-    exclude_coll(collection_trans.name, False)
+    # 古い翻訳済みオブジェクトをオペレータで削除するため、翻訳先コレクションだけは先に表示する
+    # 自動生成コレクションは最終的に除外されるため、一時的な表示の切り替えは行わない
+    with VisibilityTransaction() as transaction:
+        transaction.exclude(collection_trans.name, False)
 
     collection_to = bpy.data.collections.new(Syntax.COL_TMP)  # コレクションの新規作成
     bpy.context.scene.collection.children.link(collection_to)  # シーンとコレクションの紐づけ
@@ -117,8 +123,9 @@ def translate_obj_check(obj, postfix):
     bpy.context.scene.collection.objects.link(container)  # シーンコレクションに移動
 
     collection_release_name = root_name_in(src_name) + Syntax.COL_RELEASE
-    exclude_coll(collection_release_name, True)
-    exclude_coll(collection_autogen.name, True)
+    with VisibilityTransaction() as transaction:
+        transaction.exclude(collection_release_name, True)
+        transaction.exclude(collection_autogen.name, True)
 
     return released_obj, container, collection_to, collection_trans, src_name
 
@@ -219,7 +226,7 @@ def translate_mat_replace(released_obj, postfix):
 def translate_join(released_obj, container, collection_to, collection_trans, src_name, postfix):
     # Join function should be defined in the future.
     orphan_mesh_name = released_obj.data.name
-    logger.info(f'merged mesh name : {orphan_mesh_name}')
+    logger.info('merged mesh name : %s', orphan_mesh_name)
 
     bpy.ops.object.select_all(action='DESELECT')
     select_object(released_obj, True)
@@ -233,8 +240,8 @@ def translate_join(released_obj, container, collection_to, collection_trans, src
     orphan_release_obj = bpy.data.objects.new(orphan_mesh_name, bpy.data.meshes[orphan_mesh_name])
     collection_to.objects.link(orphan_release_obj)
 
-    logger.info(f'Deleted orphan object name : {orphan_release_obj.name}')
-    logger.info(f'Deleted orphan mesh name (must be equal to merged mesh) : {orphan_release_obj.data.name}')
+    logger.info('Deleted orphan object name : %s', orphan_release_obj.name)
+    logger.info('Deleted orphan mesh name (must be equal to merged mesh) : %s', orphan_release_obj.data.name)
     delete_object(orphan_release_obj)
 
     collection_trans.objects.link(container)  # オブジェクトをリリースコレクションに移動
@@ -246,9 +253,21 @@ def translate_join(released_obj, container, collection_to, collection_trans, src
     return container
 
 
+def translation_postfix():
+    scene = bpy.context.scene
+    if scene.samk.translation_mode != Syntax.MODE_UDEF:
+        return scene.samk.translation_mode
+    return Syntax.UNDER + scene.samk.udef_mode_name
+
+
+def translated_object_name(obj):
+    # translate_obj_checkで置き換えられるオブジェクト名
+    return obj.name.split(Syntax.UNDER)[0] + translation_postfix()
+
+
 @loop_process
 def do_translate(obj):
-    logger.info(f'Translation object : {obj.name}')
+    logger.info('Translation object : %s', obj.name)
     scene = bpy.context.scene
     translate_mode = scene.samk.translation_mode
     bgroup_fpath = scene.samk.profile_bgroup.file_path
@@ -256,14 +275,11 @@ def do_translate(obj):
     bgroup_enable = scene.samk.profile_bgroup.is_enabled_translation
     skey_enable = scene.samk.profile_skey.is_enabled_translation
 
-    logger.info(f'Translation mode : {translate_mode}')
-    logger.info(f'Valid BoneGroup : {bgroup_enable}')
-    logger.info(f'Valid ShapeKey : {skey_enable}')
+    logger.info('Translation mode : %s', translate_mode)
+    logger.info('Valid BoneGroup : %s', bgroup_enable)
+    logger.info('Valid ShapeKey : %s', skey_enable)
 
-    if translate_mode != Syntax.MODE_UDEF:
-        postfix = translate_mode
-    else:
-        postfix = Syntax.UNDER + scene.samk.udef_mode_name
+    postfix = translation_postfix()
 
     released_obj, container, collection_to, collection_trans, src_name = \
         translate_obj_check(obj, postfix)
@@ -276,8 +292,15 @@ def do_translate(obj):
 
     if translate_mode not in (Syntax.MODE_SP, Syntax.MODE_UDEF) or (translate_mode == Syntax.MODE_UDEF and skey_enable):
         translate_shapekey(released_obj, skey_fpath)
+        compact_shape_keys_by_scene_setting(released_obj)
 
     if translate_mode != Syntax.MODE_UDEF or (translate_mode == Syntax.MODE_UDEF and scene.samk.is_enabled_mat_replacing):
         translate_mat_replace(released_obj, postfix)
+    consolidate_material_slots_by_scene_setting(released_obj)
+    if translate_mode == Syntax.MODE_GE and scene.samk.is_enabled_ge_skinning:
+        optimize_skin_weights(released_obj, scene.samk.ge_weight_epsilon, scene.samk.ge_max_influences, scene.samk.ge_weight_quantize_steps)
+
+    translated_obj = translate_join(released_obj, container, collection_to, collection_trans, src_name, postfix)
+    reorder_for_vertex_cache_by_scene_setting(translated_obj)
 
-    return translate_join(released_obj, container, collection_to, collection_trans, src_name, postfix)
+    return translated_obj
@@ -0,0 +1,183 @@
+# Copyright (C) 2022 SyureOjisan
+#
+# This file is part of WM Setup Tools.
+#
+# WM Setup Tools is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# WM Setup Tools is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with WM Setup Tools.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+import bmesh
+
+from collections import deque
+
+import logging
+
+from .syntax import Syntax
+
+
+logger = logging.getLogger(f'{Syntax.TOOLNAME}.{__name__}')
+
+
+# 直近の翻訳で並べ替えたオブジェクトの統計。オペレータの報告に使う
+_stats = list()
+
+
+class VertexCacheStats:
+    def __init__(self, name, acmr_before, acmr_after) -> None:
+        self.name = name
+        self.acmr_before = acmr_before
+        self.acmr_after = acmr_after
+
+    def __str__(self):
+        return f'{self.name}: ACMR {self.acmr_before:.3f} -> {self.acmr_after:.3f}'
+
+
+def clear_vertex_cache_stats():
+    _stats.clear()
+
+
+def collected_vertex_cache_stats():
+    return tuple(_stats)
+
+
+def average_cache_miss_ratio(faces, face_order, cache_size):
+    # 多角形を扇状に三角形分割し、FIFOキャッシュでの三角形あたりのキャッシュミス数を求める
+    cache = deque()
+    cached = set()
+    num_misses = 0
+    num_triangles = 0
+    for face_index in face_order:
+        verts = faces[face_index]
+        for i in range(1, len(verts) - 1):
+            num_triangles += 1
+            for vert in (verts[0], verts[i], verts[i + 1]):
+                if vert in cached:
+                    continue
+                num_misses += 1
+                cache.append(vert)
+                cached.add(vert)
+                if len(cache) > cache_size:
+                    cached.discard(cache.popleft())
+    if num_triangles == 0:
+        return 0.0
+    return num_misses / num_triangles
+
+
+def tipsify(faces, num_vertices, cache_size):
+    # Tipsify (Sander et al. 2007) を多角形単位で適用した面の順序を返す
+    # 同順位は常に若いインデックスを優先するため、同じ入力からは同じ順序になる
+    adjacency = [list() for _ in range(num_vertices)]
+    for face_index, verts in enumerate(faces):
+        for vert in verts:
+            adjacency[vert].append(face_index)
+    live = [len(face_indices) for face_indices in adjacency]
+    timestamps = [0] * num_vertices
+    emitted = [False] * len(faces)
+    dead_end = list()
+    face_order = list()
+    stamp = cache_size + 1
+    cursor = 0
+
+    def next_unfinished_vertex():
+        nonlocal cursor
+        while dead_end:
+            vert = dead_end.pop()
+            if live[vert] > 0:
+                return vert
+        while cursor < num_vertices:
+            if live[cursor] > 0:
+                return cursor
+            cursor += 1
+        return -1
+
+    fanning = next_unfinished_vertex()
+    while fanning >= 0:
+        # 挿入順を保つためdictを順序付き集合として使う
+        candidates = dict()
+        for face_index in adjacency[fanning]:
+            if emitted[face_index]:
+                continue
+            emitted[face_index] = True
+            face_order.append(face_index)
+            for vert in faces[face_index]:
+                dead_end.append(vert)
+                candidates[vert] = None
+                live[vert] -= 1
+                if stamp - timestamps[vert] > cache_size:
+                    timestamps[vert] = stamp
+                    stamp += 1
+
+        fanning = -1
+        best_priority = -1
+        for vert in candidates:
+            if live[vert] <= 0:
+                continue
+            priority = 0
+            if stamp - timestamps[vert] + 2 * live[vert] <= cache_size:
+                priority = stamp - timestamps[vert]
+            if priority > best_priority:
+                best_priority = priority
+                fanning = vert
+        if fanning < 0:
+            fanning = next_unfinished_vertex()
+    return face_order
+
+
+def vertex_order(faces, face_order, num_vertices):
+    # 面の順序で最初に参照された順に頂点を並べ、どの面にも属さない頂点は元の順で末尾に置く
+    new_indices = dict()
+    for face_index in face_order:
+        for vert in faces[face_index]:
+            if vert not in new_indices:
+                new_indices[vert] = len(new_indices)
+    for vert in range(num_vertices):
+        if vert not in new_indices:
+            new_indices[vert] = len(new_indices)
+    return new_indices
+
+
+def reorder_for_vertex_cache(obj: bpy.types.Object, cache_size):
+    mesh = obj.data
+    faces = [tuple(polygon.vertices) for polygon in mesh.polygons]
+    if not faces:
+        return None
+    num_vertices = len(mesh.vertices)
+    acmr_before = average_cache_miss_ratio(faces, range(len(faces)), cache_size)
+    face_order = tipsify(faces, num_vertices, cache_size)
+    acmr_after = average_cache_miss_ratio(faces, face_order, cache_size)
+    face_ranks = {face_index: rank for rank, face_index in enumerate(face_order)}
+    vertex_ranks = vertex_order(faces, face_order, num_vertices)
+
+    # BMeshを通して並べ替えることで、シェイプキー、頂点グループ、UVなどの
+    # 頂点・ループ単位のレイヤーが同じ順序で付け替えられる
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bm.verts.index_update()
+    bm.faces.index_update()
+    bm.faces.sort(key=lambda face: face_ranks[face.index])
+    bm.verts.sort(key=lambda vert: vertex_ranks[vert.index])
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+
+    stats = VertexCacheStats(obj.name, acmr_before, acmr_after)
+    logger.info('Reorder for vertex cache : %s', stats)
+    _stats.append(stats)
+    return stats
+
+
+def reorder_for_vertex_cache_by_scene_setting(obj):
+    samk = bpy.context.scene.samk
+    if not samk.is_enabled_vertex_cache_reorder:
+        return None
+    return reorder_for_vertex_cache(obj, samk.vertex_cache_size)